@@ -0,0 +1,126 @@
+"""
+Read-through LRU cache of clients, purchases and payments by id.
+
+Invalidation is driven by `PRAGMA data_version`, read on a dedicated watcher
+connection: its value changes whenever any other connection commits, whether
+it is a pooled connection of this process (the writer) or another process
+(CLI scripts, a second server). Every lookup checks it first and drops the
+whole cache when it moved, so a committed write is never served stale.
+
+Reads inside a `transaction()` bypass the cache: they may see uncommitted
+changes of the transaction itself, which must not be shared.
+"""
+import copy
+import functools
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, TypeVar
+from config import CACHE_MAX_ENTRIES
+from app import database
+
+T = TypeVar("T")
+
+class EntityCache:
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        # bumped on every clear, so a load that started before it is not stored
+        self._generation = 0
+
+        self._watcher: sqlite3.Connection | None = None
+        self._watcher_lock = threading.Lock()
+        self._data_version: int | None = None
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key: Hashable, load: Callable[[], T]) -> T:
+        if self.max_entries <= 0 or database.in_transaction():
+            return load()
+
+        generation = self._sync()
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.copy(self._entries[key])
+            self.misses += 1
+
+        value = load()
+        if value is not None:
+            self._put(key, copy.copy(value), generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self.invalidations += 1
+
+    def close(self):
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+                self._data_version = None
+        self.clear()
+
+    def stats(self) -> Dict[str, int | float]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+    def _put(self, key: Hashable, value: Any, generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _sync(self) -> int:
+        """Drop the cache if the database changed since the last lookup. Returns the current generation."""
+        with self._watcher_lock:
+            try:
+                if self._watcher is None:
+                    self._watcher = sqlite3.connect(database.DB_PATH, check_same_thread=False, isolation_level=None)
+                version = self._watcher.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                # cannot tell what changed: start over with a fresh watcher
+                self._watcher = None
+                version = None
+
+            changed = version is None or version != self._data_version
+            self._data_version = version
+
+        if changed:
+            self.clear()
+        with self._lock:
+            return self._generation
+
+entity_cache = EntityCache()
+
+def cached_entity(table: str):
+    """Serve `get_<entity>_by_id(entity_id)` from the entity cache."""
+    def decorator(func: Callable[[int], T]) -> Callable[[int], T]:
+        @functools.wraps(func)
+        def wrapper(entity_id: int) -> T:
+            return entity_cache.get_or_load((table, entity_id), lambda: func(entity_id))
+        return wrapper
+    return decorator
@@ -1,5 +1,17 @@
+import logging
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
+from typing import Iterator
+from config import DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_HEALTH_CHECK_INTERVAL
+from app.instrumentation import InstrumentedConnection, record_acquire
+from app.migrations import run_migrations
+
+logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parents[1]  # backend/
 DATA_DIR = BASE_DIR / "data"
@@ -7,96 +19,218 @@ DB_PATH = DATA_DIR / "notareal.db"
 DB_PATH.parent.mkdir(exist_ok=True)
 
 def init_database():
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS clients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            nickname TEXT UNIQUE,
-            phone TEXT,
-            email TEXT,
-            is_active INTEGER DEFAULT 1,
-            created_at INTEGER,
-            updated_at INTEGER
-        );
-    """)
-
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS purchases (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER NOT NULL,
-            description TEXT,
-            total_value REAL NOT NULL,
-            total_paid_value REAL DEFAULT 0.0,
-            status TEXT DEFAULT 'pending',
-            note_number TEXT UNIQUE,
-            is_active INTEGER DEFAULT 1,
-            created_at INTEGER,
-            updated_at INTEGER,
-
-            FOREIGN KEY (client_id) REFERENCES clients (id)
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            purchase_id INTEGER NOT NULL,
-            amount REAL NOT NULL,
-            payment_date INTEGER, -- can be NULL
-            method TEXT,
-            description TEXT,
-            receipt_number TEXT UNIQUE,
-            is_active INTEGER DEFAULT 1,
-            created_at INTEGER NOT NULL,
-            updated_at INTEGER,
-
-            FOREIGN KEY (purchase_id) REFERENCES purchases (id)
-        );
-    """)
-
-    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name)""")
-    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_clients_nickname ON clients(nickname)""")
-    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_purchases_client ON purchases(client_id)""")
-    cursor.execute("""CREATE INDEX IF NOT EXISTS idx_payments_purchase ON payments(purchase_id)""")
-
-    conn.commit()
-    # cursor.close()
-    conn.close()
-
-def get_connection():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-
-    # PRAGMAs for otimization
+    """Create or upgrade the schema by applying the pending migrations."""
+    conn = create_connection()
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
+
+# PRAGMAs for otimization, applied once per pooled connection
+CONNECTION_PRAGMAS = (
     # 🔒 1. Reference integrity
-    conn.execute("PRAGMA foreign_keys = ON;")
-    print("Setting database PRAGMA foreign_keys = ON")
-
+    "PRAGMA foreign_keys = ON;",
     # ⚡ 2. Enable WAL mode (Write-Ahead Logging)
-    conn.execute("PRAGMA journal_mode = WAL;")
-    print("Setting database PRAGMA journal_mode = Write-Ahead Logging")
-
+    "PRAGMA journal_mode = WAL;",
     # 💾 3. Adjust disk synchronization (security x speed)
-    conn.execute("PRAGMA synchronous = NORMAL;")
-    print("Setting database PRAGMA synchronous = NORMAL")
-
+    "PRAGMA synchronous = NORMAL;",
     # 🚀 4. Optimize cache in memory
-    conn.execute("PRAGMA cache_size = -4000;")  # negative value = KB → 4 MB
-    print("Setting database PRAGMA cache_size = 4MB")
-
+    "PRAGMA cache_size = -4000;",  # negative value = KB → 4 MB
     # ⚙️ 5. Use temp_store in memory (reduce I/O)
-    conn.execute("PRAGMA temp_store = MEMORY;")
-    print("Setting database PRAGMA temp_store = MEMORY")
-
+    "PRAGMA temp_store = MEMORY;",
     # 🔁 6. Use memory mapping with LRU (read database from RAM)
-    conn.execute("PRAGMA mmap_size = 50000000;")  # up to ~50 MB of memory mapping
-    print("Setting database PRAGMA mmap_size = 50MB")
-
+    "PRAGMA mmap_size = 50000000;",  # up to ~50 MB of memory mapping
     # 🧮 7. Change wait timestamps if database is busy
-    conn.execute("PRAGMA busy_timeout = 5000;")  # wait until 5s if database is busy
-    print("Setting database PRAGMA busy_timeout = 5 seconds")
+    "PRAGMA busy_timeout = 5000;",  # wait until 5s if database is busy
+)
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time."""
+    pass
+
+def create_connection(path: Path | str | None = None) -> sqlite3.Connection:
+    """Open a new SQLite connection configured with the project PRAGMAs."""
+    # isolation_level=None: transactions are opened explicitly by `transaction()`
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False, isolation_level=None,
+                           factory=InstrumentedConnection)
+    conn.row_factory = sqlite3.Row
 
-    return conn
\ No newline at end of file
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+
+    logger.debug("Opened SQLite connection to %s", path or DB_PATH)
+    return conn
+
+class ConnectionPool:
+    """
+    Fixed-size pool of pre-configured SQLite connections.
+
+    Connections are created lazily (up to `size`) and handed out to one
+    thread at a time. Idle connections are pinged before reuse when they
+    have not been used for `health_check_interval` seconds.
+    """
+
+    def __init__(self, path: Path | str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT,
+                 health_check_interval: float = DB_POOL_HEALTH_CHECK_INTERVAL):
+        self.path = path
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        started = time.perf_counter()
+        try:
+            return self._acquire()
+        finally:
+            record_acquire(time.perf_counter() - started)
+
+    def _acquire(self) -> sqlite3.Connection:
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed.")
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolTimeoutError("Timed out waiting for a database connection.")
+
+        try:
+            while True:
+                try:
+                    conn, released_at = self._idle.get_nowait()
+                except queue.Empty:
+                    return create_connection(self.path)
+
+                idle_for = time.monotonic() - released_at
+                if idle_for < self.health_check_interval or self._is_healthy(conn):
+                    return conn
+
+                # stale or broken connection, drop it and try the next one
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn: sqlite3.Connection):
+        try:
+            if self._closed:
+                self._discard(conn)
+                return
+
+            # never hand out a connection with a dangling transaction
+            if conn.in_transaction:
+                conn.rollback()
+
+            self._idle.put((conn, time.monotonic()))
+        except sqlite3.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close every idle connection; busy ones are closed when released."""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    @staticmethod
+    def _is_healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    @staticmethod
+    def _discard(conn: sqlite3.Connection):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+# connection borrowed by the current context, reused by nested repository calls
+_current_connection: ContextVar[sqlite3.Connection | None] = ContextVar("current_connection", default=None)
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH)
+    return _pool
+
+def close_pool():
+    """Close the shared pool (called on application shutdown)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+@contextmanager
+def connection() -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a pooled connection for the duration of the `with` block.
+
+    Nested calls in the same context reuse the connection already borrowed,
+    so a repository calling another repository never waits on the pool twice.
+    """
+    conn = _current_connection.get()
+    if conn is not None:
+        yield conn
+        return
+
+    pool = get_pool()
+    conn = pool.acquire()
+    token = _current_connection.set(conn)
+    try:
+        yield conn
+    finally:
+        _current_connection.reset(token)
+        pool.release(conn)
+
+def in_transaction() -> bool:
+    """Whether the current context is inside a `transaction()` block."""
+    conn = _current_connection.get()
+    return conn is not None and conn.in_transaction
+
+@contextmanager
+def bind_connection(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """Make `conn` the connection used by `connection()`/`transaction()` in this context."""
+    token = _current_connection.set(conn)
+    try:
+        yield conn
+    finally:
+        _current_connection.reset(token)
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    Unit of work: run the `with` block inside one `BEGIN IMMEDIATE ... COMMIT`.
+
+    Repositories and services open their writes through this context. When a
+    transaction is already active in the current context the block joins it,
+    so a whole service operation commits (or rolls back) as a single unit on
+    a single connection.
+    """
+    conn = _current_connection.get()
+    if conn is not None and conn.in_transaction:
+        yield conn
+        return
+
+    with connection() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
@@ -0,0 +1,133 @@
+"""
+Bounded executor for the database work of the async routes.
+
+Reads run on a small pool of reader threads; writes go to the single
+group-commit writer (`app/writer.py`), so API writes are serialized in the
+process instead of contending for the SQLite write lock (and sleeping on
+`busy_timeout`). Each queue accepts a limited number of pending operations:
+past that, callers get a `ServiceUnavailableError` (HTTP 503) right away
+instead of piling up.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Iterator, TypeVar
+from config import DB_READER_THREADS, DB_MAX_PENDING_READS
+from app import metrics
+from app.utils.exceptions import ServiceUnavailableError, error_messages
+from app.writer import GroupCommitWriter
+
+T = TypeVar("T")
+
+class BoundedQueue:
+    """Thread pool that rejects work once `max_pending` operations are queued or running."""
+
+    def __init__(self, name: str, workers: int, max_pending: int):
+        self.name = name
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, func: Callable[..., T], *args, **kwargs) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.executor_rejected.inc(self.name)
+                raise ServiceUnavailableError(error_messages.SERVICE_BUSY)
+            self._pending += 1
+
+        # run in a copy of the caller's context, like asyncio.to_thread
+        ctx = contextvars.copy_context()
+        call = functools.partial(ctx.run, func, *args, **kwargs)
+        try:
+            future = self._pool.submit(call)
+        except BaseException:
+            self._done()
+            raise
+
+        # released when the work ends, even if the awaiting request was cancelled
+        future.add_done_callback(lambda _: self._done())
+        return await asyncio.wrap_future(future)
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+class DatabaseExecutor:
+    def __init__(self, readers: int = DB_READER_THREADS, max_pending_reads: int = DB_MAX_PENDING_READS,
+                 writer: GroupCommitWriter | None = None):
+        self.reads = BoundedQueue("db-reader", readers, max_pending_reads)
+        self.writes = writer or GroupCommitWriter()
+
+    def shutdown(self):
+        self.reads.shutdown()
+        self.writes.shutdown()
+
+_executor: DatabaseExecutor | None = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> DatabaseExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DatabaseExecutor()
+    return _executor
+
+def shutdown_executor():
+    """Wait for the running operations and stop the threads (application shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+async def run_read(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run read-only database work on a reader thread."""
+    return await get_executor().reads.run(func, *args, **kwargs)
+
+async def run_write(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run database work that writes on the writer thread, group committed with other writes."""
+    return await get_executor().writes.run(func, *args, **kwargs)
+
+async def run_exclusive_write(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run long write work (imports, restores) alone on the writer thread, with its own transactions."""
+    return await get_executor().writes.run_exclusive(func, *args, **kwargs)
+
+async def iterate_read(iterator: Iterator[T]) -> AsyncIterator[T]:
+    """
+    Consume a blocking iterator (e.g. a streamed export) item by item on the reader threads.
+
+    The response is already being sent, so a saturated queue means waiting for
+    a slot rather than failing with 503.
+    """
+    sentinel = object()
+    try:
+        while True:
+            try:
+                item = await run_read(next, iterator, sentinel)
+            except ServiceUnavailableError:
+                await asyncio.sleep(0.05)
+                continue
+
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        # client gone or export done: release the connection held by the generator
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # still running on a reader thread; it is closed when collected
+                pass
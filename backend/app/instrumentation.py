@@ -0,0 +1,300 @@
+"""
+Query-level instrumentation.
+
+Every SQLite connection is an `InstrumentedConnection`, whose cursors time
+each statement (execute plus fetches), count the rows it returned and retry
+it with a short backoff when it fails with SQLITE_BUSY outside of a
+transaction (inside one, the transaction has to be retried as a whole).
+
+The numbers are added to the `RequestStats` of the current request, a
+context variable that reaches the executor threads through the copied
+context. `ServerTimingMiddleware` reports them in the `Server-Timing`
+header, splitting database time from the time spent serializing the
+response. Statements slower than `SLOW_QUERY_MS` are written to the
+slow-query log as one JSON object per line, with their EXPLAIN QUERY PLAN.
+"""
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from starlette.datastructures import MutableHeaders
+from config import SLOW_QUERY_MS, SLOW_QUERY_LOG, DB_BUSY_RETRIES, DB_BUSY_RETRY_DELAY
+from app import metrics
+
+slow_query_logger = logging.getLogger("app.slow_queries")
+if SLOW_QUERY_LOG:
+    _handler = logging.FileHandler(SLOW_QUERY_LOG, encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+# statements whose plan is worth capturing (not BEGIN, COMMIT, PRAGMA...)
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+# statements that take the write lock (and wait on busy_timeout while another connection holds it)
+WRITE_LOCK = ("BEGIN IMMEDIATE", "BEGIN EXCLUSIVE")
+
+@dataclass
+class RequestStats:
+    started: float
+    db_time: float = 0.0
+    queries: int = 0
+    rows: int = 0
+    acquire_wait: float = 0.0
+    busy_retries: int = 0
+    # when the route returned; the rest until the response starts is serialization
+    endpoint_done: float | None = None
+
+    def server_timing(self, now: float) -> str:
+        total = now - self.started
+        serialize = now - self.endpoint_done if self.endpoint_done else 0.0
+        parts = [
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} queries, {self.rows} rows"',
+            f"db-wait;dur={self.acquire_wait * 1000:.2f}",
+            f"serialize;dur={serialize * 1000:.2f}",
+            f"app;dur={max(total - self.db_time - serialize, 0) * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        ]
+        if self.busy_retries:
+            parts.append(f'db-busy;desc="{self.busy_retries} retries"')
+        return ", ".join(parts)
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+def current_stats() -> RequestStats | None:
+    return _request_stats.get()
+
+def record_acquire(wait: float):
+    """Time spent waiting for a pooled connection."""
+    metrics.db_pool_wait_seconds.inc(amount=wait)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.acquire_wait += wait
+
+def endpoint_finished():
+    """Mark the end of the route function: what follows is response serialization."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.endpoint_done = time.perf_counter()
+
+def _record_query(elapsed: float, rows: int):
+    metrics.db_queries.inc()
+    metrics.db_query_seconds.inc(amount=elapsed)
+    if rows:
+        metrics.db_rows.inc(amount=rows)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.db_time += elapsed
+        stats.queries += 1
+        stats.rows += rows
+
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    # extended codes (e.g. SQLITE_BUSY_SNAPSHOT) keep the primary code in the low byte
+    return (getattr(error, "sqlite_errorcode", 0) & 0xFF) == sqlite3.SQLITE_BUSY
+
+# ===== Slow-query log =====
+# plans already logged, so a recurring slow statement is explained once
+_explained: dict[str, list[str]] = {}
+_explained_lock = threading.Lock()
+_MAX_EXPLAINED = 256
+
+def _query_plan(conn: sqlite3.Connection, sql: str, parameters) -> list[str] | None:
+    with _explained_lock:
+        if sql in _explained:
+            return _explained[sql]
+
+    if not sql.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    try:
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", parameters).fetchall()
+    except sqlite3.Error:
+        return None
+
+    plan = [row[3] for row in rows]
+    with _explained_lock:
+        if len(_explained) >= _MAX_EXPLAINED:
+            _explained.clear()
+        _explained[sql] = plan
+    return plan
+
+def _log_slow_query(conn: sqlite3.Connection, sql: str, parameters, elapsed: float, rows: int):
+    metrics.db_slow_queries.inc()
+    # parameters are not logged: they hold client data
+    entry = {
+        "duration_ms": round(elapsed * 1000, 2),
+        "rows": rows,
+        "sql": " ".join(sql.split()),
+        "plan": _query_plan(conn, sql, parameters),
+    }
+    slow_query_logger.warning(json.dumps(entry, ensure_ascii=False))
+
+# ===== Connection and cursor =====
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times its statements and retries them on SQLITE_BUSY."""
+    _sql: str | None = None
+
+    def execute(self, sql: str, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+
+        attempt = 0
+        while True:
+            try:
+                super().execute(sql, parameters)
+                break
+            except sqlite3.OperationalError as e:
+                busy = _is_busy(e)
+                retryable = busy and not self.connection.in_transaction
+                if not retryable or attempt >= DB_BUSY_RETRIES:
+                    if busy:
+                        metrics.db_busy_errors.inc()
+                    _record_query(time.perf_counter() - started, 0)
+                    raise
+                attempt += 1
+                metrics.db_busy_retries.inc()
+                stats = _request_stats.get()
+                if stats is not None:
+                    stats.busy_retries += 1
+                time.sleep(DB_BUSY_RETRY_DELAY * attempt)
+
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = time.perf_counter() - started
+        if sql.startswith(WRITE_LOCK):
+            metrics.db_write_lock_wait.observe(self._elapsed)
+        self._rows = 0
+        # statements without a result set are done
+        if self.description is None:
+            self._finish()
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record_query(time.perf_counter() - started, 0)
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            if row is None:
+                self._finish()
+            else:
+                self._rows += 1
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            self._rows += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        if self._sql is not None:
+            self._elapsed += time.perf_counter() - started
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # a statement that was not read to the end (e.g. a single fetchone)
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _finish(self):
+        sql = self._sql
+        if sql is None:
+            return
+        self._sql = None
+
+        _record_query(self._elapsed, self._rows)
+        if SLOW_QUERY_MS > 0 and self._elapsed * 1000 >= SLOW_QUERY_MS:
+            _log_slow_query(self.connection, sql, self._parameters, self._elapsed, self._rows)
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors are instrumented; commits and rollbacks count as database time."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        if self.in_transaction:
+            metrics.db_commits.inc()
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self._add_time(time.perf_counter() - started)
+
+    def rollback(self):
+        if self.in_transaction:
+            metrics.db_rollbacks.inc()
+        started = time.perf_counter()
+        try:
+            super().rollback()
+        finally:
+            self._add_time(time.perf_counter() - started)
+
+    @staticmethod
+    def _add_time(elapsed: float):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.db_time += elapsed
+
+# ===== Server-Timing =====
+class ServerTimingMiddleware:
+    """ASGI middleware: collect the request's database stats and send them as `Server-Timing`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(started=time.perf_counter())
+        token = _request_stats.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", stats.server_timing(time.perf_counter()))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
@@ -1,16 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
-from app.routes import clients, purchases
-from app.database import init_database
+from app.routes import clients, purchases, search, lookup, bulk, export, reports, backups, system, metrics
+from app.cache import entity_cache
+from app.database import init_database, close_pool
+from app.executor import shutdown_executor
+from app.instrumentation import ServerTimingMiddleware
+from app.metrics import MetricsMiddleware
+from app.utils.backup import start_backup_scheduler, stop_backup_scheduler
+from app.utils.printer import shutdown_print_pool
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_database()
+    start_backup_scheduler()
+    yield
+    stop_backup_scheduler()
+    # let queued database work finish before closing the connections
+    shutdown_executor()
+    shutdown_print_pool()
+    # release every pooled SQLite connection on shutdown
+    close_pool()
+    entity_cache.close()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(clients.router)
 app.include_router(purchases.router)
-
-@app.on_event("startup")
-def startup_event():
-    init_database()
+app.include_router(search.router)
+app.include_router(lookup.router)
+app.include_router(bulk.router)
+app.include_router(export.router)
+app.include_router(reports.router)
+app.include_router(backups.router)
+app.include_router(system.router)
+app.include_router(metrics.router)
 
 @app.get("/")
 def get_home():
-    return {"message": "Hello World"}
\ No newline at end of file
+    return {"message": "Hello World"}
@@ -0,0 +1,214 @@
+"""
+In-process metrics registry, exposed in the Prometheus text format at `/metrics`.
+
+Metrics are plain counters, gauges and fixed-bucket histograms updated in
+place under a lock (no allocation or I/O on the request path). Values that
+only matter when scraped (file sizes, queue depths, cache ratio) are read by
+collectors registered with `on_collect`, which run right before rendering.
+"""
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+PREFIX = "notareal_"
+
+# request latency buckets (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = PREFIX + name
+        self.description = description
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _label_text(self, values: LabelValues, extra: str = "") -> str:
+        pairs = [f'{label}="{_escape(value)}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[LabelValues, float] = {}
+        if not self.labels:
+            # rendered as 0 before the first update
+            self._values[()] = 0
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, *labels: str, value: float):
+        """Set the value: for a gauge, or a counter mirroring a total kept elsewhere (by a collector)."""
+        with self._lock:
+            self._values[labels] = value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{self._label_text(labels)} {_format_value(value)}" for labels, value in values]
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (+Inf last), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(counts), total[0]) for labels, (counts, total) in self._values.items()]
+
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{self._label_text(labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def on_collect(self, collector: Callable[[], None]) -> Callable[[], None]:
+        """Run `collector` before every scrape (to refresh gauges). Usable as a decorator."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+def counter(name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+    return registry.register(Counter(name, description, labels))
+
+def gauge(name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+    return registry.register(Gauge(name, description, labels))
+
+def histogram(name: str, description: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+    return registry.register(Histogram(name, description, labels, buckets))
+
+# ===== HTTP =====
+http_requests = counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+http_latency = histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+http_in_flight = gauge("http_requests_in_flight", "HTTP requests being handled.")
+
+# ===== Database =====
+db_queries = counter("db_queries_total", "SQL statements executed.")
+db_query_seconds = counter("db_query_seconds_total", "Time spent executing SQL statements and reading their rows.")
+db_rows = counter("db_rows_total", "Rows returned by SQL statements.")
+db_slow_queries = counter("db_slow_queries_total", "Statements slower than NOTAREAL_SLOW_QUERY_MS.")
+db_busy_retries = counter("db_busy_retries_total", "Statements retried after SQLITE_BUSY.")
+db_busy_errors = counter("db_busy_errors_total", "Statements that failed with SQLITE_BUSY after every retry.")
+db_write_lock_wait = histogram(
+    "db_write_lock_wait_seconds", "Time to acquire the write lock (BEGIN IMMEDIATE), including busy_timeout waits."
+)
+db_commits = counter("db_commits_total", "Committed transactions.")
+db_rollbacks = counter("db_rollbacks_total", "Rolled back transactions.")
+db_pool_wait_seconds = counter("db_pool_wait_seconds_total", "Time spent waiting for a pooled connection.")
+db_file_bytes = gauge("db_file_bytes", "Size of the database files.", ("file",))
+
+# ===== Executor =====
+executor_pending = gauge("executor_pending", "Database operations queued or running.", ("queue",))
+executor_capacity = gauge("executor_capacity", "Pending operations accepted before answering 503.", ("queue",))
+executor_rejected = counter("executor_rejected_total", "Operations rejected with 503 (queue full).", ("queue",))
+write_batch_size = histogram(
+    "write_batch_size", "Write operations per group commit.", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+
+# ===== Entity cache =====
+cache_lookups = counter("entity_cache_lookups_total", "Entity cache lookups since startup.", ("result",))
+cache_hit_ratio = gauge("entity_cache_hit_ratio", "Entity cache hits / lookups.")
+cache_entries = gauge("entity_cache_entries", "Entities currently cached.")
+
+# ===== Middleware =====
+class MetricsMiddleware:
+    """ASGI middleware: count requests and record their latency by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # the route template, not the raw path, keeps the label set small
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            http_latency.observe(time.perf_counter() - started, method, route)
+            http_requests.inc(method, route, status)
@@ -0,0 +1,393 @@
+"""
+Versioned schema migrations based on `PRAGMA user_version`.
+
+Each migration runs in its own transaction together with the bump of
+`user_version`, so a database is always at a well defined version and can be
+upgraded in place (no rebuild) by running the pending migrations.
+
+Usage (from backend/):
+    python -m app.migrations           # apply pending migrations
+    python -m app.migrations --status  # show current and latest version
+"""
+import logging
+import sqlite3
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    statements: tuple[str, ...]
+
+# ----- client_balances trigger bodies (a purchase row is referenced as `new` or `old`) -----
+def _is_open(row: str) -> str:
+    return f"({row}.is_active = 1 AND {row}.status IN ('pending', 'partial'))"
+
+def _open_amount(row: str) -> str:
+    return f"(CASE WHEN {_is_open(row)} THEN MAX({row}.total_value - COALESCE({row}.total_paid_value, 0), 0) ELSE 0 END)"
+
+def _upsert_balance(row: str) -> str:
+    return f"""
+            INSERT INTO client_balances (client_id, open_amount, open_purchases, last_activity)
+            VALUES ({row}.client_id, {_open_amount(row)}, {_is_open(row)}, COALESCE({row}.updated_at, {row}.created_at, 0))
+            ON CONFLICT (client_id) DO UPDATE SET
+                open_amount = ROUND(open_amount + excluded.open_amount, 2),
+                open_purchases = open_purchases + excluded.open_purchases,
+                last_activity = MAX(last_activity, excluded.last_activity);"""
+
+def _subtract_balance(row: str) -> str:
+    return f"""
+            UPDATE client_balances SET
+                open_amount = ROUND(open_amount - {_open_amount(row)}, 2),
+                open_purchases = open_purchases - {_is_open(row)}
+            WHERE client_id = {row}.client_id;"""
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "initial schema", (
+        """
+        CREATE TABLE IF NOT EXISTS clients (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            nickname TEXT UNIQUE,
+            phone TEXT,
+            email TEXT,
+            is_active INTEGER DEFAULT 1,
+            created_at INTEGER,
+            updated_at INTEGER
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS purchases (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_id INTEGER NOT NULL,
+            description TEXT,
+            total_value REAL NOT NULL,
+            total_paid_value REAL DEFAULT 0.0,
+            status TEXT DEFAULT 'pending',
+            note_number TEXT UNIQUE,
+            is_active INTEGER DEFAULT 1,
+            created_at INTEGER,
+            updated_at INTEGER,
+
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            purchase_id INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            payment_date INTEGER, -- can be NULL
+            method TEXT,
+            description TEXT,
+            receipt_number TEXT UNIQUE,
+            is_active INTEGER DEFAULT 1,
+            created_at INTEGER NOT NULL,
+            updated_at INTEGER,
+
+            FOREIGN KEY (purchase_id) REFERENCES purchases (id)
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_clients_name ON clients(name)",
+        "CREATE INDEX IF NOT EXISTS idx_clients_nickname ON clients(nickname)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_client ON purchases(client_id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_purchase ON payments(purchase_id)",
+    )),
+    Migration(2, "keyset pagination indexes", (
+        # (created_at, id) ranges for the list routes
+        "CREATE INDEX IF NOT EXISTS idx_clients_active_created ON clients(is_active, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_active_created ON purchases(is_active, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_purchases_created ON purchases(created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_active_created ON payments(is_active, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS idx_payments_purchase_created ON payments(purchase_id, created_at, id)",
+    )),
+    Migration(3, "composite and partial indexes for the hot list queries", (
+        # open (pending/partial) purchases, newest first: GET /purchases/?only_pending=true
+        # (leading is_active lets the planner SEARCH it instead of the full active index)
+        """
+        CREATE INDEX IF NOT EXISTS idx_purchases_open ON purchases(is_active, created_at, id)
+        WHERE status IN ('pending', 'partial') AND is_active = 1
+        """,
+        # purchases of a client, newest first; also covers the purchase id lookups by client
+        "CREATE INDEX IF NOT EXISTS idx_purchases_client_active ON purchases(client_id, is_active, created_at)",
+        # superseded by the composite indexes above/below (same leading column)
+        "DROP INDEX IF EXISTS idx_purchases_client",
+        "DROP INDEX IF EXISTS idx_payments_purchase",
+        # nickname is UNIQUE, so its automatic index already serves lookups
+        "DROP INDEX IF EXISTS idx_clients_nickname",
+        "ANALYZE",
+    )),
+    Migration(4, "full-text search (FTS5) over clients, purchases and payments", (
+        # external content tables: the text lives in the base tables, FTS keeps only the index.
+        # remove_diacritics makes "joao" match "João"; prefix indexes speed up "jo*" queries
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5(
+            name, nickname,
+            content='clients', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS purchases_fts USING fts5(
+            description, note_number,
+            content='purchases', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS payments_fts USING fts5(
+            receipt_number,
+            content='payments', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        # keep the indexes in sync; UPDATE triggers only fire when indexed columns change
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_insert AFTER INSERT ON clients BEGIN
+            INSERT INTO clients_fts(rowid, name, nickname) VALUES (new.id, new.name, new.nickname);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_delete AFTER DELETE ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, name, nickname) VALUES ('delete', old.id, old.name, old.nickname);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_fts_update AFTER UPDATE OF name, nickname ON clients BEGIN
+            INSERT INTO clients_fts(clients_fts, rowid, name, nickname) VALUES ('delete', old.id, old.name, old.nickname);
+            INSERT INTO clients_fts(rowid, name, nickname) VALUES (new.id, new.name, new.nickname);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_fts_insert AFTER INSERT ON purchases BEGIN
+            INSERT INTO purchases_fts(rowid, description, note_number) VALUES (new.id, new.description, new.note_number);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_fts_delete AFTER DELETE ON purchases BEGIN
+            INSERT INTO purchases_fts(purchases_fts, rowid, description, note_number)
+            VALUES ('delete', old.id, old.description, old.note_number);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_fts_update AFTER UPDATE OF description, note_number ON purchases BEGIN
+            INSERT INTO purchases_fts(purchases_fts, rowid, description, note_number)
+            VALUES ('delete', old.id, old.description, old.note_number);
+            INSERT INTO purchases_fts(rowid, description, note_number) VALUES (new.id, new.description, new.note_number);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_fts_insert AFTER INSERT ON payments BEGIN
+            INSERT INTO payments_fts(rowid, receipt_number) VALUES (new.id, new.receipt_number);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_fts_delete AFTER DELETE ON payments BEGIN
+            INSERT INTO payments_fts(payments_fts, rowid, receipt_number) VALUES ('delete', old.id, old.receipt_number);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_fts_update AFTER UPDATE OF receipt_number ON payments BEGIN
+            INSERT INTO payments_fts(payments_fts, rowid, receipt_number) VALUES ('delete', old.id, old.receipt_number);
+            INSERT INTO payments_fts(rowid, receipt_number) VALUES (new.id, new.receipt_number);
+        END
+        """,
+        # index the rows that already exist
+        "INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')",
+        "INSERT INTO purchases_fts(purchases_fts) VALUES ('rebuild')",
+        "INSERT INTO payments_fts(payments_fts) VALUES ('rebuild')",
+    )),
+    Migration(5, "table change counters for ETags", (
+        # one row per table, bumped by triggers on every change (read by the conditional GETs)
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """,
+        "INSERT OR IGNORE INTO table_versions (name) VALUES ('clients'), ('purchases'), ('payments')",
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_version_insert AFTER INSERT ON clients BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_version_update AFTER UPDATE ON clients BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS clients_version_delete AFTER DELETE ON clients BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'clients';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_version_insert AFTER INSERT ON purchases BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'purchases';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_version_update AFTER UPDATE ON purchases BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'purchases';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS purchases_version_delete AFTER DELETE ON purchases BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'purchases';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_version_insert AFTER INSERT ON payments BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'payments';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_version_update AFTER UPDATE ON payments BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'payments';
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS payments_version_delete AFTER DELETE ON payments BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE name = 'payments';
+        END
+        """,
+    )),
+    Migration(6, "client_balances: open amount per client kept by triggers", (
+        """
+        CREATE TABLE IF NOT EXISTS client_balances (
+            client_id INTEGER PRIMARY KEY,
+            open_amount REAL NOT NULL DEFAULT 0.0,
+            open_purchases INTEGER NOT NULL DEFAULT 0,
+            last_activity INTEGER NOT NULL DEFAULT 0,
+
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        )
+        """,
+        # GET /clients/balances sorts by debt or by last activity
+        "CREATE INDEX IF NOT EXISTS idx_client_balances_open ON client_balances(open_amount, client_id)",
+        "CREATE INDEX IF NOT EXISTS idx_client_balances_activity ON client_balances(last_activity, client_id)",
+        """
+        CREATE TRIGGER IF NOT EXISTS client_balances_client_insert AFTER INSERT ON clients BEGIN
+            INSERT OR IGNORE INTO client_balances (client_id, last_activity) VALUES (new.id, COALESCE(new.created_at, 0));
+        END
+        """,
+        # a purchase is open while active and not fully paid; payments reach here through
+        # the total_paid_value/status updates of their purchase
+        f"""
+        CREATE TRIGGER IF NOT EXISTS client_balances_purchase_insert AFTER INSERT ON purchases BEGIN
+            {_upsert_balance("new")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS client_balances_purchase_update AFTER UPDATE ON purchases BEGIN
+            {_subtract_balance("old")}
+            {_upsert_balance("new")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS client_balances_purchase_delete AFTER DELETE ON purchases BEGIN
+            {_subtract_balance("old")}
+        END
+        """,
+        # balances of the existing data
+        f"""
+        INSERT OR REPLACE INTO client_balances (client_id, open_amount, open_purchases, last_activity)
+        SELECT
+            c.id,
+            ROUND(COALESCE(SUM({_open_amount("p")}), 0), 2),
+            COALESCE(SUM({_is_open("p")}), 0),
+            MAX(COALESCE(c.created_at, 0), COALESCE(MAX(p.updated_at), 0))
+        FROM clients c
+        LEFT JOIN purchases p ON p.client_id = c.id
+        GROUP BY c.id
+        """,
+        "ANALYZE client_balances",
+    )),
+    Migration(7, "covering index for the receivables aging report", (
+        # open purchases in client order, with every column the aging query reads: a covering
+        # scan with no GROUP BY sort (leading is_active makes the planner prefer it to idx_purchases_open)
+        """
+        CREATE INDEX IF NOT EXISTS idx_purchases_open_aging
+        ON purchases(is_active, client_id, created_at, total_value, total_paid_value, status)
+        WHERE is_active = 1 AND status IN ('pending', 'partial')
+        """,
+    )),
+    Migration(8, "client_deactivations: purchases and payments disabled with their client", (
+        # what the client cascade disabled, so restoring the client brings back exactly
+        # that and not the purchases/payments deleted on their own
+        """
+        CREATE TABLE IF NOT EXISTS client_deactivations (
+            client_id INTEGER NOT NULL,
+            entity TEXT NOT NULL CHECK (entity IN ('purchase', 'payment')),
+            entity_id INTEGER NOT NULL,
+
+            PRIMARY KEY (client_id, entity, entity_id),
+            FOREIGN KEY (client_id) REFERENCES clients (id)
+        ) WITHOUT ROWID
+        """,
+    )),
+    Migration(9, "overpaid purchases store the full sum of their payments", (
+        # purchases created with a payment above total_value had the paid value capped at
+        # total_value, which the incremental payment deltas then carried into wrong totals
+        """
+        UPDATE purchases SET total_paid_value = totals.paid
+        FROM (
+            SELECT pay.purchase_id, ROUND(SUM(pay.amount), 2) AS paid
+            FROM payments pay
+            WHERE pay.is_active = 1
+            GROUP BY pay.purchase_id
+        ) AS totals
+        WHERE purchases.id = totals.purchase_id AND purchases.is_active = 1
+            AND purchases.status = 'paid' AND purchases.total_paid_value < totals.paid
+        """,
+    )),
+)
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+def get_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """Apply every pending migration on `conn`. Returns the resulting schema version."""
+    current = get_version(conn)
+
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+
+        logger.info("Applying migration %s: %s", migration.version, migration.description)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for statement in migration.statements:
+                conn.execute(statement)
+            # PRAGMA does not accept bound parameters; version is a trusted int
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        current = migration.version
+
+    return current
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import create_connection
+
+    parser = argparse.ArgumentParser(description="Apply database schema migrations.")
+    parser.add_argument("--status", action="store_true", help="only show the schema version")
+    args = parser.parse_args()
+
+    conn = create_connection()
+    try:
+        version = get_version(conn)
+        if args.status:
+            print(f"Schema version: {version} (latest: {LATEST_VERSION})")
+        else:
+            version = run_migrations(conn)
+            print(f"✅ Database at schema version {version}.")
+    finally:
+        conn.close()
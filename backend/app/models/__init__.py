@@ -1,3 +1,6 @@
 from app.models.client import Client
 from app.models.purchase import Purchase
-from app.models.payment import Payment
\ No newline at end of file
+from app.models.payment import Payment
+from app.models.search_result import SearchResult
+from app.models.client_balance import ClientBalance
+from app.models.aging import AgingReport, AgingTotals, ClientAging
\ No newline at end of file
@@ -0,0 +1,74 @@
+from dataclasses import dataclass, field
+from datetime import date
+
+# Open amount of a client split by the age of the purchases (receivables aging)
+@dataclass(slots=True)
+class ClientAging:
+    client_id: int
+    name: str
+    nickname: str | None
+    open_purchases: int
+    days_0_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total: float
+
+    @staticmethod
+    def from_row(row):
+        return ClientAging(
+            client_id = row[0],
+            name = row[1],
+            nickname = row[2],
+            open_purchases = row[3],
+            days_0_30 = row[4],
+            days_31_60 = row[5],
+            days_61_90 = row[6],
+            days_over_90 = row[7],
+            total = row[8]
+        )
+
+    def to_tuple(self):
+        return (
+            self.client_id,
+            self.name,
+            self.nickname,
+            self.open_purchases,
+            self.days_0_30,
+            self.days_31_60,
+            self.days_61_90,
+            self.days_over_90,
+            self.total
+        )
+
+# Aging of all clients together
+@dataclass(slots=True)
+class AgingTotals:
+    clients: int = 0
+    open_purchases: int = 0
+    days_0_30: float = 0.0
+    days_31_60: float = 0.0
+    days_61_90: float = 0.0
+    days_over_90: float = 0.0
+    total: float = 0.0
+
+    @staticmethod
+    def from_clients(clients: list[ClientAging]):
+        totals = AgingTotals(clients = len(clients))
+        for client in clients:
+            totals.open_purchases += client.open_purchases
+            totals.days_0_30 += client.days_0_30
+            totals.days_31_60 += client.days_31_60
+            totals.days_61_90 += client.days_61_90
+            totals.days_over_90 += client.days_over_90
+            totals.total += client.total
+
+        for bucket in ("days_0_30", "days_31_60", "days_61_90", "days_over_90", "total"):
+            setattr(totals, bucket, round(getattr(totals, bucket), 2))
+        return totals
+
+@dataclass(slots=True)
+class AgingReport:
+    as_of: date
+    totals: AgingTotals
+    clients: list[ClientAging] = field(default_factory=list)
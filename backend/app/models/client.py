@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from datetime import datetime
+from app.models.timestamps import timestamp_property
 
 # Store basic information about the client
-@dataclass
+@dataclass(slots=True)
 class Client:
     id: int
     name: str
@@ -10,21 +10,16 @@ class Client:
     phone: str | None
     email: str | None
     is_active: int
-    created_at: datetime
-    updated_at: datetime
+    created_ts: int # unix timestamps, as stored
+    updated_ts: int
+
+    created_at = timestamp_property("created_ts")
+    updated_at = timestamp_property("updated_ts")
 
     @staticmethod
     def from_row(row):
-        return Client(
-            id = row[0],
-            name = row[1],
-            nickname = row[2],
-            phone = row[3],
-            email = row[4],
-            is_active = row[5],
-            created_at = datetime.fromtimestamp(row[6]),
-            updated_at = datetime.fromtimestamp(row[7]),
-        )
+        # positional, in table column order (cheaper than keywords for every listed row)
+        return Client(row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7])
 
     def to_tuple(self):
         return (
@@ -33,6 +28,6 @@ class Client:
             self.phone,
             self.email,
             self.is_active,
-            int(self.created_at.timestamp()),
-            int(self.updated_at.timestamp())
-        )
\ No newline at end of file
+            self.created_ts,
+            self.updated_ts
+        )
@@ -0,0 +1,19 @@
+from dataclasses import dataclass
+from app.models.timestamps import timestamp_property
+
+# Store what a client owes, maintained by triggers in the client_balances table
+@dataclass(slots=True)
+class ClientBalance:
+    client_id: int
+    name: str
+    nickname: str | None
+    is_active: int
+    open_amount: float # sum of total_value - total_paid_value of the open purchases
+    open_purchases: int # active purchases not fully paid
+    last_activity_ts: int # unix timestamp, as stored
+
+    last_activity = timestamp_property("last_activity_ts")
+
+    @staticmethod
+    def from_row(row):
+        return ClientBalance(row[0], row[1], row[2], row[3], row[4], row[5], row[6])
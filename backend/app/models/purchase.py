@@ -1,8 +1,8 @@
 from dataclasses import dataclass
-from datetime import datetime
+from app.models.timestamps import timestamp_property
 
 # Store basic information about the client
-@dataclass
+@dataclass(slots=True)
 class Purchase:
     id: int
     client_id: int
@@ -12,23 +12,16 @@ class Purchase:
     status: str # 'pending' (default), 'partial', 'paid'
     note_number: str # NF-0001
     is_active: int
-    created_at: datetime
-    updated_at: datetime
+    created_ts: int # unix timestamps, as stored
+    updated_ts: int
+
+    created_at = timestamp_property("created_ts")
+    updated_at = timestamp_property("updated_ts")
 
     @staticmethod
     def from_row(row):
-        return Purchase(
-            id = row[0],
-            client_id = row[1],
-            description = row[2],
-            total_value = row[3],
-            total_paid_value = row[4],
-            status = row[5],
-            note_number = row[6],
-            is_active = row[7],
-            created_at = datetime.fromtimestamp(row[8]),
-            updated_at = datetime.fromtimestamp(row[9])
-        )
+        # positional, in table column order (cheaper than keywords for every listed row)
+        return Purchase(row[0], row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8], row[9])
 
     def to_tuple(self):
         return (
@@ -39,6 +32,6 @@ class Purchase:
             self.status,
             self.note_number,
             self.is_active,    
-            int(self.created_at.timestamp()),
-            int(self.updated_at.timestamp())
-        )
\ No newline at end of file
+            self.created_ts,
+            self.updated_ts
+        )
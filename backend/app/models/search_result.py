@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+# Store one ranked hit of the full-text search (client, purchase or payment)
+@dataclass(slots=True)
+class SearchResult:
+    type: str # 'client', 'purchase', 'payment'
+    id: int
+    title: str | None # client name, note_number or receipt_number
+    subtitle: str | None # client nickname, purchase or payment description
+    parent_id: int | None # client_id of a purchase, purchase_id of a payment
+    is_active: int
+    rank: float
+
+    @staticmethod
+    def from_row(row):
+        return SearchResult(
+            type = row[0],
+            id = row[1],
+            title = row[2],
+            subtitle = row[3],
+            parent_id = row[4],
+            is_active = row[5],
+            rank = row[6]
+        )
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+def timestamp_property(attribute: str) -> property:
+    """
+    Read-only datetime view of a unix timestamp attribute.
+
+    Models keep the timestamps as stored and convert them only when read, so
+    rows that are listed and serialized never build datetime objects they
+    don't need. A missing (NULL or 0) timestamp reads as None.
+    """
+    def get(self) -> datetime | None:
+        value = getattr(self, attribute)
+        return datetime.fromtimestamp(value) if value else None
+
+    return property(get)
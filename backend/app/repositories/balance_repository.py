@@ -0,0 +1,61 @@
+from typing import List
+from app.database import connection, sqlite3
+from app.models import ClientBalance
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+# sortable columns of GET /clients/balances (each one has a (column, client_id) index)
+BALANCE_SORT_COLUMNS = {"open_amount", "last_activity"}
+
+def get_client_balances(limit: int = None, offset: int = 0, only_open: bool = True, only_active: bool = True,
+                        sort_by: str = "open_amount", descending: bool = True,
+                        after: tuple[float, int] | None = None) -> List[ClientBalance]:
+    """
+    List client balances ordered by `sort_by`. `after` is the (sort value, client_id)
+    keyset of the previous page.
+    """
+    rows = get_client_balance_rows(limit, offset, only_open, only_active, sort_by, descending, after)
+    return [ClientBalance.from_row(row) for row in rows]
+
+def get_client_balance_rows(limit: int = None, offset: int = 0, only_open: bool = True, only_active: bool = True,
+                            sort_by: str = "open_amount", descending: bool = True,
+                            after: tuple[float, int] | None = None) -> List[tuple]:
+    """Same as `get_client_balances`, as plain row tuples (for the JSON fast path)."""
+    if sort_by not in BALANCE_SORT_COLUMNS:
+        raise ValueError(sort_by)
+
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            # Default limit if not provided (-1 means "no limit" in SQLite)
+            search_limit = -1 if limit is None else limit
+            direction = "DESC" if descending else "ASC"
+            conditions = []
+            values = []
+            if only_open:
+                conditions.append("b.open_purchases > 0")
+            if only_active:
+                conditions.append("c.is_active = 1")
+            if after:
+                conditions.append(f"(b.{sort_by}, b.client_id) {'<' if descending else '>'} (?, ?)")
+                values.extend(after)
+
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            values.extend((search_limit, offset))
+
+            cursor.execute(f"""
+                SELECT b.client_id, c.name, c.nickname, c.is_active, b.open_amount, b.open_purchases, b.last_activity
+                FROM client_balances b
+                JOIN clients c ON c.id = b.client_id
+                {where_clause}
+                ORDER BY b.{sort_by} {direction}, b.client_id {direction}
+                LIMIT ? OFFSET ?
+            """, tuple(values))
+
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
@@ -0,0 +1,136 @@
+from typing import Dict, List, Sequence
+from app.database import transaction, sqlite3
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+# Result of a bulk insert: one entry per input row, the new id or an error message
+InsertResults = List[int | str]
+
+CLIENT_INSERT = """
+    INSERT INTO clients (name, nickname, phone, email, is_active, created_at, updated_at)
+    VALUES (?, ?, ?, ?, 1, ?, ?)
+"""
+
+PURCHASE_INSERT = """
+    INSERT INTO purchases (
+        client_id, description, total_value, total_paid_value, status, note_number,
+        is_active, created_at, updated_at
+    ) VALUES (?, ?, ?, 0.0, 'pending', ?, 1, ?, ?)
+"""
+
+PAYMENT_INSERT = """
+    INSERT INTO payments (
+        purchase_id, amount, payment_date, method, description, receipt_number,
+        is_active, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)
+"""
+
+def _integrity_message(e: sqlite3.IntegrityError, table: str) -> str:
+    if "UNIQUE constraint failed" in str(e):
+        return {
+            "clients": error_messages.CLIENT_ALREADY_EXISTS,
+            "purchases": error_messages.PURCHASE_ALREADY_EXISTS,
+            "payments": error_messages.PAYMENT_ALREADY_EXISTS,
+        }[table]
+    if "FOREIGN KEY constraint failed" in str(e):
+        return error_messages.FOREIGN_KEY_ERROR
+    return error_messages.RESOURCE_CREATION_VALUE_ERROR
+
+def _insert_many(table: str, sql: str, rows: Sequence[tuple]) -> InsertResults:
+    """
+    Insert `rows` with a single executemany inside the active transaction.
+
+    If any row violates a constraint the batch is rolled back to a savepoint and
+    retried row by row, so valid rows are kept and each failure gets its message.
+    """
+    if not rows:
+        return []
+
+    try:
+        with transaction() as conn:
+            last_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table}").fetchone()[0]
+
+            conn.execute("SAVEPOINT bulk_batch")
+            try:
+                conn.executemany(sql, rows)
+            except sqlite3.IntegrityError:
+                conn.execute("ROLLBACK TO bulk_batch")
+                conn.execute("RELEASE bulk_batch")
+                return _insert_one_by_one(conn, table, sql, rows)
+
+            conn.execute("RELEASE bulk_batch")
+
+            # ids are AUTOINCREMENT and we hold the write lock: the new rows are the ids after last_id
+            cursor = conn.execute(f"SELECT id FROM {table} WHERE id > ? ORDER BY id", (last_id,))
+            return [row[0] for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def _insert_one_by_one(conn: sqlite3.Connection, table: str, sql: str, rows: Sequence[tuple]) -> InsertResults:
+    results: InsertResults = []
+    for row in rows:
+        conn.execute("SAVEPOINT bulk_row")
+        try:
+            cursor = conn.execute(sql, row)
+            results.append(cursor.lastrowid)
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK TO bulk_row")
+            results.append(_integrity_message(e, table))
+        conn.execute("RELEASE bulk_row")
+
+    return results
+
+def insert_clients(rows: Sequence[tuple]) -> InsertResults:
+    """Rows: (name, nickname, phone, email, created_at, updated_at)."""
+    return _insert_many("clients", CLIENT_INSERT, rows)
+
+def insert_purchases(rows: Sequence[tuple]) -> InsertResults:
+    """Rows: (client_id, description, total_value, note_number, created_at, updated_at)."""
+    return _insert_many("purchases", PURCHASE_INSERT, rows)
+
+def insert_payments(rows: Sequence[tuple]) -> InsertResults:
+    """Rows: (purchase_id, amount, payment_date, method, description, receipt_number, created_at, updated_at)."""
+    return _insert_many("payments", PAYMENT_INSERT, rows)
+
+def _select_in(sql: str, values: Sequence) -> List[sqlite3.Row]:
+    if not values:
+        return []
+
+    placeholders = ", ".join("?" for _ in values)
+    try:
+        with transaction() as conn:
+            return conn.execute(sql.format(placeholders=placeholders), tuple(values)).fetchall()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def get_client_ids_by_nickname(nicknames: Sequence[str]) -> Dict[str, int]:
+    rows = _select_in("SELECT nickname, id FROM clients WHERE nickname IN ({placeholders})", nicknames)
+    return {row[0]: row[1] for row in rows}
+
+def get_existing_client_ids(client_ids: Sequence[int]) -> set[int]:
+    rows = _select_in("SELECT id FROM clients WHERE id IN ({placeholders})", client_ids)
+    return {row[0] for row in rows}
+
+def get_active_purchase_ids_by_note_number(note_numbers: Sequence[str]) -> Dict[str, int]:
+    rows = _select_in("""
+        SELECT note_number, id FROM purchases WHERE note_number IN ({placeholders}) AND is_active = 1
+    """, note_numbers)
+    return {row[0]: row[1] for row in rows}
+
+def get_active_purchase_ids(purchase_ids: Sequence[int]) -> set[int]:
+    rows = _select_in("SELECT id FROM purchases WHERE id IN ({placeholders}) AND is_active = 1", purchase_ids)
+    return {row[0] for row in rows}
+
+def delete_new_purchases(purchase_ids: Sequence[int]):
+    """Drop purchases inserted earlier in the same (uncommitted) import batch."""
+    if not purchase_ids:
+        return
+
+    placeholders = ", ".join("?" for _ in purchase_ids)
+    try:
+        with transaction() as conn:
+            conn.execute(f"DELETE FROM purchases WHERE id IN ({placeholders})", tuple(purchase_ids))
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
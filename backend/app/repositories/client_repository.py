@@ -1,83 +1,85 @@
 from typing import List
 from datetime import datetime
-from app.database import get_connection, sqlite3
+from app.cache import cached_entity
+from app.database import connection, transaction, sqlite3
 from app.models import Client
 from app.utils.exceptions import (
     ValidationError, BusinessRuleError, DatabaseError,
     error_messages
 )
 
-def get_clients(limit: int = None, offset: int = 0, only_active: bool = True) -> List[Client]:
-    conn = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # Default limit if not provided (-1 means "no limit" in SQLite)
-        search_limit = -1 if limit is None else limit
-        where_clause = ""
-        if only_active:
-            where_clause = "WHERE is_active = 1"
-
-        cursor.execute(f"""
-            SELECT * FROM clients {where_clause} ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, (search_limit, offset))
+def get_clients(limit: int = None, offset: int = 0, only_active: bool = True,
+                after: tuple[int, int] | None = None) -> List[Client]:
+    """List clients newest first. `after` is the (created_at, id) keyset of the previous page."""
+    return [Client.from_row(row) for row in get_client_rows(limit, offset, only_active, after)]
 
-        rows = cursor.fetchall()
-
-        if not rows:
-            return []
-
-        return [Client.from_row(row) for row in rows]
+def get_client_rows(limit: int = None, offset: int = 0, only_active: bool = True,
+                    after: tuple[int, int] | None = None) -> List[tuple]:
+    """Same as `get_clients`, as plain row tuples (for the JSON fast path)."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            # Default limit if not provided (-1 means "no limit" in SQLite)
+            search_limit = -1 if limit is None else limit
+            conditions = []
+            values = []
+            if only_active:
+                conditions.append("is_active = 1")
+            if after:
+                conditions.append("(created_at, id) < (?, ?)")
+                values.extend(after)
+
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            values.extend((search_limit, offset))
+
+            cursor.execute(f"""
+                SELECT * FROM clients {where_clause} ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """, tuple(values))
+
+            return cursor.fetchall()
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def insert_client(data: dict) -> Client:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        
-        now = int(datetime.now().timestamp())
-
-        cursor.execute("""
-            INSERT INTO clients (name, nickname, phone, email, is_active, created_at, updated_at)
-            VALUES (?, ?, ?, ?, 1, ?, ?)
-        """, (
-            data.get("name"),
-            data.get("nickname"),
-            data.get("phone"),
-            data.get("email"),
-            now,
-            now
-        ))
-
-        conn.commit()
-        client_id = cursor.lastrowid
-
-        return get_client_by_id(client_id)
+        with transaction() as conn:
+            cursor = conn.cursor()
+
+            now = int(datetime.now().timestamp())
+
+            cursor.execute("""
+                INSERT INTO clients (name, nickname, phone, email, is_active, created_at, updated_at)
+                VALUES (?, ?, ?, ?, 1, ?, ?)
+            """, (
+                data.get("name"),
+                data.get("nickname"),
+                data.get("phone"),
+                data.get("email"),
+                now,
+                now
+            ))
+
+            client_id = cursor.lastrowid
+
+            return get_client_by_id(client_id)
 
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
             raise BusinessRuleError(error_messages.CLIENT_ALREADY_EXISTS) from e
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
+@cached_entity("clients")
 def get_client_by_id(client_id: int) -> Client | None:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-        row = cursor.fetchone()
+            cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -85,13 +87,24 @@ def get_client_by_id(client_id: int) -> Client | None:
         return Client.from_row(row)
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
-def update_client(client_id: int, data: dict) -> Client | None:
-    conn = None
+def get_clients_by_ids(client_ids: List[int]) -> List[Client]:
+    """Clients with the given ids in one query (missing ids are left out, order not kept)."""
+    if not client_ids:
+        return []
 
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                f"SELECT * FROM clients WHERE id IN ({', '.join('?' for _ in client_ids)})", tuple(client_ids)
+            )
+            return [Client.from_row(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def update_client(client_id: int, data: dict) -> Client | None:
     # columns that are allowed to be updated
     allowed_columns = ["name", "nickname", "phone", "email", "is_active"]
 
@@ -104,7 +117,7 @@ def update_client(client_id: int, data: dict) -> Client | None:
         if key in allowed_columns:
             columns.append(f"{key} = ?")
             values.append(value)
-    
+
     if not columns:
         raise ValidationError(error_messages.DATA_FIELDS_EMPTY)
 
@@ -116,48 +129,38 @@ def update_client(client_id: int, data: dict) -> Client | None:
     values.append(client_id)
 
     query = f"""
-        UPDATE clients SET {', '.join(columns)} 
+        UPDATE clients SET {', '.join(columns)}
         WHERE id = ?
     """
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(query, tuple(values))
-        conn.commit()
+            cursor.execute(query, tuple(values))
 
-        if cursor.rowcount == 0:
-            return None
-        
-        return get_client_by_id(client_id)
+            if cursor.rowcount == 0:
+                return None
+
+            return get_client_by_id(client_id)
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
             raise BusinessRuleError(error_messages.CLIENT_ALREADY_EXISTS) from e
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def deactivate_client(client_id: int) -> bool:
     """Deactivate (soft delete) a client."""
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        now = int(datetime.now().timestamp())
-        cursor.execute("""
-            UPDATE clients SET is_active = 0, updated_at = ? 
-            WHERE id = ? AND is_active = 1
-        """, (now, client_id))
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            now = int(datetime.now().timestamp())
+            cursor.execute("""
+                UPDATE clients SET is_active = 0, updated_at = ?
+                WHERE id = ? AND is_active = 1
+            """, (now, client_id))
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
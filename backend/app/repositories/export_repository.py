@@ -0,0 +1,51 @@
+from typing import Iterator, List
+from config import EXPORT_BATCH_SIZE
+from app.database import get_pool, sqlite3
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+# exported columns, in file order
+EXPORT_COLUMNS = {
+    "clients": ("id", "name", "nickname", "phone", "email", "is_active", "created_at", "updated_at"),
+    "purchases": (
+        "id", "client_id", "description", "total_value", "total_paid_value", "status", "note_number",
+        "is_active", "created_at", "updated_at"
+    ),
+    "payments": (
+        "id", "purchase_id", "amount", "payment_date", "method", "description", "receipt_number",
+        "is_active", "created_at", "updated_at"
+    ),
+}
+
+def iter_rows(table: str, only_active: bool | None = None,
+              batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[sqlite3.Row]]:
+    """
+    Yield every row of `table` in batches of `batch_size`, ordered by id.
+
+    The generator is consumed by the response while it is being sent, possibly
+    from several threads, so it owns its pooled connection instead of using the
+    context-bound `connection()`. The read transaction gives the whole export
+    one consistent snapshot (WAL lets writers go on meanwhile).
+    """
+    columns = ", ".join(EXPORT_COLUMNS[table])
+    where_clause = "WHERE is_active = ?" if only_active is not None else ""
+    params = (int(only_active),) if only_active is not None else ()
+
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.execute(f"SELECT {columns} FROM {table} {where_clause} ORDER BY id", params)
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+    finally:
+        # release() rolls back the read transaction
+        pool.release(conn)
@@ -1,83 +1,84 @@
 from typing import List
 from datetime import datetime
-from app.database import get_connection, sqlite3
+from app.cache import cached_entity
+from app.database import connection, transaction, sqlite3
 from app.models import Payment
 from app.utils.exceptions import (
     BusinessRuleError, DatabaseError,
     error_messages
 )
 
-def get_payments(limit: int = None, offset: int = 0, purchase_id: int = None) -> List[Payment]:
-    conn = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+def get_payments(limit: int = None, offset: int = 0, purchase_id: int = None,
+                 after: tuple[int, int] | None = None) -> List[Payment]:
+    """List payments newest first. `after` is the (created_at, id) keyset of the previous page."""
+    return [Payment.from_row(row) for row in get_payment_rows(limit, offset, purchase_id, after)]
 
-        # Default limit if not provided (-1 means "no limit" in SQLite)
-        search_limit = -1 if limit is None else limit
-        values = []
+def get_payment_rows(limit: int = None, offset: int = 0, purchase_id: int = None,
+                     after: tuple[int, int] | None = None) -> List[tuple]:
+    """Same as `get_payments`, as plain row tuples (for the JSON fast path)."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
 
-        where_clause = "WHERE is_active = 1"
-        if purchase_id:
-            where_clause = "WHERE purchase_id = ?"
-            values.append(purchase_id)
-        
-        # add search_limit and offset to query parameters (values list)
-        values.append(search_limit)
-        values.append(offset)
+            # Default limit if not provided (-1 means "no limit" in SQLite)
+            search_limit = -1 if limit is None else limit
+            values = []
 
-        cursor.execute(f"""
-            SELECT * FROM payments {where_clause} ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, tuple(values))
+            where_clause = "WHERE is_active = 1"
+            if purchase_id:
+                where_clause = "WHERE purchase_id = ?"
+                values.append(purchase_id)
 
-        rows = cursor.fetchall()
+            if after:
+                where_clause += " AND (created_at, id) < (?, ?)"
+                values.extend(after)
 
-        if not rows:
-            return []
+            # add search_limit and offset to query parameters (values list)
+            values.append(search_limit)
+            values.append(offset)
 
-        return [Payment.from_row(row) for row in rows]
+            cursor.execute(f"""
+                SELECT * FROM payments {where_clause} ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """, tuple(values))
 
+            return cursor.fetchall()
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def insert_payment(data: dict) -> Payment:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        now = int(datetime.now().timestamp())
-
-        cursor.execute("""INSERT INTO payments (
-            purchase_id,
-            amount,
-            payment_date,
-            method,
-            description,
-            receipt_number,
-            is_active,
-            created_at,
-            updated_at
-          ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?);
-        """, (
-            int(data.get("purchase_id")),
-            data.get("amount"),
-            int(data.get("payment_date")) if data.get("payment_date") else None,
-            data.get("method"),
-            data.get("description"),
-            data.get("receipt_number"),
-            now,
-            now
-        ))
-
-        conn.commit()
-        payment_id = cursor.lastrowid
-
-        return get_payment_by_id(payment_id)
+        with transaction() as conn:
+            cursor = conn.cursor()
+
+            now = int(datetime.now().timestamp())
+
+            cursor.execute("""INSERT INTO payments (
+                purchase_id,
+                amount,
+                payment_date,
+                method,
+                description,
+                receipt_number,
+                is_active,
+                created_at,
+                updated_at
+              ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?);
+            """, (
+                int(data.get("purchase_id")),
+                data.get("amount"),
+                int(data.get("payment_date")) if data.get("payment_date") else None,
+                data.get("method"),
+                data.get("description"),
+                data.get("receipt_number"),
+                now,
+                now
+            ))
+
+            payment_id = cursor.lastrowid
+
+            return get_payment_by_id(payment_id)
 
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
@@ -86,31 +87,45 @@ def insert_payment(data: dict) -> Payment:
             raise BusinessRuleError(error_messages.PAYMENT_PURCHASE_NOT_FOUND) from e
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
+@cached_entity("payments")
 def get_payment_by_id(payment_id: int) -> Payment | None:
-    conn = None
-    try:
-        conn = get_connection()
+    with connection() as conn:
         cursor = conn.cursor()
 
         cursor.execute("SELECT * FROM payments WHERE id = ?", (payment_id,))
         row = cursor.fetchone()
 
-        if not row:
-            return None
+    if not row:
+        return None
 
-        return Payment.from_row(row)
-    finally:
-        if conn:
-            conn.close()
+    return Payment.from_row(row)
+
+def get_payments_by_ids(payment_ids: List[int]) -> List[Payment]:
+    """Payments with the given ids in one query (missing ids are left out, order not kept)."""
+    return _get_payments_in("id", payment_ids)
+
+def get_payments_by_receipt_numbers(receipt_numbers: List[str]) -> List[Payment]:
+    """Payments with the given receipt numbers in one query (missing ones are left out)."""
+    return _get_payments_in("receipt_number", receipt_numbers)
+
+def _get_payments_in(column: str, values: List) -> List[Payment]:
+    if not values:
+        return []
+
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                f"SELECT * FROM payments WHERE {column} IN ({', '.join('?' for _ in values)})", tuple(values)
+            )
+            return [Payment.from_row(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
 
 def update_payment(payment_id: int, data: dict) -> Payment | None:
     """Update a payment."""
-    conn = None
-
     # Add the updated_at column
     now = int(datetime.now().timestamp())
     data["updated_at"] = now
@@ -127,16 +142,15 @@ def update_payment(payment_id: int, data: dict) -> Payment | None:
     """
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(query, tuple(values))
-        conn.commit()
+            cursor.execute(query, tuple(values))
 
-        if cursor.rowcount == 0:
-            return None
+            if cursor.rowcount == 0:
+                return None
 
-        return get_payment_by_id(payment_id)
+            return get_payment_by_id(payment_id)
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
             raise BusinessRuleError(error_messages.PAYMENT_ALREADY_EXISTS) from e
@@ -144,53 +158,37 @@ def update_payment(payment_id: int, data: dict) -> Payment | None:
             raise BusinessRuleError(error_messages.PAYMENT_PURCHASE_NOT_FOUND) from e
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def deactivate_payment(payment_id: int) -> bool:
     """Deactivate (soft delete) a payment."""
-    conn = None
-
     now = int(datetime.now().timestamp())
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            UPDATE payments SET is_active = 0, updated_at = ?
-            WHERE id = ? AND is_active = 1
-        """, (now, payment_id))
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
+            cursor.execute("""
+                UPDATE payments SET is_active = 0, updated_at = ?
+                WHERE id = ? AND is_active = 1
+            """, (now, payment_id))
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 # Purchase related functions
 def deactivate_payments_by_purchase_id(purchase_id: int) -> bool:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        now = int(datetime.now().timestamp())
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("""
-            UPDATE payments SET is_active = 0, updated_at = ?
-            WHERE purchase_id = ? AND is_active = 1
-        """, (now, purchase_id))
+            now = int(datetime.now().timestamp())
 
-        conn.commit()
+            cursor.execute("""
+                UPDATE payments SET is_active = 0, updated_at = ?
+                WHERE purchase_id = ? AND is_active = 1
+            """, (now, purchase_id))
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
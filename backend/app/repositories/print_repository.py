@@ -0,0 +1,48 @@
+from typing import List, Tuple
+from app.database import connection, sqlite3
+from app.models import Payment, Purchase
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+def get_notes_between(start: int, end: int) -> Tuple[List[Tuple[Purchase, str, str | None]], List[Payment]]:
+    """
+    Active purchases created in [start, end) with their client's name and nickname,
+    plus their active payments (ordered by purchase, then payment date).
+
+    Both queries read the same snapshot, so the printed totals match the printed payments.
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            own_snapshot = not conn.in_transaction
+            if own_snapshot:
+                cursor.execute("BEGIN")
+
+            try:
+                cursor.execute("""
+                    SELECT p.*, c.name, c.nickname
+                    FROM purchases p
+                    JOIN clients c ON c.id = p.client_id
+                    WHERE p.is_active = 1 AND p.created_at >= ? AND p.created_at < ?
+                    ORDER BY p.created_at, p.id
+                """, (start, end))
+                purchase_rows = cursor.fetchall()
+
+                cursor.execute("""
+                    SELECT pay.*
+                    FROM payments pay
+                    JOIN purchases p ON p.id = pay.purchase_id
+                    WHERE p.is_active = 1 AND p.created_at >= ? AND p.created_at < ? AND pay.is_active = 1
+                    ORDER BY pay.purchase_id, COALESCE(pay.payment_date, pay.created_at), pay.id
+                """, (start, end))
+                payment_rows = cursor.fetchall()
+            finally:
+                if own_snapshot:
+                    cursor.execute("ROLLBACK")
+
+        purchases = [(Purchase.from_row(row), row[10], row[11]) for row in purchase_rows]
+        return purchases, [Payment.from_row(row) for row in payment_rows]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
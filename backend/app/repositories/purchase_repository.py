@@ -1,79 +1,84 @@
 from typing import List
 from datetime import datetime
-from app.database import get_connection, sqlite3
+from app.cache import cached_entity
+from app.database import connection, transaction, sqlite3
 from app.models import Purchase
 from app.utils.exceptions import (
     ValidationError, BusinessRuleError, DatabaseError,
     error_messages
 )
 
-def get_purchases(limit: int = None, offset: int = 0, only_pending: bool | None = None) -> List[Purchase]:
-    conn = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        # Default limit if not provided (-1 means "no limit" in SQLite)
-        search_limit = -1 if limit is None else limit
-
-        # Create WHERE clause if only pending (or partial) purchases is requested
-        where_clause = "" # include inactive ones if only_pending is None
-        if only_pending is True:
-            where_clause = "WHERE status IN ('pending', 'partial') AND is_active = 1"
-        elif only_pending is False:
-            where_clause = "WHERE is_active = 1"
-
-        cursor.execute(f"""
-            SELECT * FROM purchases {where_clause} ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, (search_limit, offset))
-
-        rows = cursor.fetchall()
+def get_purchases(limit: int = None, offset: int = 0, only_pending: bool | None = None,
+                  after: tuple[int, int] | None = None) -> List[Purchase]:
+    """List purchases newest first. `after` is the (created_at, id) keyset of the previous page."""
+    return [Purchase.from_row(row) for row in get_purchase_rows(limit, offset, only_pending, after)]
 
-        if not rows:
-            return []
-
-        return [Purchase.from_row(row) for row in rows]
+def get_purchase_rows(limit: int = None, offset: int = 0, only_pending: bool | None = None,
+                      after: tuple[int, int] | None = None) -> List[tuple]:
+    """Same as `get_purchases`, as plain row tuples (for the JSON fast path)."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            # Default limit if not provided (-1 means "no limit" in SQLite)
+            search_limit = -1 if limit is None else limit
+
+            # Create WHERE clause if only pending (or partial) purchases is requested
+            conditions = [] # include inactive ones if only_pending is None
+            values = []
+            if only_pending is True:
+                conditions.append("status IN ('pending', 'partial') AND is_active = 1")
+            elif only_pending is False:
+                conditions.append("is_active = 1")
+            if after:
+                conditions.append("(created_at, id) < (?, ?)")
+                values.extend(after)
+
+            where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            values.extend((search_limit, offset))
+
+            cursor.execute(f"""
+                SELECT * FROM purchases {where_clause} ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+            """, tuple(values))
+
+            return cursor.fetchall()
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def insert_purchase(data: dict) -> Purchase:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-
-        now = int(datetime.now().timestamp())
-
-        cursor.execute("""INSERT INTO purchases (
-                client_id,
-                description,
-                total_value,
-                total_paid_value,
-                status,
-                note_number,
-                is_active,
-                created_at,
-                updated_at
-            ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?);
-        """, (
-            int(data.get("client_id")),
-            data.get("description"),
-            data.get("total_value"),
-            data.get("total_paid_value"),
-            data.get("status"),
-            data.get("note_number"),
-            now,
-            now
-        ))
-
-        conn.commit()
-        purchase_id = cursor.lastrowid
-
-        return get_purchase_by_id(purchase_id)
+        with transaction() as conn:
+            cursor = conn.cursor()
+
+            now = int(datetime.now().timestamp())
+
+            cursor.execute("""INSERT INTO purchases (
+                    client_id,
+                    description,
+                    total_value,
+                    total_paid_value,
+                    status,
+                    note_number,
+                    is_active,
+                    created_at,
+                    updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?);
+            """, (
+                int(data.get("client_id")),
+                data.get("description"),
+                data.get("total_value"),
+                data.get("total_paid_value"),
+                data.get("status"),
+                data.get("note_number"),
+                now,
+                now
+            ))
+
+            purchase_id = cursor.lastrowid
+
+            return get_purchase_by_id(purchase_id)
 
     except sqlite3.IntegrityError as e:
         if "UNIQUE constraint failed" in str(e):
@@ -82,18 +87,15 @@ def insert_purchase(data: dict) -> Purchase:
             raise BusinessRuleError(error_messages.PURCHASE_CLIENT_NOT_FOUND) from e
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
+@cached_entity("purchases")
 def get_purchase_by_id(purchase_id: int) -> Purchase | None:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM purchases WHERE id = ?", (purchase_id,))
-        row = cursor.fetchone()
+            cursor.execute("SELECT * FROM purchases WHERE id = ?", (purchase_id,))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -101,18 +103,14 @@ def get_purchase_by_id(purchase_id: int) -> Purchase | None:
         return Purchase.from_row(row)
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def get_purchase_by_note_number(note_number: str) -> Purchase | None:
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with connection() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute("SELECT * FROM purchases WHERE note_number = ?", (note_number,))
-        row = cursor.fetchone()
+            cursor.execute("SELECT * FROM purchases WHERE note_number = ?", (note_number,))
+            row = cursor.fetchone()
 
         if not row:
             return None
@@ -120,13 +118,31 @@ def get_purchase_by_note_number(note_number: str) -> Purchase | None:
         return Purchase.from_row(row)
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
-def update_purchase(purchase_id: int, data: dict) -> Purchase | None:
-    conn = None
+def get_purchases_by_ids(purchase_ids: List[int]) -> List[Purchase]:
+    """Purchases with the given ids in one query (missing ids are left out, order not kept)."""
+    return _get_purchases_in("id", purchase_ids)
+
+def get_purchases_by_note_numbers(note_numbers: List[str]) -> List[Purchase]:
+    """Purchases with the given note numbers in one query (missing ones are left out)."""
+    return _get_purchases_in("note_number", note_numbers)
 
+def _get_purchases_in(column: str, values: List) -> List[Purchase]:
+    if not values:
+        return []
+
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(
+                f"SELECT * FROM purchases WHERE {column} IN ({', '.join('?' for _ in values)})", tuple(values)
+            )
+            return [Purchase.from_row(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def update_purchase(purchase_id: int, data: dict) -> Purchase | None:
     # Add the updated_at column
     now = int(datetime.now().timestamp())
     data["updated_at"] = now
@@ -143,118 +159,310 @@ def update_purchase(purchase_id: int, data: dict) -> Purchase | None:
     """
 
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(query, tuple(values))
-        conn.commit()
+            cursor.execute(query, tuple(values))
 
-        if cursor.rowcount == 0:
-            return None
+            if cursor.rowcount == 0:
+                return None
 
-        return get_purchase_by_id(purchase_id)
+            return get_purchase_by_id(purchase_id)
     except sqlite3.IntegrityError as e:
         if "FOREIGN KEY constraint failed" in str(e):
             raise BusinessRuleError(error_messages.PURCHASE_CLIENT_NOT_FOUND)
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 def deactivate_purchase(purchase_id: int) -> bool:
     """Deactivate a purchase."""
-    conn = None
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        now = int(datetime.now().timestamp())
-
-        # disable purchase with the given ID
-        cursor.execute("""
-            UPDATE purchases SET is_active = 0, updated_at = ?
-            WHERE id = ? AND is_active = 1
-        """, (now, purchase_id))
+        with transaction() as conn:
+            cursor = conn.cursor()
+            now = int(datetime.now().timestamp())
 
-        conn.commit()
+            # disable purchase with the given ID
+            cursor.execute("""
+                UPDATE purchases SET is_active = 0, updated_at = ?
+                WHERE id = ? AND is_active = 1
+            """, (now, purchase_id))
 
-        return cursor.rowcount > 0
+            return cursor.rowcount > 0
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
 # Client related functions
 def get_purchases_by_client_id(client_id: int, only_active: bool = True) -> List[Purchase]:
-    conn = None
-    try:
-        conn = get_connection()
-        cursor = conn.cursor()
+    return [Purchase.from_row(row) for row in get_purchase_rows_by_client_id(client_id, only_active)]
 
-        where_clause = "WHERE client_id = ?"
-        if only_active:
-            where_clause += " AND is_active = 1"
+def get_purchase_rows_by_client_id(client_id: int, only_active: bool = True) -> List[tuple]:
+    """Same as `get_purchases_by_client_id`, as plain row tuples (for the JSON fast path)."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
 
-        cursor.execute(f"SELECT * FROM purchases {where_clause} ORDER BY created_at DESC", (client_id,))
+            where_clause = "WHERE client_id = ?"
+            if only_active:
+                where_clause += " AND is_active = 1"
 
-        rows = cursor.fetchall()
+            cursor.execute(f"SELECT * FROM purchases {where_clause} ORDER BY created_at DESC", (client_id,))
 
-        return [Purchase.from_row(row) for row in rows] if rows else []
+            return cursor.fetchall()
     except sqlite3.IntegrityError as e:
         if "FOREIGN KEY constraint failed" in str(e):
             raise BusinessRuleError(error_messages.PURCHASE_CLIENT_NOT_FOUND)
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
-def get_purchases_ids_by_client_id(client_id: int) -> List[int]:
-    """Get all purchases ids for a given client."""
-    conn = None
+# ids the client cascade disabled, recorded in client_deactivations
+_CASCADE_IDS = "SELECT entity_id FROM client_deactivations WHERE client_id = :client_id AND entity = '{entity}'"
+
+def deactivate_purchases_by_client_id(client_id: int) -> bool:
+    """
+    Deactivate the active purchases of a client and their active payments.
+
+    Set-based, whatever the number of purchases: the disabled ids are recorded
+    in client_deactivations first, then each table gets one UPDATE. Nothing
+    remains paid, so the purchases go back to pending.
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
+        with transaction() as conn:
+            cursor = conn.cursor()
+            params = {"client_id": client_id, "now": int(datetime.now().timestamp())}
+
+            # leftovers of a cascade that was never restored
+            cursor.execute("DELETE FROM client_deactivations WHERE client_id = :client_id", params)
+            cursor.execute("""
+                INSERT INTO client_deactivations (client_id, entity, entity_id)
+                SELECT client_id, 'purchase', id FROM purchases
+                WHERE client_id = :client_id AND is_active = 1
+            """, params)
+            if cursor.rowcount == 0:
+                return False
+
+            cursor.execute("""
+                INSERT INTO client_deactivations (client_id, entity, entity_id)
+                SELECT p.client_id, 'payment', pay.id
+                FROM payments pay
+                JOIN purchases p ON p.id = pay.purchase_id
+                WHERE p.client_id = :client_id AND p.is_active = 1 AND pay.is_active = 1
+            """, params)
+            cursor.execute(f"""
+                UPDATE payments SET is_active = 0, updated_at = :now
+                WHERE id IN ({_CASCADE_IDS.format(entity="payment")})
+            """, params)
+            cursor.execute(f"""
+                UPDATE purchases SET is_active = 0, total_paid_value = 0, status = 'pending', updated_at = :now
+                WHERE id IN ({_CASCADE_IDS.format(entity="purchase")})
+            """, params)
+
+            return True
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
 
-        # get all purchases ids for that client
-        cursor.execute("""
-            SELECT id FROM purchases WHERE client_id = ? AND is_active = 1
-        """, (client_id,))
-        purchase_ids = [row[0] for row in cursor.fetchall()]
+def restore_purchases_by_client_id(client_id: int) -> int:
+    """
+    Undo `deactivate_purchases_by_client_id`: reactivate the purchases and
+    payments it disabled (and only those) and recompute their totals, in one
+    UPDATE per table. Returns the number of restored purchases.
+    """
+    purchase_ids = _CASCADE_IDS.format(entity="purchase")
 
-        return purchase_ids
-    except sqlite3.IntegrityError as e:
-        if "FOREIGN KEY constraint failed" in str(e):
-            raise BusinessRuleError(error_messages.PURCHASE_CLIENT_NOT_FOUND)
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            params = {"client_id": client_id, "now": int(datetime.now().timestamp())}
+
+            cursor.execute(f"""
+                UPDATE purchases SET is_active = 1, updated_at = :now
+                WHERE is_active = 0 AND id IN ({purchase_ids})
+            """, params)
+            restored = cursor.rowcount
+
+            cursor.execute(f"""
+                UPDATE payments SET is_active = 1, updated_at = :now
+                WHERE is_active = 0 AND id IN ({_CASCADE_IDS.format(entity="payment")})
+            """, params)
+            cursor.execute(f"""
+                UPDATE purchases SET
+                    total_paid_value = totals.paid,
+                    status = {_status_case("totals.paid", "purchases.total_value")},
+                    updated_at = :now
+                FROM ({_PAID_TOTALS_QUERY.format(where_clause=f"WHERE p.id IN ({purchase_ids})")}) AS totals
+                WHERE purchases.id = totals.purchase_id
+            """, params)
+            cursor.execute("DELETE FROM client_deactivations WHERE client_id = :client_id", params)
+
+            return restored
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
 
-def deactivate_purchases_by_client_id(client_id: int) -> bool:
-    """Deactivate all purchases for a given client."""
-    conn = None
+# Totals related functions
+def _status_case(paid: str, total: str) -> str:
+    """SQL expression deriving the purchase status from a paid value."""
+    return f"""CASE
+        WHEN {paid} >= {total} THEN 'paid'
+        WHEN {paid} > 0 THEN 'partial'
+        ELSE 'pending'
+    END"""
+
+# Paid value of each purchase aggregated from its active payments (rounded to cents)
+_PAID_TOTALS_QUERY = """
+    SELECT p.id AS purchase_id, ROUND(COALESCE(SUM(pay.amount), 0), 2) AS paid
+    FROM purchases p
+    LEFT JOIN payments pay ON pay.purchase_id = p.id AND pay.is_active = 1
+    {where_clause}
+    GROUP BY p.id
+"""
+
+# adds :delta to the paid value of one purchase and re-derives its status
+_PAYMENT_DELTA_UPDATE = f"""
+    UPDATE purchases SET
+        total_paid_value = ROUND(total_paid_value + :delta, 2),
+        status = {_status_case("ROUND(total_paid_value + :delta, 2)", "total_value")},
+        updated_at = :now
+    WHERE id = :purchase_id
+"""
+
+def apply_payment_delta(purchase_id: int, delta: float) -> Purchase | None:
+    """
+    Add `delta` to total_paid_value and derive the new status in the same UPDATE.
+
+    A delta of 0 only re-derives the status (e.g. after total_value changes).
+    """
     try:
-        conn = get_connection()
-        cursor = conn.cursor()
-        now = int(datetime.now().timestamp())
+        with transaction() as conn:
+            cursor = conn.cursor()
+            now = int(datetime.now().timestamp())
 
-        # disable all purchases related to that client
-        cursor.execute("""
-            UPDATE purchases SET is_active = 0, updated_at = ?
-            WHERE client_id = ? AND is_active = 1
-        """, (now, client_id))
+            cursor.execute(_PAYMENT_DELTA_UPDATE, {"delta": delta, "now": now, "purchase_id": purchase_id})
 
-        conn.commit()
+            if cursor.rowcount == 0:
+                return None
 
-        return cursor.rowcount > 0
-    except sqlite3.IntegrityError as e:
-        if "FOREIGN KEY constraint failed" in str(e):
-            raise BusinessRuleError(error_messages.PURCHASE_CLIENT_NOT_FOUND)
+            return get_purchase_by_id(purchase_id)
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def apply_payment_deltas(deltas: List[tuple[int, float]]) -> int:
+    """`apply_payment_delta` for several (purchase_id, delta) pairs with one executemany. Returns the updated rows."""
+    try:
+        with transaction() as conn:
+            now = int(datetime.now().timestamp())
+            cursor = conn.executemany(_PAYMENT_DELTA_UPDATE, [
+                {"delta": delta, "now": now, "purchase_id": purchase_id} for purchase_id, delta in deltas
+            ])
+
+            return cursor.rowcount
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def get_open_amounts_by_client_id(client_id: int) -> List[tuple[int, float]]:
+    """
+    (purchase_id, open amount) of the client's active pending/partial purchases, oldest first.
+
+    Read from the partial index idx_purchases_open_aging alone (it covers every
+    column used), so paid purchases are never scanned. The planner would rather
+    take idx_purchases_client_active, which also walks the paid ones: hence INDEXED BY.
+    """
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+
+            cursor.execute("""
+                SELECT id, ROUND(total_value - total_paid_value, 2)
+                FROM purchases INDEXED BY idx_purchases_open_aging
+                WHERE is_active = 1 AND client_id = ? AND status IN ('pending', 'partial')
+                ORDER BY created_at, id
+            """, (client_id,))
+
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def refresh_purchase_totals(purchase_id: int) -> Purchase | None:
+    """Recompute total_paid_value and status of one purchase from its active payments."""
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            now = int(datetime.now().timestamp())
+
+            cursor.execute(f"""
+                UPDATE purchases SET
+                    total_paid_value = totals.paid,
+                    status = {_status_case("totals.paid", "purchases.total_value")},
+                    updated_at = ?
+                FROM ({_PAID_TOTALS_QUERY.format(where_clause="WHERE p.id = ?")}) AS totals
+                WHERE purchases.id = totals.purchase_id
+            """, (now, purchase_id))
+
+            if cursor.rowcount == 0:
+                return None
+
+            return get_purchase_by_id(purchase_id)
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def get_inconsistent_purchase_totals() -> List[dict]:
+    """List purchases whose stored totals differ from the sum of their active payments."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f"""
+                SELECT
+                    purchases.id,
+                    purchases.total_paid_value,
+                    purchases.status,
+                    totals.paid AS expected_paid_value,
+                    {_status_case("totals.paid", "purchases.total_value")} AS expected_status
+                FROM purchases
+                JOIN ({_PAID_TOTALS_QUERY.format(where_clause="")}) AS totals
+                    ON totals.purchase_id = purchases.id
+                WHERE purchases.total_paid_value IS NOT totals.paid
+                    OR purchases.status IS NOT expected_status
+                ORDER BY purchases.id
+            """)
+
+            return [dict(row) for row in cursor.fetchall()]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def repair_purchase_totals(purchase_ids: List[int] | None = None) -> int:
+    """
+    Recompute totals for the given purchases (all when None) in one aggregate UPDATE.
+
+    Only rows whose stored values are wrong are written. Returns the number of
+    repaired purchases.
+    """
+    values = []
+    where_clause = ""
+    if purchase_ids is not None:
+        if not purchase_ids:
+            return 0
+        where_clause = f"WHERE p.id IN ({', '.join('?' for _ in purchase_ids)})"
+        values.extend(purchase_ids)
+
+    expected_status = _status_case("totals.paid", "purchases.total_value")
+
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            now = int(datetime.now().timestamp())
+
+            cursor.execute(f"""
+                UPDATE purchases SET
+                    total_paid_value = totals.paid,
+                    status = {expected_status},
+                    updated_at = ?
+                FROM ({_PAID_TOTALS_QUERY.format(where_clause=where_clause)}) AS totals
+                WHERE purchases.id = totals.purchase_id
+                    AND (purchases.total_paid_value IS NOT totals.paid
+                        OR purchases.status IS NOT {expected_status})
+            """, (now, *values))
+
+            return cursor.rowcount
     except sqlite3.Error as e:
         raise DatabaseError(error_messages.DATABASE_ERROR) from e
-    finally:
-        if conn:
-            conn.close()
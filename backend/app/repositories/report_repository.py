@@ -0,0 +1,159 @@
+from typing import Iterator, List
+from config import EXPORT_BATCH_SIZE
+from app.database import connection, get_pool, sqlite3
+from app.models import ClientAging
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+# per-client aging columns, in query (and file) order
+AGING_COLUMNS = (
+    "client_id", "name", "nickname", "open_purchases",
+    "days_0_30", "days_31_60", "days_61_90", "days_over_90", "total"
+)
+
+# client statement columns, in query (and file) order
+STATEMENT_COLUMNS = ("date", "type", "id", "purchase_id", "number", "description", "amount", "balance")
+
+# Notes (debits) and payments (credits, negative amounts) of the client,
+# interleaved by date; on the same date a note comes before its payments.
+# The running balance is a window over every entry before :end, so the first
+# row after :start already carries the balance of the whole history, and the
+# "opening" row (always first) is the balance before :start.
+_STATEMENT_QUERY = """
+    WITH entries AS (
+        SELECT p.created_at AS date, 0 AS kind, 'purchase' AS type, p.id, p.id AS purchase_id,
+            p.note_number AS number, p.description, p.total_value AS amount
+        FROM purchases p
+        WHERE p.client_id = :client_id AND p.is_active = 1
+            AND (:end IS NULL OR p.created_at < :end)
+        UNION ALL
+        SELECT COALESCE(pay.payment_date, pay.created_at), 1, 'payment', pay.id, pay.purchase_id,
+            pay.receipt_number, pay.description, -pay.amount
+        FROM purchases p
+        JOIN payments pay ON pay.purchase_id = p.id AND pay.is_active = 1
+        WHERE p.client_id = :client_id AND p.is_active = 1
+            AND (:end IS NULL OR COALESCE(pay.payment_date, pay.created_at) < :end)
+    ),
+    ledger AS (
+        SELECT date, kind, type, id, purchase_id, number, description, amount,
+            ROUND(SUM(amount) OVER (ORDER BY date, kind, id ROWS UNBOUNDED PRECEDING), 2) AS balance
+        FROM entries
+    )
+    SELECT date, type, id, purchase_id, number, description, amount, balance FROM (
+        SELECT 0 AS part, :start AS date, 0 AS kind, 'opening' AS type, NULL AS id, NULL AS purchase_id,
+            NULL AS number, NULL AS description, NULL AS amount, ROUND(TOTAL(amount), 2) AS balance
+        FROM entries
+        WHERE date < :start
+        UNION ALL
+        SELECT 1, date, kind, type, id, purchase_id, number, description, ROUND(amount, 2), balance
+        FROM ledger
+        WHERE :start IS NULL OR date >= :start
+    )
+    ORDER BY part, date, kind, id
+"""
+
+def _aging_query(historical: bool) -> str:
+    """
+    Per-client aging of the open amounts, bucketed by purchase age.
+
+    Bucket boundaries come as parameters (:t30, :t60, :t90 are the midnights
+    30/60/90 days before the report date, :cutoff the end of that day), so the
+    whole report is a single grouped scan. The current report reads only the
+    covering index idx_purchases_open_aging; a report for a past date must also
+    look at purchases paid since, with the payments made until that date.
+    """
+    if historical:
+        source = """
+            SELECT p.client_id, p.created_at, p.total_value - COALESCE(SUM(pay.amount), 0) AS open_amount
+            FROM purchases p
+            LEFT JOIN payments pay ON pay.purchase_id = p.id AND pay.is_active = 1
+                AND COALESCE(pay.payment_date, pay.created_at) < :cutoff
+            WHERE p.is_active = 1 AND p.created_at < :cutoff
+            GROUP BY p.id
+        """
+        open_filter = "WHERE ROUND(o.open_amount, 2) > 0"
+    else:
+        source = """
+            SELECT p.client_id, p.created_at, p.total_value - p.total_paid_value AS open_amount
+            FROM purchases p
+            WHERE p.is_active = 1 AND p.status IN ('pending', 'partial')
+        """
+        open_filter = ""
+
+    return f"""
+        SELECT o.client_id, c.name, c.nickname, COUNT(*),
+            ROUND(SUM(CASE WHEN o.created_at >= :t30 THEN o.open_amount ELSE 0 END), 2),
+            ROUND(SUM(CASE WHEN o.created_at < :t30 AND o.created_at >= :t60 THEN o.open_amount ELSE 0 END), 2),
+            ROUND(SUM(CASE WHEN o.created_at < :t60 AND o.created_at >= :t90 THEN o.open_amount ELSE 0 END), 2),
+            ROUND(SUM(CASE WHEN o.created_at < :t90 THEN o.open_amount ELSE 0 END), 2),
+            ROUND(SUM(o.open_amount), 2) AS total
+        FROM ({source}) o
+        JOIN clients c ON c.id = o.client_id
+        {open_filter}
+        GROUP BY o.client_id
+        ORDER BY total DESC, o.client_id
+    """
+
+def get_client_aging(bounds: dict, historical: bool = False) -> List[ClientAging]:
+    """Aging of every client with an open amount, biggest debts first."""
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(_aging_query(historical), bounds)
+            rows = cursor.fetchall()
+
+        return [ClientAging.from_row(row) for row in rows]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+def iter_client_aging(bounds: dict, historical: bool = False,
+                      batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[sqlite3.Row]]:
+    """
+    Yield the per-client aging rows in batches of `batch_size`.
+
+    Like the exports, the generator owns its pooled connection and reads from
+    one snapshot while the response is being sent.
+    """
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.execute(_aging_query(historical), bounds)
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+    finally:
+        # release() rolls back the read transaction
+        pool.release(conn)
+
+def iter_client_statement(client_id: int, start: int | None = None, end: int | None = None,
+                          batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[sqlite3.Row]]:
+    """
+    Yield the statement rows of a client (`STATEMENT_COLUMNS`) in batches of
+    `batch_size`: the opening balance, then every note and payment dated in
+    [start, end) with the running balance after it. Owns its pooled connection,
+    like `iter_client_aging`.
+    """
+    pool = get_pool()
+    try:
+        conn = pool.acquire()
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+
+    try:
+        conn.execute("BEGIN")
+        cursor = conn.execute(_STATEMENT_QUERY, {"client_id": client_id, "start": start, "end": end})
+        while rows := cursor.fetchmany(batch_size):
+            yield rows
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
+    finally:
+        pool.release(conn)
@@ -0,0 +1,65 @@
+from typing import List
+from app.database import connection, sqlite3
+from app.models import SearchResult
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+# One ranked sub-query per searchable entity, all returning the SearchResult columns
+SEARCH_QUERIES = {
+    "client": """
+        SELECT 'client' AS type, c.id, c.name AS title, c.nickname AS subtitle, NULL AS parent_id, c.is_active, bm25(clients_fts) AS rank
+        FROM clients_fts JOIN clients c ON c.id = clients_fts.rowid
+        WHERE clients_fts MATCH :query {active_filter}
+    """,
+    "purchase": """
+        SELECT 'purchase' AS type, p.id, p.note_number AS title, p.description AS subtitle, p.client_id AS parent_id, p.is_active, bm25(purchases_fts) AS rank
+        FROM purchases_fts JOIN purchases p ON p.id = purchases_fts.rowid
+        WHERE purchases_fts MATCH :query {active_filter}
+    """,
+    "payment": """
+        SELECT 'payment' AS type, pay.id, pay.receipt_number AS title, pay.description AS subtitle, pay.purchase_id AS parent_id, pay.is_active, bm25(payments_fts) AS rank
+        FROM payments_fts JOIN payments pay ON pay.id = payments_fts.rowid
+        WHERE payments_fts MATCH :query {active_filter}
+    """,
+}
+
+ACTIVE_FILTERS = {"client": "AND c.is_active = 1", "purchase": "AND p.is_active = 1", "payment": "AND pay.is_active = 1"}
+
+# Weight of the best hit of each type when the types are merged: a client (name or
+# nickname) outranks a purchase, which outranks a payment (matched by receipt number
+# only), so a lone weak hit of one type does not tie with the strongest of another
+SEARCH_TYPE_WEIGHTS = {"client": 1.0, "purchase": 0.85, "payment": 0.7}
+
+def search(query: str, types: List[str], limit: int = 20, offset: int = 0, only_active: bool = True) -> List[SearchResult]:
+    """
+    Run an FTS5 `query` over the given entity types and return hits ordered by relevance.
+
+    bm25() scores depend on the statistics of their own table, so the scores of
+    different tables are not comparable: each is divided by the best score of its
+    type and scaled by the type weight (`SEARCH_TYPE_WEIGHTS`), giving a rank from
+    -1 to 0 on one scale for every type. Ties go to the heavier type, then the id.
+    """
+    weight = "CASE type " + " ".join(f"WHEN '{name}' THEN {value}" for name, value in SEARCH_TYPE_WEIGHTS.items()) + " END"
+    sub_queries = [
+        SEARCH_QUERIES[type_].format(active_filter=ACTIVE_FILTERS[type_] if only_active else "")
+        for type_ in types
+    ]
+
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f"""
+                SELECT type, id, title, subtitle, parent_id, is_active,
+                    COALESCE(-rank / NULLIF(MIN(rank) OVER (PARTITION BY type), 0), 0) * {weight} AS rank
+                FROM ({" UNION ALL ".join(sub_queries)})
+                ORDER BY rank, {weight} DESC, id LIMIT :limit OFFSET :offset
+            """, {"query": query, "limit": limit, "offset": offset})
+
+            rows = cursor.fetchall()
+
+        return [SearchResult.from_row(row) for row in rows]
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
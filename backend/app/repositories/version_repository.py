@@ -0,0 +1,20 @@
+from typing import Dict, Sequence
+from app.database import connection, sqlite3
+from app.utils.exceptions import (
+    DatabaseError,
+    error_messages
+)
+
+def get_table_versions(tables: Sequence[str]) -> Dict[str, int]:
+    """Change counters of `tables`, bumped by triggers on every insert, update or delete."""
+    placeholders = ", ".join("?" for _ in tables)
+    try:
+        with connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f"SELECT name, version FROM table_versions WHERE name IN ({placeholders})", tuple(tables))
+            rows = cursor.fetchall()
+
+        return {row[0]: row[1] for row in rows}
+    except sqlite3.Error as e:
+        raise DatabaseError(error_messages.DATABASE_ERROR) from e
@@ -0,0 +1,54 @@
+from fastapi import APIRouter
+from fastapi.responses import FileResponse
+from app.executor import run_read, run_exclusive_write
+from app.utils.backup import (
+    create_backup,
+    get_backup_path,
+    list_backups,
+    restore_backup,
+    verify_backup
+)
+from app.utils.exceptions import handle_service_exceptions
+from app.schemas.backup import (
+    BackupListResponseSchema,
+    BackupVerifyResponseSchema,
+    BackupWithMessageResponseSchema
+)
+
+router = APIRouter(prefix="/backups", tags=["Backups"])
+
+@router.get("/", response_model=BackupListResponseSchema)
+@handle_service_exceptions
+async def list_all_backups():
+    """List stored backups, newest first."""
+    backups = await run_read(list_backups)
+    return {"message": "Backups encontrados.", "backups": backups}
+
+@router.post("/", response_model=BackupWithMessageResponseSchema)
+@handle_service_exceptions
+async def create_new_backup():
+    """Take an online backup of the database (the API keeps working meanwhile)."""
+    backup = await run_read(create_backup)
+    return {"message": "Backup criado com sucesso.", "backup": backup}
+
+@router.get("/{name}", response_class=FileResponse)
+@handle_service_exceptions
+async def download_backup(name: str):
+    """Download a backup .zip."""
+    path = await run_read(get_backup_path, name)
+    return FileResponse(path, media_type="application/zip", filename=name)
+
+@router.post("/{name}/verify", response_model=BackupVerifyResponseSchema)
+@handle_service_exceptions
+async def verify_stored_backup(name: str):
+    """Check the integrity of a stored backup."""
+    is_intact = await run_read(verify_backup, name)
+    message = "Backup íntegro." if is_intact else "Backup corrompido."
+    return {"message": message, "name": name, "is_intact": is_intact}
+
+@router.post("/{name}/restore", response_model=BackupWithMessageResponseSchema)
+@handle_service_exceptions
+async def restore_stored_backup(name: str):
+    """Restore a backup. The current data is saved first, as the returned backup."""
+    safety_backup = await run_exclusive_write(restore_backup, name)
+    return {"message": "Backup restaurado. Os dados anteriores foram salvos no backup retornado.", "backup": safety_backup}
@@ -0,0 +1,36 @@
+import io
+from typing import Literal
+from fastapi import APIRouter, File, Query, UploadFile
+from app.executor import run_exclusive_write
+from app.services.bulk_service import import_records
+from app.utils.bulk_import import detect_format, iter_records
+from app.utils.exceptions import handle_service_exceptions
+from app.schemas.bulk import BulkImportResponseSchema
+
+router = APIRouter(prefix="/bulk", tags=["Bulk"])
+
+@router.post("/", response_model=BulkImportResponseSchema)
+@handle_service_exceptions
+async def bulk_import(
+    file: UploadFile = File(..., description="Arquivo CSV ou JSONL"),
+    format: Literal["csv", "jsonl"] | None = Query(default=None, description="Formato do arquivo. Se nulo, usa a extensão do arquivo"),
+    entity: Literal["client", "purchase", "payment"] | None = Query(default=None, description="Tipo dos registros sem a coluna `type`")
+):
+    """Import clients, purchases and payments in chunked transactions, returning a per-row report."""
+    format = detect_format(file.filename, format)
+
+    # the upload is spooled to disk and read line by line
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        report = await run_exclusive_write(import_records, iter_records(stream, format), default_type=entity)
+    finally:
+        stream.detach()
+
+    message = "Importação concluída." if not report.failed else "Importação concluída com erros."
+    return {
+        "message": message,
+        "imported": report.imported,
+        "failed": report.failed,
+        "errors": report.errors,
+        "errors_truncated": report.errors_truncated,
+    }
@@ -1,14 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from app.services.client_service import (
+    get_client_balances_page,
     get_client_by_id,
-    get_clients,
+    get_clients_by_ids,
+    get_clients_page,
     create_client,
     update_client,
+    activate_client,
     deactivate_client
 )
-from app.services.purchase_service import (get_purchases_by_client)
+from app.services.purchase_service import (allocate_client_payment, get_purchases_by_client_page)
+from app.services.export_service import EXPORT_MEDIA_TYPES
+from app.services.report_service import stream_client_statement
+from app.executor import iterate_read, run_read, run_write
+from app.utils.etag import conditional_get
 from app.utils.exceptions import handle_service_exceptions
+from app.utils.helpers import parse_ids
+from app.utils.pagination import decode_cursor
+from app.utils.serializers import json_list_response
 from app.schemas.client import (
+    ClientBalanceListResponseSchema,
+    ClientBalanceQuerySchema,
+    ClientBatchResponseSchema,
     ClientListResponseSchema,
     ClientListQuerySchema,
     ClientResponseSchema,
@@ -16,57 +30,105 @@ from app.schemas.client import (
     ClientCreateSchema,
     ClientUpdateSchema
 )
+from app.schemas.payment import ClientPaymentCreateSchema, ClientPaymentResponseSchema
 from app.schemas.purchase import PurchaseListResponseSchema
+from app.schemas.report import StatementQuerySchema, StatementResponseSchema
 
 router = APIRouter(prefix="/clients", tags=["Clients"])
 
-@router.get("/", response_model=ClientListResponseSchema)
+@router.get("/", response_model=ClientListResponseSchema | ClientBatchResponseSchema, dependencies=[conditional_get("clients")])
 @handle_service_exceptions
-def list_clients(params: ClientListQuerySchema = Depends()):
-    """List all clients."""
+async def list_clients(response: Response, params: ClientListQuerySchema = Depends()):
+    """List all clients, or the clients with the given ids (`ids`) keyed by id."""
+    if params.ids is not None:
+        clients = await run_read(get_clients_by_ids, parse_ids(params.ids))
+        not_found = [client_id for client_id, client in clients.items() if client is None]
+        return {"message": "Clientes encontrados.", "clients": clients, "not_found": not_found}
 
     limit = params.limit
     offset = params.offset
     only_active = params.only_active
- 
-    clients = get_clients(limit, offset, only_active)
-    return {"message": "Clientes encontrados.", "clients": clients}
+    after = decode_cursor(params.after)
 
-@router.get("/{client_id}", response_model=ClientResponseSchema)
+    page = await run_read(get_clients_page, limit, offset, only_active, after)
+    return json_list_response(response, "Clientes encontrados.", "clients", page)
+
+# declared before "/{client_id}", which would otherwise match "balances"
+@router.get("/balances", response_model=ClientBalanceListResponseSchema, dependencies=[conditional_get("clients", "purchases")])
 @handle_service_exceptions
-def read_client(client_id: int):
+async def list_client_balances(response: Response, params: ClientBalanceQuerySchema = Depends()):
+    """List how much each client owes, biggest debts first by default."""
+    # keyset of the sorted column: open_amount is REAL, last_activity a timestamp
+    sort_type = float if params.sort_by == "open_amount" else int
+    after = decode_cursor(params.after, sort_type, int)
+
+    page = await run_read(
+        get_client_balances_page, params.limit, params.offset, params.only_open, params.only_active,
+        params.sort_by, params.order == "desc", after
+    )
+    return json_list_response(response, "Saldos encontrados.", "balances", page)
+
+@router.get("/{client_id}", response_model=ClientResponseSchema, dependencies=[conditional_get("clients")])
+@handle_service_exceptions
+async def read_client(client_id: int):
     """Get client by ID."""
-    client = get_client_by_id(client_id)
+    client = await run_read(get_client_by_id, client_id)
     return client
 
 @router.post("/", response_model=ClientWithMessageResponseSchema)
 @handle_service_exceptions
-def add_client(data: ClientCreateSchema):
+async def add_client(data: ClientCreateSchema):
     """Add new client."""
-    client = create_client(data.model_dump())
+    client = await run_write(create_client, data.model_dump())
     return {"message": "Cliente criado com sucesso.", "client": client}
 
 @router.put("/{client_id}", response_model=ClientWithMessageResponseSchema)
 @handle_service_exceptions
-def edit_client(client_id: int, data: ClientUpdateSchema):
+async def edit_client(client_id: int, data: ClientUpdateSchema):
     """Update client data."""
-    client = update_client(client_id, data.model_dump(exclude_none=True))
+    client = await run_write(update_client, client_id, data.model_dump(exclude_none=True))
     return {"message": "Cliente atualizado.", "client": client}
 
+@router.put("/{client_id}/restore", response_model=ClientWithMessageResponseSchema)
+@handle_service_exceptions
+async def restore_client(client_id: int):
+    """Activate client, with the purchases and payments deactivated together with it. Totals are recalculated."""
+    client = await run_write(activate_client, client_id)
+    return {"message": "Cliente restaurado.", "client": client}
+
 @router.delete("/{client_id}", response_model=ClientWithMessageResponseSchema, response_model_exclude_none=True)
 @handle_service_exceptions
-def remove_client(client_id: int):
+async def remove_client(client_id: int):
     """Delete a client (soft delete)."""
-    success = deactivate_client(client_id)
+    success = await run_write(deactivate_client, client_id)
     if not success:
         raise HTTPException(status_code=404, detail="Cliente não encontrado ou já desativado.")
     return {"message": "Cliente removido com sucesso.", "client": None}
 
 # Purchase related routes
-@router.get("/{client_id}/purchases", response_model=PurchaseListResponseSchema)
+@router.get("/{client_id}/purchases", response_model=PurchaseListResponseSchema, dependencies=[conditional_get("purchases")])
 @handle_service_exceptions
-def list_purchases_for_client(client_id: int, only_active: bool = True):
+async def list_purchases_for_client(response: Response, client_id: int, only_active: bool = True):
     """List all purchases for a specific client."""
-    purchases = get_purchases_by_client(client_id, only_active)
+    page = await run_read(get_purchases_by_client_page, client_id, only_active)
+    return json_list_response(response, "Compras encontradas.", "purchases", page)
+
+@router.post("/{client_id}/payments", response_model=ClientPaymentResponseSchema)
+@handle_service_exceptions
+async def add_client_payment(client_id: int, data: ClientPaymentCreateSchema):
+    """Split one payment across the client's open purchases (oldest first or by `allocations`), in one transaction."""
+    payments, purchases = await run_write(allocate_client_payment, client_id, data.model_dump())
+    return {"message": "Pagamento distribuído entre as compras.", "payments": payments, "purchases": purchases}
 
-    return {"message": "Compras encontradas.", "purchases": purchases}
\ No newline at end of file
+@router.get("/{client_id}/statement", response_model=StatementResponseSchema, response_class=StreamingResponse)
+@handle_service_exceptions
+async def read_client_statement(client_id: int, params: StatementQuerySchema = Depends()):
+    """Client statement: notes and payments interleaved by date with the running balance, streamed."""
+    content = await run_read(stream_client_statement, client_id, params.start, params.end, params.format)
+    if params.format == "json":
+        return StreamingResponse(iterate_read(content), media_type="application/json")
+    return StreamingResponse(
+        iterate_read(content),
+        media_type=EXPORT_MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="statement-{client_id}.{params.format}"'}
+    )
\ No newline at end of file
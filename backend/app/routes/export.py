@@ -0,0 +1,24 @@
+from typing import Literal
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+from app.executor import iterate_read, run_read
+from app.services.export_service import export_rows, EXPORT_MEDIA_TYPES
+from app.utils.exceptions import handle_service_exceptions
+
+router = APIRouter(prefix="/export", tags=["Export"])
+
+@router.get("/{entity}", response_class=StreamingResponse)
+@handle_service_exceptions
+async def export_entity(
+    entity: Literal["clients", "purchases", "payments"],
+    format: Literal["csv", "ndjson"] = Query(default="csv", description="Formato do arquivo exportado"),
+    only_active: bool | None = Query(default=None, description="Filtrar por registros ativos (true) ou desativados (false). Se nulo, exporta todos")
+):
+    """Stream every client, purchase or payment as CSV or NDJSON, in constant memory."""
+    content = await run_read(export_rows, entity, format, only_active)
+    extension = "csv" if format == "csv" else "ndjson"
+    return StreamingResponse(
+        iterate_read(content),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{entity}.{extension}"'}
+    )
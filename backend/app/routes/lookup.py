@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from app.executor import run_read
+from app.services.search_service import lookup
+from app.utils.exceptions import handle_service_exceptions
+from app.schemas.search import LookupRequestSchema, LookupResponseSchema
+
+router = APIRouter(prefix="/lookup", tags=["Search"])
+
+@router.post("/", response_model=LookupResponseSchema)
+@handle_service_exceptions
+async def lookup_numbers(data: LookupRequestSchema):
+    """Purchases and payments by note/receipt number, mixed, in one call."""
+    results = await run_read(lookup, data.numbers)
+    not_found = [number for number, entry in results.items() if entry is None]
+    return {"message": "Resultados encontrados.", "results": results, "not_found": not_found}
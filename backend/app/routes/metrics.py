@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.services.metrics_service import render_metrics
+
+router = APIRouter(tags=["System"])
+
+# version of the Prometheus text exposition format
+METRICS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """API and database metrics in the Prometheus text format."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_MEDIA_TYPE)
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from app.services.purchase_service import (
-    get_payments_for_purchase,
+    get_payments_for_purchase_by_ids,
+    get_payments_for_purchase_page,
     get_payment_by_id,
     create_payment,
     activate_payment,
     update_payment,
     deactivate_payment
 )
+from app.services.print_service import render_payment_receipt
+from app.executor import run_read, run_write
+from app.utils.etag import conditional_get
 from app.utils.exceptions import handle_service_exceptions
+from app.utils.helpers import parse_ids
+from app.utils.pagination import decode_cursor
+from app.utils.serializers import json_list_response
 from app.schemas.payment import (
+    PaymentBatchResponseSchema,
     PaymentListResponseSchema,
     PaymentListQuerySchema,
     PaymentWithMessageResponseSchema,
@@ -18,40 +26,53 @@ from app.schemas.payment import (
 
 router = APIRouter(prefix="/{purchase_id}/payments", tags=["Payments"])
 
-@router.get("/", response_model=PaymentListResponseSchema)
+@router.get("/", response_model=PaymentListResponseSchema | PaymentBatchResponseSchema, dependencies=[conditional_get("purchases", "payments")])
 @handle_service_exceptions
-def list_payments_for_purchase(purchase_id: int, params: PaymentListQuerySchema = Depends()):
-    """List all payments for a specific purchase."""
+async def list_payments_for_purchase(response: Response, purchase_id: int, params: PaymentListQuerySchema = Depends()):
+    """List all payments for a specific purchase, or the payments with the given ids (`ids`) keyed by id."""
+    if params.ids is not None:
+        payments = await run_read(get_payments_for_purchase_by_ids, purchase_id, parse_ids(params.ids))
+        not_found = [payment_id for payment_id, payment in payments.items() if payment is None]
+        return {"message": "Pagamentos encontrados.", "payments": payments, "not_found": not_found}
+
     limit = params.limit
     offset = params.offset
+    after = decode_cursor(params.after)
+
+    page = await run_read(get_payments_for_purchase_page, purchase_id, limit, offset, after)
+    return json_list_response(response, "Pagamentos encontrados.", "payments", page)
 
-    payments = get_payments_for_purchase(purchase_id, limit, offset)
-    return {"message": "Pagamentos encontrados.", "payments": payments}
+@router.get("/{payment_id}/receipt", response_class=Response)
+@handle_service_exceptions
+async def print_payment_receipt(purchase_id: int, payment_id: int):
+    """Receipt of a payment as PDF."""
+    pdf = await run_read(render_payment_receipt, purchase_id, payment_id)
+    return Response(pdf, media_type="application/pdf", headers={"Content-Disposition": f'inline; filename="recibo-{payment_id}.pdf"'})
 
 @router.post("/", response_model=PaymentWithMessageResponseSchema)
 @handle_service_exceptions
-def add_payment(purchase_id: int, data: PaymentCreateSchema):
+async def add_payment(purchase_id: int, data: PaymentCreateSchema):
     """Create a new payment for a specific purchase."""
-    payment = create_payment(purchase_id, data.model_dump())
+    payment = await run_write(create_payment, purchase_id, data.model_dump())
     return {"message": "Pagamento criado com sucesso.", "payment": payment}
 
 @router.put("/{payment_id}", response_model=PaymentWithMessageResponseSchema)
 @handle_service_exceptions
-def edit_payment(purchase_id: int, payment_id: int, data: PaymentUpdateSchema):
+async def edit_payment(purchase_id: int, payment_id: int, data: PaymentUpdateSchema):
     """Edit allowed fields of a payment (amount, method, description, payment_date)."""
-    updated = update_payment(purchase_id, payment_id, data.model_dump(exclude_none=True))
+    updated = await run_write(update_payment, purchase_id, payment_id, data.model_dump(exclude_none=True))
     return {"message": "Pagamento atualizado com sucesso.", "payment": updated}
 
 @router.put("/{payment_id}/restore", response_model=PaymentWithMessageResponseSchema)
 @handle_service_exceptions
-def restore_payment(purchase_id: int, payment_id: int):
+async def restore_payment(purchase_id: int, payment_id: int):
     """Activate payment changing is_active field if related purchase is active. Purchase totals are recalculated."""
-    payment = activate_payment(purchase_id, payment_id)
+    payment = await run_write(activate_payment, purchase_id, payment_id)
     return {"message": "Pagamento restaurado.", "payment": payment}
 
 @router.delete("/{payment_id}", response_model=PaymentWithMessageResponseSchema)
 @handle_service_exceptions
-def remove_payment(purchase_id: int, payment_id: int):
+async def remove_payment(purchase_id: int, payment_id: int):
     """Deactivate (soft delete) a payment and update related purchase totals."""
-    payment = deactivate_payment(purchase_id, payment_id)
+    payment = await run_write(deactivate_payment, purchase_id, payment_id)
     return {"message": "Pagamento desativado com sucesso.", "payment": payment}
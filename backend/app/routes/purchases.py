@@ -1,16 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from app.services.purchase_service import (
     get_purchase_by_id,
     get_purchase_by_note_number,
-    get_purchases,
+    get_purchases_by_ids,
+    get_purchases_page,
     create_purchase,
     update_purchase,
     activate_purchase,
     deactivate_purchase
 )
+from app.services.print_service import get_month_notes, parse_month, render_purchase_note
 from app.routes.payments import router as payment_router
+from app.executor import run_read, run_write
+from app.utils.etag import conditional_get
 from app.utils.exceptions import handle_service_exceptions
+from app.utils.helpers import parse_ids
+from app.utils.pagination import decode_cursor
+from app.utils.printer import render_notes_batch
+from app.utils.serializers import json_list_response
 from app.schemas.purchase import (
+    PurchaseBatchResponseSchema,
     PurchaseListResponseSchema,
     PurchaseListQuerySchema,
     PurchaseResponseSchema,
@@ -21,62 +30,85 @@ from app.schemas.purchase import (
 
 router = APIRouter(prefix="/purchases", tags=["Purchases"])
 
-@router.get("/", response_model=PurchaseListResponseSchema)
+@router.get("/", response_model=PurchaseListResponseSchema | PurchaseBatchResponseSchema, dependencies=[conditional_get("purchases")])
 @handle_service_exceptions
-def list_purchases(params: PurchaseListQuerySchema = Depends()):
-    """List all purchases."""
+async def list_purchases(response: Response, params: PurchaseListQuerySchema = Depends()):
+    """List all purchases, or the purchases with the given ids (`ids`) keyed by id."""
+    if params.ids is not None:
+        purchases = await run_read(get_purchases_by_ids, parse_ids(params.ids))
+        not_found = [purchase_id for purchase_id, purchase in purchases.items() if purchase is None]
+        return {"message": "Compras encontradas.", "purchases": purchases, "not_found": not_found}
+
     limit = params.limit
     offset = params.offset
     only_pending = params.only_pending
+    after = decode_cursor(params.after)
+
+    page = await run_read(get_purchases_page, limit, offset, only_pending, after)
+    return json_list_response(response, "Compras encontradas.", "purchases", page)
 
-    purchases = get_purchases(limit, offset, only_pending)
-    return {"message": "Compras encontradas.", "purchases": purchases}
+# declared before "/{purchase_id}/pdf", which would otherwise match "notes"
+@router.get("/notes/pdf", response_class=Response)
+@handle_service_exceptions
+async def print_month_notes(month: str = Query(..., description="Mês das notas (AAAA-MM)")):
+    """Every note of a month in one PDF, rendered on the print process pool."""
+    year, month_number = parse_month(month)
+    notes = await run_read(get_month_notes, year, month_number)
+    pdf = await render_notes_batch(notes, f"Notas {month}")
+    return Response(pdf, media_type="application/pdf", headers={"Content-Disposition": f'inline; filename="notas-{month}.pdf"'})
 
-@router.get("/{purchase_id}", response_model=PurchaseResponseSchema)
+@router.get("/{purchase_id}", response_model=PurchaseResponseSchema, dependencies=[conditional_get("purchases")])
 @handle_service_exceptions
-def read_purchase(purchase_id: int):
+async def read_purchase(purchase_id: int):
     """Get purchase by ID."""
-    purchase = get_purchase_by_id(purchase_id)
+    purchase = await run_read(get_purchase_by_id, purchase_id)
     return purchase
 
-@router.get("/by-note/{note_number}", response_model=PurchaseResponseSchema)
+@router.get("/by-note/{note_number}", response_model=PurchaseResponseSchema, dependencies=[conditional_get("purchases")])
 @handle_service_exceptions
-def read_purchase_by_note(note_number: str):
+async def read_purchase_by_note(note_number: str):
     """Get purchase by note_number."""
-    purchase = get_purchase_by_note_number(note_number)
+    purchase = await run_read(get_purchase_by_note_number, note_number)
     return purchase
 
+@router.get("/{purchase_id}/pdf", response_class=Response)
+@handle_service_exceptions
+async def print_purchase_note(purchase_id: int):
+    """Note of a purchase as PDF."""
+    pdf = await run_read(render_purchase_note, purchase_id)
+    return Response(pdf, media_type="application/pdf", headers={"Content-Disposition": f'inline; filename="nota-{purchase_id}.pdf"'})
+
 @router.post("/{client_id}", response_model=PurchaseWithMessageResponseSchema)
 @handle_service_exceptions
-def add_purchase(client_id: int, data: PurchaseCreateSchema):
+async def add_purchase(client_id: int, data: PurchaseCreateSchema):
     """Add new purchase."""
     data: dict = data.model_dump()
 
     if not client_id or client_id < 1:
         raise HTTPException(status_code=400, detail="Não é possível criar uma compra sem um cliente associado (client_id).")
 
-    purchase = create_purchase(client_id, data)
+    purchase = await run_write(create_purchase, client_id, data)
     return {"message": "Compra criada com sucesso.", "purchase": purchase}
 
 @router.put("/{purchase_id}", response_model=PurchaseWithMessageResponseSchema)
 @handle_service_exceptions
-def edit_purchase(purchase_id: int, data: PurchaseUpdateSchema):
+async def edit_purchase(purchase_id: int, data: PurchaseUpdateSchema):
     """Update purchase."""
-    purchase = update_purchase(purchase_id, data.model_dump(exclude_none=True))
+    purchase = await run_write(update_purchase, purchase_id, data.model_dump(exclude_none=True))
     return {"message": "Compra atualizada.", "purchase": purchase}
 
 @router.put("/{purchase_id}/restore", response_model=PurchaseWithMessageResponseSchema)
 @handle_service_exceptions
-def restore_purchase(purchase_id: int):
+async def restore_purchase(purchase_id: int):
     """Activate purchase changing is_active field. Related payments remain unchanged, but totals are recalculated."""
-    purchase = activate_purchase(purchase_id)
+    purchase = await run_write(activate_purchase, purchase_id)
     return {"message": "Compra restaurada.", "purchase": purchase}
 
 @router.delete("/{purchase_id}", response_model=PurchaseWithMessageResponseSchema)
 @handle_service_exceptions
-def remove_purchase(purchase_id: int):
+async def remove_purchase(purchase_id: int):
     """Delete purchase (soft delete)."""
-    purchase = deactivate_purchase(purchase_id)
+    purchase = await run_write(deactivate_purchase, purchase_id)
     return {"message": "Compra desativada com sucesso.", "purchase": purchase}
 
 # Include payment related routes
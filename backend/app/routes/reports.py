@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from app.executor import iterate_read, run_read
+from app.services.export_service import EXPORT_MEDIA_TYPES
+from app.services.report_service import aging_etag_key, get_aging_report, stream_client_aging
+from app.utils.etag import conditional_get
+from app.utils.exceptions import handle_service_exceptions
+from app.schemas.report import (
+    AgingQuerySchema,
+    AgingReportResponseSchema,
+    AgingStreamQuerySchema
+)
+
+router = APIRouter(prefix="/reports", tags=["Reports"])
+
+def _aging_report_date(request: Request) -> str:
+    return aging_etag_key(request.query_params.get("as_of"))
+
+@router.get("/aging", response_model=AgingReportResponseSchema, dependencies=[conditional_get("clients", "purchases", "payments", key=_aging_report_date)])
+@handle_service_exceptions
+async def read_aging_report(params: AgingQuerySchema = Depends()):
+    """Open amounts per client and overall, bucketed by purchase age (0-30, 31-60, 61-90, 90+ days)."""
+    report = await run_read(get_aging_report, params.as_of)
+    return {"message": "Relatório de vencimentos gerado.", "as_of": report.as_of, "totals": report.totals, "clients": report.clients}
+
+@router.get("/aging/clients", response_class=StreamingResponse)
+@handle_service_exceptions
+async def stream_aging_report(params: AgingStreamQuerySchema = Depends()):
+    """Stream the per-client aging as CSV or NDJSON."""
+    content = await run_read(stream_client_aging, params.as_of, params.format)
+    return StreamingResponse(
+        iterate_read(content),
+        media_type=EXPORT_MEDIA_TYPES[params.format],
+        headers={"Content-Disposition": f'attachment; filename="aging.{params.format}"'}
+    )
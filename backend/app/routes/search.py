@@ -0,0 +1,19 @@
+from typing import List, Literal
+from fastapi import APIRouter, Depends, Query
+from app.executor import run_read
+from app.services.search_service import search
+from app.utils.etag import conditional_get
+from app.utils.exceptions import handle_service_exceptions
+from app.schemas.search import SearchQuerySchema, SearchResponseSchema
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("/", response_model=SearchResponseSchema, dependencies=[conditional_get("clients", "purchases", "payments")])
+@handle_service_exceptions
+async def search_all(
+    params: SearchQuerySchema = Depends(),
+    types: List[Literal["client", "purchase", "payment"]] | None = Query(default=None, description="Filtrar por tipo de registro")
+):
+    """Full-text search over clients, purchases and payments, ordered by relevance."""
+    results = await run_read(search, params.q, types, params.limit, params.offset, params.only_active)
+    return {"message": "Resultados encontrados.", "results": results}
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from app.cache import entity_cache
+from app.schemas.system import CacheStatsResponseSchema
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+@router.get("/cache", response_model=CacheStatsResponseSchema)
+async def read_cache_stats():
+    """Hit, miss, eviction and invalidation counters of the entity cache."""
+    return {"message": "Estatísticas do cache.", "cache": entity_cache.stats()}
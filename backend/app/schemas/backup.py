@@ -0,0 +1,24 @@
+from typing import List
+from datetime import datetime
+from pydantic import BaseModel
+
+# ===== RESPONSE =====
+class BackupResponseSchema(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+    model_config = dict(from_attributes = True)
+
+class BackupWithMessageResponseSchema(BaseModel):
+    message: str
+    backup: BackupResponseSchema
+
+class BackupListResponseSchema(BaseModel):
+    message: str
+    backups: List[BackupResponseSchema]
+
+class BackupVerifyResponseSchema(BaseModel):
+    message: str
+    name: str
+    is_intact: bool
@@ -0,0 +1,45 @@
+from typing import Dict, List
+from pydantic import BaseModel, Field, field_validator
+from app.schemas.client import ClientCreateSchema
+from app.schemas.purchase import PurchaseCreateSchema
+from app.schemas.payment import PaymentCreateSchema
+
+# ===== IMPORT ROWS =====
+# Same rules as the single-entity routes, plus how each row references its parent
+class BulkRowMixin(BaseModel):
+    # keep the original date when migrating an existing ledger
+    created_at: int | None = Field(None, example=1700000000, description="Timestamp de criação original")
+
+class BulkClientSchema(BulkRowMixin, ClientCreateSchema):
+    pass
+
+class BulkPurchaseSchema(BulkRowMixin, PurchaseCreateSchema):
+    client_id: int | None = Field(None, ge=1, example=1)
+    client_nickname: str | None = Field(None, example="joao", description="Alternativa ao client_id")
+
+    @field_validator("client_nickname", mode="after")
+    def validate_client_nickname(cls, v):
+        # same normalization applied to nicknames on creation
+        return " ".join(v.split()).casefold() if v else None
+
+class BulkPaymentSchema(BulkRowMixin, PaymentCreateSchema):
+    purchase_id: int | None = Field(None, ge=1, example=1)
+    note_number: str | None = Field(None, example="NF-0001", description="Alternativa ao purchase_id")
+
+    model_config = dict(extra="ignore")
+
+
+# ===== RESPONSE =====
+class BulkRowErrorSchema(BaseModel):
+    line: int
+    type: str | None
+    error: str
+
+class BulkImportResponseSchema(BaseModel):
+    message: str
+    imported: Dict[str, int]
+    failed: int
+    errors: List[BulkRowErrorSchema]
+    errors_truncated: bool = False
+
+    model_config = dict(from_attributes = True)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Literal
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
 from app.schemas.mixins import NameValidatorMixin, NicknameValidatorMixin, PhoneValidatorMixin
@@ -46,10 +46,43 @@ class ClientWithMessageResponseSchema(BaseModel):
 class ClientListResponseSchema(BaseModel):
     message: str
     clients: List[ClientResponseSchema]
+    next_cursor: str | None = Field(None, description="Cursor para a próxima página (parâmetro `after`). Nulo na última página.")
+
+class ClientBatchResponseSchema(BaseModel):
+    message: str
+    clients: Dict[int, ClientResponseSchema | None] = Field(..., description="Clientes por id. Nulo quando o id não existe.")
+    not_found: List[int]
+
+class ClientBalanceResponseSchema(BaseModel):
+    client_id: int
+    name: str
+    nickname: str | None
+    is_active: int
+    open_amount: float
+    open_purchases: int
+    last_activity: datetime | None
+
+    model_config = dict(from_attributes = True)
+
+class ClientBalanceListResponseSchema(BaseModel):
+    message: str
+    balances: List[ClientBalanceResponseSchema]
+    next_cursor: str | None = Field(None, description="Cursor para a próxima página (parâmetro `after`). Nulo na última página.")
 
 
 # ===== LISTING =====
 class ClientListQuerySchema(BaseModel):
     limit: int | None = Field(default=None, ge=1, description="Número máximo de clientes na listagem")
     offset: int = Field(default=0, ge=0, description="Número de clientes para ignorar antes da listagem")
+    after: str | None = Field(default=None, description="Cursor (`next_cursor`) da página anterior. Lista os clientes seguintes sem percorrer os já listados")
+    only_active: bool = Field(default=True, description="Filtrar somente clientes ativos")
+    ids: str | None = Field(default=None, description="Busca em lote: ids separados por vírgula (ex.: 1,2,3). Retorna os clientes por id e ignora os demais parâmetros")
+
+class ClientBalanceQuerySchema(BaseModel):
+    limit: int | None = Field(default=None, ge=1, description="Número máximo de clientes na listagem")
+    offset: int = Field(default=0, ge=0, description="Número de clientes para ignorar antes da listagem")
+    after: str | None = Field(default=None, description="Cursor (`next_cursor`) da página anterior")
+    sort_by: Literal["open_amount", "last_activity"] = Field(default="open_amount", description="Ordenar pelo valor em aberto ou pela última movimentação")
+    order: Literal["desc", "asc"] = Field(default="desc", description="Ordem decrescente (maiores dívidas primeiro) ou crescente")
+    only_open: bool = Field(default=True, description="Somente clientes com compras em aberto")
     only_active: bool = Field(default=True, description="Filtrar somente clientes ativos")
@@ -1,7 +1,8 @@
-from typing import List
+from typing import Dict, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 from app.utils.exceptions import (ValidationError, error_messages)
+from app.schemas.purchase import PurchaseResponseSchema
 
 # ===== Base =====
 class PaymentBase(BaseModel):
@@ -18,6 +19,19 @@ class PaymentCreateSchema(PaymentBase):
     receipt_number: str | None = Field(None, example="REC-0003")
 
 
+class PaymentAllocationSchema(BaseModel):
+    purchase_id: int = Field(..., example=12)
+    amount: float = Field(..., example=40.00)
+    receipt_number: str | None = Field(None, example="REC-0004")
+
+class ClientPaymentCreateSchema(PaymentBase):
+    amount: float = Field(..., example=100.00)
+    method: str = Field(..., example="pix")
+    allocations: List[PaymentAllocationSchema] | None = Field(
+        None, description="Quanto vai para cada compra em aberto; a soma deve ser igual a `amount`. Se nulo, quita as compras mais antigas primeiro"
+    )
+
+
 # ===== UPDATE =====
 class PaymentUpdateSchema(PaymentBase):
    pass
@@ -42,12 +56,25 @@ class PaymentWithMessageResponseSchema(BaseModel):
     message: str
     payment: PaymentResponseSchema
 
+class ClientPaymentResponseSchema(BaseModel):
+    message: str
+    payments: List[PaymentResponseSchema]
+    purchases: List[PurchaseResponseSchema] = Field(..., description="Compras que receberam o pagamento, com os totais atualizados")
+
 class PaymentListResponseSchema(BaseModel):
     message: str
     payments: List[PaymentResponseSchema]
+    next_cursor: str | None = Field(None, description="Cursor para a próxima página (parâmetro `after`). Nulo na última página.")
+
+class PaymentBatchResponseSchema(BaseModel):
+    message: str
+    payments: Dict[int, PaymentResponseSchema | None] = Field(..., description="Pagamentos por id. Nulo quando o id não existe (ou é de outra compra).")
+    not_found: List[int]
 
 
 # ===== LISTING =====
 class PaymentListQuerySchema(BaseModel):
     limit: int | None = Field(default=None, ge=1, description="Número máximo de pagamentos na listagem")
-    offset: int = Field(default=0, ge=0, description="Número de pagamentos para ignorar antes da listagem")
\ No newline at end of file
+    offset: int = Field(default=0, ge=0, description="Número de pagamentos para ignorar antes da listagem")
+    after: str | None = Field(default=None, description="Cursor (`next_cursor`) da página anterior. Lista os pagamentos seguintes sem percorrer os já listados")
+    ids: str | None = Field(default=None, description="Busca em lote: ids separados por vírgula (ex.: 1,2,3). Retorna os pagamentos por id e ignora os demais parâmetros")
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -67,10 +67,18 @@ class PurchaseWithMessageResponseSchema(BaseModel):
 class PurchaseListResponseSchema(BaseModel):
     message: str
     purchases: List[PurchaseResponseSchema]
+    next_cursor: str | None = Field(None, description="Cursor para a próxima página (parâmetro `after`). Nulo na última página.")
+
+class PurchaseBatchResponseSchema(BaseModel):
+    message: str
+    purchases: Dict[int, PurchaseResponseSchema | None] = Field(..., description="Compras por id. Nulo quando o id não existe.")
+    not_found: List[int]
 
 
 # ===== LISTING =====
 class PurchaseListQuerySchema(BaseModel):
     limit: int | None = Field(default=None, ge=1, description="Número máximo de compras na listagem")
     offset: int = Field(default=0, ge=0, description="Número de compras para ignorar antes da listagem")
-    only_pending: bool | None = Field(default=None, description="Filtrar somente compras ativas não quitadas. Se nulo, busca compras já desativadas.")
\ No newline at end of file
+    after: str | None = Field(default=None, description="Cursor (`next_cursor`) da página anterior. Lista as compras seguintes sem percorrer as já listadas")
+    only_pending: bool | None = Field(default=None, description="Filtrar somente compras ativas não quitadas. Se nulo, busca compras já desativadas.")
+    ids: str | None = Field(default=None, description="Busca em lote: ids separados por vírgula (ex.: 1,2,3). Retorna as compras por id e ignora os demais parâmetros")
\ No newline at end of file
@@ -0,0 +1,70 @@
+from datetime import date, datetime
+from typing import List, Literal
+from pydantic import BaseModel, Field
+
+# ===== RESPONSE =====
+class ClientAgingSchema(BaseModel):
+    client_id: int
+    name: str
+    nickname: str | None
+    open_purchases: int
+    days_0_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total: float
+
+    model_config = dict(from_attributes = True)
+
+class AgingTotalsSchema(BaseModel):
+    clients: int
+    open_purchases: int
+    days_0_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total: float
+
+    model_config = dict(from_attributes = True)
+
+class AgingReportResponseSchema(BaseModel):
+    message: str
+    as_of: date
+    totals: AgingTotalsSchema
+    clients: List[ClientAgingSchema]
+
+class StatementClientSchema(BaseModel):
+    id: int
+    name: str
+    nickname: str | None
+
+class StatementEntrySchema(BaseModel):
+    date: datetime | None = Field(description="Data da nota ou do pagamento; na linha 'opening', o início do período")
+    type: Literal["opening", "purchase", "payment"]
+    id: int | None
+    purchase_id: int | None
+    number: str | None = Field(description="Número da nota ou do recibo")
+    description: str | None
+    amount: float | None = Field(description="Valor da nota, ou do pagamento com sinal negativo")
+    balance: float = Field(description="Saldo após o lançamento")
+
+class StatementResponseSchema(BaseModel):
+    message: str
+    client: StatementClientSchema
+    start: datetime | None
+    end: datetime | None
+    entries: List[StatementEntrySchema]
+    closing_balance: float
+
+
+# ===== QUERY =====
+class AgingQuerySchema(BaseModel):
+    as_of: int | None = Field(default=None, description="Data de referência (timestamp). Se nulo, usa a data atual")
+
+class AgingStreamQuerySchema(AgingQuerySchema):
+    format: Literal["csv", "ndjson"] = Field(default="csv", description="Formato do arquivo gerado")
+
+class StatementQuerySchema(BaseModel):
+    start: int | None = Field(default=None, description="Início do período (timestamp, inclusivo). Se nulo, desde o primeiro lançamento")
+    end: int | None = Field(default=None, description="Fim do período (timestamp, exclusivo). Se nulo, até o último lançamento")
+    format: Literal["json", "csv", "ndjson"] = Field(default="json", description="Formato da resposta")
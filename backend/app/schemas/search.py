@@ -0,0 +1,42 @@
+from typing import Dict, List, Literal
+from pydantic import BaseModel, Field
+from app.schemas.payment import PaymentResponseSchema
+from app.schemas.purchase import PurchaseResponseSchema
+
+# ===== RESPONSE =====
+class SearchResultSchema(BaseModel):
+    type: Literal["client", "purchase", "payment"]
+    id: int
+    title: str | None
+    subtitle: str | None
+    parent_id: int | None
+    is_active: int
+    rank: float = Field(..., description="Relevância de -1 a 0 (menor é mais relevante), dentro do tipo e ponderada pelo peso do tipo")
+
+    model_config = dict(from_attributes = True)
+
+class SearchResponseSchema(BaseModel):
+    message: str
+    results: List[SearchResultSchema]
+
+class LookupEntrySchema(BaseModel):
+    purchase: PurchaseResponseSchema | None = Field(None, description="Compra com esse número de nota")
+    payment: PaymentResponseSchema | None = Field(None, description="Pagamento com esse número de recibo")
+
+class LookupResponseSchema(BaseModel):
+    message: str
+    results: Dict[str, LookupEntrySchema | None] = Field(..., description="Registros por número. Nulo quando nenhum registro tem o número.")
+    not_found: List[str]
+
+
+# ===== QUERY =====
+class SearchQuerySchema(BaseModel):
+    q: str = Field(..., min_length=1, max_length=100, description="Texto buscado (nome, apelido, descrição, nota ou recibo)")
+    limit: int = Field(default=20, ge=1, le=100, description="Número máximo de resultados")
+    offset: int = Field(default=0, ge=0, description="Número de resultados para ignorar antes da listagem")
+    only_active: bool = Field(default=True, description="Buscar somente registros ativos")
+
+
+# ===== LOOKUP =====
+class LookupRequestSchema(BaseModel):
+    numbers: List[str] = Field(..., min_length=1, example=["NF-0001", "REC-0001-0002"], description="Números de nota e/ou de recibo, misturados")
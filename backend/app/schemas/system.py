@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+# ===== RESPONSE =====
+class CacheStatsSchema(BaseModel):
+    entries: int
+    max_entries: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
+
+class CacheStatsResponseSchema(BaseModel):
+    message: str
+    cache: CacheStatsSchema
@@ -0,0 +1,261 @@
+"""
+Bulk import of clients, purchases and payments.
+
+Records are consumed lazily and processed in chunks: every chunk is validated
+with the same schemas as the single-entity routes and written with
+`executemany` inside one transaction. Purchases are inserted as pending/0.0 and
+the totals of the ones that received payments are recomputed, with a single
+aggregate UPDATE, before their chunk commits.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple
+from pydantic import BaseModel, ValidationError as PydanticValidationError
+from config import BULK_CHUNK_SIZE, BULK_MAX_ERRORS
+from app.database import transaction
+from app.repositories import bulk_repository, purchase_repository
+from app.schemas.bulk import BulkClientSchema, BulkPurchaseSchema, BulkPaymentSchema
+from app.utils.exceptions import ValidationError, error_messages
+
+# (line number, parsed record) - or the parse error of that line
+Record = Tuple[int, dict | Exception]
+
+BULK_SCHEMAS: Dict[str, type[BaseModel]] = {
+    "client": BulkClientSchema,
+    "purchase": BulkPurchaseSchema,
+    "payment": BulkPaymentSchema,
+}
+
+BULK_TYPE_ALIASES = {
+    "clients": "client",
+    "purchases": "purchase",
+    "payments": "payment",
+}
+
+@dataclass
+class BulkReport:
+    imported: Dict[str, int] = field(default_factory=lambda: {name: 0 for name in BULK_SCHEMAS})
+    failed: int = 0
+    errors: List[dict] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def add_error(self, line: int, type: str | None, error: str):
+        self.failed += 1
+        if len(self.errors) < BULK_MAX_ERRORS:
+            self.errors.append({"line": line, "type": type, "error": error})
+        else:
+            self.errors_truncated = True
+
+def normalize_type(value: str | None) -> str | None:
+    if value is None:
+        return None
+
+    value = value.strip().lower()
+    value = BULK_TYPE_ALIASES.get(value, value)
+    return value if value in BULK_SCHEMAS else None
+
+def import_records(records: Iterable[Record], default_type: str | None = None,
+                   chunk_size: int = BULK_CHUNK_SIZE) -> BulkReport:
+    """
+    Import `records` chunk by chunk and return the per-row report.
+
+    Each record may carry its own `type` (client, purchase or payment); rows
+    without one use `default_type`. Purchases and payments reference their
+    parent by id or by its natural key (client_nickname / note_number), which
+    must already exist or appear earlier in the input.
+    """
+    if default_type is not None and normalize_type(default_type) is None:
+        raise ValidationError(error_messages.BULK_INVALID_TYPE)
+
+    default_type = normalize_type(default_type)
+    report = BulkReport()
+
+    for chunk in _chunked(records, chunk_size):
+        rows = _validate_chunk(chunk, default_type, report)
+        if not any(rows.values()):
+            continue
+
+        # each chunk commits on its own, so a failure only loses the current chunk
+        with transaction():
+            _import_clients(rows["client"], report)
+            paid_purchases = _import_purchases(rows["purchase"], report)
+            paid_purchases |= _import_payments(rows["payment"], report)
+
+            # derive paid value and status of the purchases paid in this chunk, committed with their payments
+            purchase_repository.repair_purchase_totals(sorted(paid_purchases))
+
+    report.errors.sort(key=lambda error: error["line"])
+    return report
+
+def _chunked(records: Iterable[Record], size: int) -> Iterator[List[Record]]:
+    iterator = iter(records)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+def _format_validation_error(e: PydanticValidationError) -> str:
+    messages = []
+    for error in e.errors():
+        location = ".".join(str(part) for part in error["loc"])
+        # custom validators already carry a user facing message
+        message = str(error["ctx"]["error"]) if error["type"] == "value_error" else error["msg"]
+        messages.append(f"{location}: {message}" if location else message)
+
+    return "; ".join(messages)
+
+def _validate_chunk(chunk: List[Record], default_type: str | None,
+                    report: BulkReport) -> Dict[str, List[Tuple[int, BaseModel]]]:
+    rows: Dict[str, List[Tuple[int, BaseModel]]] = {name: [] for name in BULK_SCHEMAS}
+
+    for line, record in chunk:
+        if isinstance(record, Exception) or not isinstance(record, dict):
+            report.add_error(line, None, error_messages.BULK_INVALID_ROW)
+            continue
+
+        # CSV has no nulls: empty cells mean "not informed"
+        data = {key: value for key, value in record.items() if key and value not in ("", None)}
+
+        raw_type = data.pop("type", None)
+        record_type = normalize_type(raw_type) if raw_type is not None else default_type
+        if record_type is None:
+            report.add_error(line, raw_type, error_messages.BULK_INVALID_TYPE)
+            continue
+
+        try:
+            row = BULK_SCHEMAS[record_type].model_validate(data)
+        except PydanticValidationError as e:
+            report.add_error(line, record_type, _format_validation_error(e))
+            continue
+
+        error = _check_business_rules(record_type, row)
+        if error:
+            report.add_error(line, record_type, error)
+            continue
+
+        rows[record_type].append((line, row))
+
+    return rows
+
+def _check_business_rules(record_type: str, row: BaseModel) -> str | None:
+    """Same rules the services enforce on single creations."""
+    if record_type == "purchase":
+        if row.total_value <= 0:
+            return error_messages.PURCHASE_INVALID_TOTAL
+        if row.amount is not None and row.amount <= 0:
+            return error_messages.PAYMENT_INVALID_AMOUNT
+        if row.client_id is None and row.client_nickname is None:
+            return error_messages.BULK_MISSING_CLIENT
+
+    elif record_type == "payment":
+        if row.amount <= 0:
+            return error_messages.PAYMENT_INVALID_AMOUNT
+        if row.purchase_id is None and row.note_number is None:
+            return error_messages.BULK_MISSING_PURCHASE
+
+    return None
+
+def _import_clients(rows: List[Tuple[int, BulkClientSchema]], report: BulkReport):
+    now = int(datetime.now().timestamp())
+    results = bulk_repository.insert_clients([
+        (row.name, row.nickname, row.phone, row.email, row.created_at or now, now)
+        for _, row in rows
+    ])
+
+    _collect("client", rows, results, report)
+
+def _import_purchases(rows: List[Tuple[int, BulkPurchaseSchema]], report: BulkReport) -> set[int]:
+    """Insert the purchases (and their initial payments); returns the ids of the purchases paid."""
+    if not rows:
+        return set()
+
+    client_ids = bulk_repository.get_existing_client_ids(
+        list({row.client_id for _, row in rows if row.client_id is not None})
+    )
+    client_ids_by_nickname = bulk_repository.get_client_ids_by_nickname(
+        list({row.client_nickname for _, row in rows if row.client_id is None})
+    )
+
+    now = int(datetime.now().timestamp())
+    resolved: List[Tuple[int, BulkPurchaseSchema]] = []
+    values = []
+    for line, row in rows:
+        if row.client_id is not None:
+            client_id = row.client_id if row.client_id in client_ids else None
+        else:
+            client_id = client_ids_by_nickname.get(row.client_nickname)
+
+        if client_id is None:
+            report.add_error(line, "purchase", error_messages.CLIENT_NOT_FOUND)
+            continue
+
+        resolved.append((line, row))
+        values.append((client_id, row.description, row.total_value, row.note_number, row.created_at or now, now))
+
+    results = bulk_repository.insert_purchases(values)
+
+    # the optional payment of a purchase row, like in POST /purchases/{client_id}
+    initial_payments: List[Tuple[int, tuple]] = []
+    for (line, row), result in zip(resolved, results):
+        if isinstance(result, int) and row.amount is not None:
+            initial_payments.append((line, (
+                result, row.amount, row.payment_date, row.method, row.payment_description,
+                row.receipt_number, row.created_at or now, now
+            )))
+
+    payment_results = bulk_repository.insert_payments([payment for _, payment in initial_payments])
+
+    # a purchase whose payment failed is not kept, so the row can be fixed and imported again
+    failed_lines: Dict[int, str] = {}
+    for (line, payment), result in zip(initial_payments, payment_results):
+        if not isinstance(result, int):
+            failed_lines[line] = f"{error_messages.PAYMENT_PURCHASE_CREATION_FAILED} {result}"
+    bulk_repository.delete_new_purchases([payment[0] for line, payment in initial_payments if line in failed_lines])
+
+    results = [failed_lines.get(line, result) for (line, _), result in zip(resolved, results)]
+    _collect("purchase", resolved, results, report)
+
+    return {payment[0] for line, payment in initial_payments if line not in failed_lines}
+
+def _import_payments(rows: List[Tuple[int, BulkPaymentSchema]], report: BulkReport) -> set[int]:
+    """Insert the payments; returns the ids of the purchases paid."""
+    if not rows:
+        return set()
+
+    purchase_ids = bulk_repository.get_active_purchase_ids(
+        list({row.purchase_id for _, row in rows if row.purchase_id is not None})
+    )
+    purchase_ids_by_note = bulk_repository.get_active_purchase_ids_by_note_number(
+        list({row.note_number for _, row in rows if row.purchase_id is None})
+    )
+
+    now = int(datetime.now().timestamp())
+    resolved: List[Tuple[int, BulkPaymentSchema]] = []
+    values = []
+    for line, row in rows:
+        if row.purchase_id is not None:
+            purchase_id = row.purchase_id if row.purchase_id in purchase_ids else None
+        else:
+            purchase_id = purchase_ids_by_note.get(row.note_number)
+
+        if purchase_id is None:
+            # unknown or deactivated purchase, same outcome as POST /purchases/{id}/payments
+            report.add_error(line, "payment", error_messages.PAYMENT_CREATION_FAILED)
+            continue
+
+        resolved.append((line, row))
+        values.append((
+            purchase_id, row.amount, row.payment_date, row.method, row.description,
+            row.receipt_number, row.created_at or now, now
+        ))
+
+    results = bulk_repository.insert_payments(values)
+    _collect("payment", resolved, results, report)
+
+    return {payment[0] for payment, result in zip(values, results) if isinstance(result, int)}
+
+def _collect(record_type: str, rows: List[Tuple[int, BaseModel]], results: List[int | str], report: BulkReport):
+    for (line, _), result in zip(rows, results):
+        if isinstance(result, int):
+            report.imported[record_type] += 1
+        else:
+            report.add_error(line, record_type, result)
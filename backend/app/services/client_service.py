@@ -1,19 +1,48 @@
-from typing import List
-from app.models import Client
-from app.services.purchase_service import deactivate_purchases_by_client
+from typing import Dict, List
+from app.database import transaction
+from app.models import Client, ClientBalance
+from app.services.purchase_service import deactivate_purchases_by_client, restore_purchases_by_client
 import app.repositories.client_repository as client_repository
+import app.repositories.balance_repository as balance_repository
 from app.utils.exceptions import (
-    NotFoundError,
+    BusinessRuleError, NotFoundError,
     error_messages
 )
+from app.utils.helpers import key_by
+from app.utils.pagination import next_row_cursor
+from app.utils.serializers import CLIENT, CLIENT_BALANCE, JSONPage
 
-def get_clients(limit: int = None, offset: int = 0, only_active: bool = True) -> List[Client]:
-    clients = client_repository.get_clients(limit, offset, only_active)
+# row positions of the keyset cursors (created_at, id) and (sort column, client_id)
+CLIENT_CURSOR = (6, 0)
+BALANCE_CURSORS = {"open_amount": (4, 0), "last_activity": (6, 0)}
+
+def get_clients(limit: int = None, offset: int = 0, only_active: bool = True,
+                after: tuple[int, int] | None = None) -> List[Client]:
+    clients = client_repository.get_clients(limit, offset, only_active, after)
     if not clients:
         return []
     
     return clients
 
+def get_clients_page(limit: int = None, offset: int = 0, only_active: bool = True,
+                     after: tuple[int, int] | None = None) -> JSONPage:
+    """`get_clients` serialized straight from the rows (JSON fast path of the list route)."""
+    rows = client_repository.get_client_rows(limit, offset, only_active, after)
+    return JSONPage(CLIENT.encode(rows), next_row_cursor(rows, limit, *CLIENT_CURSOR))
+
+def get_client_balances(limit: int = None, offset: int = 0, only_open: bool = True, only_active: bool = True,
+                        sort_by: str = "open_amount", descending: bool = True,
+                        after: tuple | None = None) -> List[ClientBalance]:
+    """What each client owes, read from the trigger-maintained client_balances table."""
+    return balance_repository.get_client_balances(limit, offset, only_open, only_active, sort_by, descending, after)
+
+def get_client_balances_page(limit: int = None, offset: int = 0, only_open: bool = True, only_active: bool = True,
+                             sort_by: str = "open_amount", descending: bool = True,
+                             after: tuple | None = None) -> JSONPage:
+    """`get_client_balances` serialized straight from the rows (JSON fast path of the list route)."""
+    rows = balance_repository.get_client_balance_rows(limit, offset, only_open, only_active, sort_by, descending, after)
+    return JSONPage(CLIENT_BALANCE.encode(rows), next_row_cursor(rows, limit, *BALANCE_CURSORS[sort_by]))
+
 def get_client_by_id(client_id: int) -> Client | None:
     client = client_repository.get_client_by_id(client_id)
     if not client:
@@ -21,22 +50,43 @@ def get_client_by_id(client_id: int) -> Client | None:
 
     return client
 
+def get_clients_by_ids(client_ids: List[int]) -> Dict[int, Client | None]:
+    """Clients keyed by id, in one query; ids that do not exist map to None."""
+    return key_by(client_ids, client_repository.get_clients_by_ids(client_ids))
+
 def create_client(data: dict) -> Client:
     return client_repository.insert_client(data)
 
 def update_client(client_id: int, data: dict) -> Client | None:
-    client_exists = client_repository.get_client_by_id(client_id)
-    if not client_exists:
-        raise NotFoundError(error_messages.CLIENT_NOT_FOUND)
+    with transaction():
+        client_exists = client_repository.get_client_by_id(client_id)
+        if not client_exists:
+            raise NotFoundError(error_messages.CLIENT_NOT_FOUND)
+
+        client = client_repository.update_client(client_id, data)
 
-    client = client_repository.update_client(client_id, data)
     return client
 
 def deactivate_client(client_id: int) -> bool:
     """Deactivate (soft delete) a client and cascade deactivate related purchases/payments."""
-    success = client_repository.deactivate_client(client_id)
-    if success:
-        # cascade disable purchases and payments
-        deactivate_purchases_by_client(client_id)
-    
+    with transaction():
+        success = client_repository.deactivate_client(client_id)
+        if success:
+            # cascade disable purchases and payments
+            deactivate_purchases_by_client(client_id)
+
     return success
+
+def activate_client(client_id: int) -> Client:
+    """Reactivate a client and the purchases/payments deactivated with it."""
+    with transaction():
+        client = client_repository.get_client_by_id(client_id)
+        if not client:
+            raise NotFoundError(error_messages.CLIENT_NOT_FOUND)
+        if client.is_active:
+            raise BusinessRuleError(error_messages.CLIENT_ALREADY_ENABLED)
+
+        client = client_repository.update_client(client_id, {"is_active": 1})
+        restore_purchases_by_client(client_id)
+
+    return client
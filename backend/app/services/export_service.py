@@ -0,0 +1,75 @@
+import csv
+import io
+import json
+from datetime import datetime
+from itertools import chain
+from typing import Iterable, Iterator, List, Sequence
+from app.repositories import export_repository
+from app.repositories.export_repository import EXPORT_COLUMNS
+from app.utils.exceptions import ValidationError, error_messages
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# stored as unix timestamps, exported as ISO 8601 like the API responses
+TIMESTAMP_COLUMNS = {"payment_date", "created_at", "updated_at", "date"}
+
+def export_rows(entity: str, format: str = "csv", only_active: bool | None = None) -> Iterator[str]:
+    """
+    Stream `entity` as CSV or NDJSON text chunks, one chunk per fetched batch.
+
+    The query starts before returning, so a database error is still raised
+    here (and becomes an HTTP error) instead of cutting the response short.
+    """
+    if entity not in EXPORT_COLUMNS:
+        raise ValidationError(error_messages.EXPORT_INVALID_ENTITY)
+    if format not in EXPORT_MEDIA_TYPES:
+        raise ValidationError(error_messages.EXPORT_INVALID_FORMAT)
+
+    batches = export_repository.iter_rows(entity, only_active)
+    first = next(batches, None)
+    if first is not None:
+        batches = chain([first], batches)
+
+    return encode_rows(EXPORT_COLUMNS[entity], batches, format)
+
+def encode_rows(columns: tuple[str, ...], batches: Iterable[Sequence[Sequence]], format: str = "csv") -> Iterator[str]:
+    """Encode batches of rows (in `columns` order) as CSV or NDJSON text chunks."""
+    encode = _encode_csv if format == "csv" else _encode_ndjson
+    return encode(columns, batches)
+
+def _timestamp_positions(columns: tuple[str, ...]) -> List[int]:
+    return [index for index, column in enumerate(columns) if column in TIMESTAMP_COLUMNS]
+
+def _format_row(row: Sequence, timestamps: List[int]) -> list:
+    values = list(row)
+    for index in timestamps:
+        if values[index]:
+            values[index] = datetime.fromtimestamp(values[index]).isoformat()
+    return values
+
+def _encode_csv(columns: tuple[str, ...], batches: Iterable[Sequence[Sequence]]) -> Iterator[str]:
+    timestamps = _timestamp_positions(columns)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows(_format_row(row, timestamps) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # header only, when there is nothing to export
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _encode_ndjson(columns: tuple[str, ...], batches: Iterable[Sequence[Sequence]]) -> Iterator[str]:
+    timestamps = _timestamp_positions(columns)
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(columns, _format_row(row, timestamps))), ensure_ascii=False) + "\n"
+            for row in rows
+        )
@@ -0,0 +1,42 @@
+"""Gauges read when `/metrics` is scraped."""
+import os
+from app import database
+from app.cache import entity_cache
+from app.executor import get_executor
+from app.metrics import (
+    registry,
+    cache_entries, cache_hit_ratio, cache_lookups,
+    db_file_bytes, executor_capacity, executor_pending
+)
+
+@registry.on_collect
+def _collect_database_files():
+    for name, suffix in (("db", ""), ("wal", "-wal"), ("shm", "-shm")):
+        try:
+            size = os.path.getsize(f"{database.DB_PATH}{suffix}")
+        except OSError:
+            # no WAL yet, or checkpointed and truncated
+            size = 0
+        db_file_bytes.set(name, value=size)
+
+@registry.on_collect
+def _collect_executor():
+    executor = get_executor()
+    executor_pending.set("db-reader", value=executor.reads.pending)
+    executor_capacity.set("db-reader", value=executor.reads.max_pending)
+    executor_pending.set("db-writer", value=executor.writes.pending)
+    executor_capacity.set("db-writer", value=executor.writes.max_pending)
+
+@registry.on_collect
+def _collect_cache():
+    # SQLite's own page cache counters (sqlite3_db_status) are not exposed by the
+    # sqlite3 module, so the hit ratio reported is the one of the entity cache
+    stats = entity_cache.stats()
+    cache_lookups.set("hit", value=stats["hits"])
+    cache_lookups.set("miss", value=stats["misses"])
+    cache_hit_ratio.set(value=stats["hit_ratio"])
+    cache_entries.set(value=stats["entries"])
+
+def render_metrics() -> str:
+    """Every metric in the Prometheus text exposition format."""
+    return registry.render()
@@ -6,18 +6,34 @@ from app.utils.exceptions import (
     ValidationError, NotFoundError,
     error_messages
 )
+from app.utils.pagination import next_row_cursor
+from app.utils.serializers import PAYMENT, JSONPage
+
+# row positions of the (created_at, id) keyset cursor
+PAYMENT_CURSOR = (8, 0)
 
 # fields that are allowed to be updated
 PAYMENT_ALLOWED_UPDATE_FIELDS = {"amount", "payment_date", "method", "description"}
 
-def get_payments(limit: int = None, offset: int = 0, purchase_id: int = None) -> List[Payment]:
+def get_payments(limit: int = None, offset: int = 0, purchase_id: int = None,
+                 after: tuple[int, int] | None = None) -> List[Payment]:
     """Retrieve payments, optionally filtered by purchase."""
-    payments = payment_repository.get_payments(limit, offset, purchase_id)
+    payments = payment_repository.get_payments(limit, offset, purchase_id, after)
     if not payments:
         return []
     
     return payments
 
+def get_payments_page(limit: int = None, offset: int = 0, purchase_id: int = None,
+                      after: tuple[int, int] | None = None) -> JSONPage:
+    """`get_payments` serialized straight from the rows (JSON fast path of the list routes)."""
+    rows = payment_repository.get_payment_rows(limit, offset, purchase_id, after)
+    return JSONPage(PAYMENT.encode(rows), next_row_cursor(rows, limit, *PAYMENT_CURSOR))
+
+def get_payments_by_ids(payment_ids: List[int]) -> List[Payment]:
+    """Payments with the given ids, in one query."""
+    return payment_repository.get_payments_by_ids(payment_ids)
+
 def get_payment_by_id(payment_id: int) -> Payment | None:
     """Retrieve a single payment by ID."""
     return payment_repository.get_payment_by_id(payment_id)
@@ -0,0 +1,82 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import List
+from app.models import Client
+from app.repositories import client_repository, payment_repository, print_repository
+from app.services.purchase_service import get_purchase_by_id
+from app.utils import printer
+from app.utils.printer import NoteDocument, ReceiptDocument
+from app.utils.exceptions import (
+    BusinessRuleError, NotFoundError, ValidationError,
+    error_messages
+)
+
+MONTH_PATTERN = re.compile(r"^(\d{4})-(\d{2})$")
+
+def _client_label(name: str, nickname: str | None) -> str:
+    return f"{name} ({nickname})" if nickname else name
+
+def _get_client(client_id: int) -> Client:
+    client = client_repository.get_client_by_id(client_id)
+    if not client:
+        raise NotFoundError(error_messages.CLIENT_NOT_FOUND)
+
+    return client
+
+def get_note(purchase_id: int) -> NoteDocument:
+    """Everything printed on the note of a purchase."""
+    purchase = get_purchase_by_id(purchase_id)
+    client = _get_client(purchase.client_id)
+
+    payments = [payment for payment in payment_repository.get_payments(purchase_id=purchase_id) if payment.is_active]
+    # printed in the order they were paid
+    payments.sort(key=lambda payment: (payment.payment_date or payment.created_at, payment.id))
+
+    return NoteDocument(purchase, _client_label(client.name, client.nickname), payments)
+
+def get_receipt(purchase_id: int, payment_id: int) -> ReceiptDocument:
+    """Everything printed on the receipt of a payment."""
+    payment = payment_repository.get_payment_by_id(payment_id)
+    if not payment:
+        raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
+    if payment.purchase_id != purchase_id:
+        raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
+
+    purchase = get_purchase_by_id(purchase_id)
+    client = _get_client(purchase.client_id)
+    return ReceiptDocument(payment, purchase, _client_label(client.name, client.nickname))
+
+def render_purchase_note(purchase_id: int) -> bytes:
+    """PDF of the note of a purchase."""
+    return printer.render_note(get_note(purchase_id))
+
+def render_payment_receipt(purchase_id: int, payment_id: int) -> bytes:
+    """PDF of the receipt of a payment."""
+    return printer.render_receipt(get_receipt(purchase_id, payment_id))
+
+def parse_month(month: str) -> tuple[int, int]:
+    """'2025-01' -> (2025, 1)."""
+    match = MONTH_PATTERN.match(month)
+    if not match or not 1 <= int(match.group(2)) <= 12:
+        raise ValidationError(error_messages.PRINT_INVALID_MONTH)
+
+    return int(match.group(1)), int(match.group(2))
+
+def get_month_notes(year: int, month: int) -> List[NoteDocument]:
+    """Notes of every active purchase created in the month, oldest first."""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+
+    purchases, payments = print_repository.get_notes_between(int(start.timestamp()), int(end.timestamp()))
+    if not purchases:
+        raise NotFoundError(error_messages.PRINT_NO_NOTES)
+
+    payments_by_purchase = defaultdict(list)
+    for payment in payments:
+        payments_by_purchase[payment.purchase_id].append(payment)
+
+    return [
+        NoteDocument(purchase, _client_label(name, nickname), payments_by_purchase[purchase.id])
+        for purchase, name, nickname in purchases
+    ]
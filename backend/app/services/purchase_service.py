@@ -1,14 +1,20 @@
 from builtins import isinstance
-from typing import List
+from typing import Dict, List
 from datetime import datetime
+from app.database import transaction
 from app.models import (Purchase, Payment)
 from app.services import payment_service
-from app.repositories import (purchase_repository)
-from app.utils.helpers import filter_allowed
+from app.repositories import (bulk_repository, client_repository, payment_repository, purchase_repository)
+from app.utils.helpers import filter_allowed, key_by
 from app.utils.exceptions import (
     BusinessRuleError, NotFoundError, ValidationError, BaseClassError,
     error_messages
 )
+from app.utils.pagination import next_row_cursor
+from app.utils.serializers import PURCHASE, JSONPage
+
+# row positions of the (created_at, id) keyset cursor
+PURCHASE_CURSOR = (8, 0)
 
 # fields that are allowed to be updated
 PURCHASE_ALLOWED_UPDATE_FIELDS = {"client_id", "description", "total_value"}
@@ -27,13 +33,24 @@ def get_purchase_by_note_number(note_number: str) -> Purchase:
 
     return purchase
 
-def get_purchases(limit: int = None, offset: int = 0, only_pending: bool | None = None) -> List[Purchase]:
-    purchases = purchase_repository.get_purchases(limit, offset, only_pending)
+def get_purchases_by_ids(purchase_ids: List[int]) -> Dict[int, Purchase | None]:
+    """Purchases keyed by id, in one query; ids that do not exist map to None."""
+    return key_by(purchase_ids, purchase_repository.get_purchases_by_ids(purchase_ids))
+
+def get_purchases(limit: int = None, offset: int = 0, only_pending: bool | None = None,
+                  after: tuple[int, int] | None = None) -> List[Purchase]:
+    purchases = purchase_repository.get_purchases(limit, offset, only_pending, after)
     if not purchases:
         return []
     
     return purchases
 
+def get_purchases_page(limit: int = None, offset: int = 0, only_pending: bool | None = None,
+                       after: tuple[int, int] | None = None) -> JSONPage:
+    """`get_purchases` serialized straight from the rows (JSON fast path of the list route)."""
+    rows = purchase_repository.get_purchase_rows(limit, offset, only_pending, after)
+    return JSONPage(PURCHASE.encode(rows), next_row_cursor(rows, limit, *PURCHASE_CURSOR))
+
 def create_purchase(client_id: int, data: dict) -> Purchase:
     try:
         total_value = float(data.get("total_value", 0))
@@ -54,40 +71,39 @@ def create_purchase(client_id: int, data: dict) -> Purchase:
     status = "pending"
     total_paid_value = 0.0
 
-    if amount is not None:
-        if amount >= total_value:
-            create_new_payment = True
-            total_paid_value = total_value
-            status = "paid"
-        elif amount > 0:
-            create_new_payment = True
-            total_paid_value = amount
-            status = "partial"
+    if amount is not None and amount > 0:
+        # the paid value is the sum of the active payments, even above total_value:
+        # the payment deltas and the totals recomputed in SQL rely on it
+        create_new_payment = True
+        total_paid_value = round(amount, 2)
+        status = "paid" if total_paid_value >= total_value else "partial"
 
     data.update({"client_id": client_id, "status": status, "total_paid_value": total_paid_value})
-    purchase = purchase_repository.insert_purchase(data)
-
-    if create_new_payment:
-        payment_data: dict = {
-            "purchase_id": purchase.id,
-            "amount": amount,
-            "payment_date": data.get("payment_date"),
-            "method": data.get("method"),
-            "description": data.get("payment_description"),
-            "receipt_number": data.get("receipt_number")
-        }
 
-        try:
-            payment_service.create_payment(payment_data)
-        except Exception as e:
-            purchase_repository.deactivate_purchase(purchase.id)
-            error = error_messages.PAYMENT_PURCHASE_CREATION_FAILED
-
-            if isinstance(e, BaseClassError):
-                merged_error = error + " " + str(e)
-                raise BusinessRuleError(merged_error) from e
-            else:
-                raise BusinessRuleError(error) from e
+    # purchase and initial payment are committed together (or not at all)
+    with transaction():
+        purchase = purchase_repository.insert_purchase(data)
+
+        if create_new_payment:
+            payment_data: dict = {
+                "purchase_id": purchase.id,
+                "amount": amount,
+                "payment_date": data.get("payment_date"),
+                "method": data.get("method"),
+                "description": data.get("payment_description"),
+                "receipt_number": data.get("receipt_number")
+            }
+
+            try:
+                payment_service.create_payment(payment_data)
+            except Exception as e:
+                error = error_messages.PAYMENT_PURCHASE_CREATION_FAILED
+
+                if isinstance(e, BaseClassError):
+                    merged_error = error + " " + str(e)
+                    raise BusinessRuleError(merged_error) from e
+                else:
+                    raise BusinessRuleError(error) from e
 
     return purchase
 
@@ -104,45 +120,52 @@ def update_purchase(purchase_id: int, data: dict) -> Purchase:
     if not validated_data:
         raise ValidationError(error_messages.DATA_FIELDS_EMPTY)
 
-    original = purchase_repository.get_purchase_by_id(purchase_id)
-    if not original:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+    with transaction():
+        original = purchase_repository.get_purchase_by_id(purchase_id)
+        if not original:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
 
-    purchase = purchase_repository.update_purchase(purchase_id, validated_data)
+        purchase = purchase_repository.update_purchase(purchase_id, validated_data)
 
-    # Recalculate totals if relevant fields changed
-    relevant_fields_changed = "total_value" in data or "client_id" in data
-    if relevant_fields_changed:
-        purchase = recalculate_purchase_totals(purchase_id)
+        # Re-derive status if relevant fields changed (paid value is unchanged)
+        relevant_fields_changed = "total_value" in data or "client_id" in data
+        if relevant_fields_changed:
+            purchase = apply_purchase_payment_delta(purchase_id, 0)
 
     return purchase
 
 def activate_purchase(purchase_id: int) -> Purchase:
-    original = purchase_repository.get_purchase_by_id(purchase_id)
-    if not original:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
-    if original.is_active:
-        raise BusinessRuleError(error_messages.PURCHASE_ALREADY_ENABLED)
-
-    purchase_repository.update_purchase(purchase_id, {"is_active": 1})
-    purchase = recalculate_purchase_totals(purchase_id)
+    with transaction():
+        original = purchase_repository.get_purchase_by_id(purchase_id)
+        if not original:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+        if original.is_active:
+            raise BusinessRuleError(error_messages.PURCHASE_ALREADY_ENABLED)
+
+        purchase_repository.update_purchase(purchase_id, {"is_active": 1})
+        purchase = recalculate_purchase_totals(purchase_id)
 
     return purchase
 
 def deactivate_purchase(purchase_id: int) -> Purchase:
     """Deactivate a purchase."""
-    purchase = purchase_repository.get_purchase_by_id(purchase_id)
-    if not purchase:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
-    if not purchase.is_active:
-        raise BusinessRuleError(error_messages.PURCHASE_ALREADY_DISABLED)
-
-    success = purchase_repository.deactivate_purchase(purchase_id)
-    if not success:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
-
-    payment_service.deactivate_payments_by_purchase(purchase_id)
-    purchase = recalculate_purchase_totals(purchase_id)
+    with transaction():
+        purchase = purchase_repository.get_purchase_by_id(purchase_id)
+        if not purchase:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+        if not purchase.is_active:
+            raise BusinessRuleError(error_messages.PURCHASE_ALREADY_DISABLED)
+
+        success = purchase_repository.deactivate_purchase(purchase_id)
+        if not success:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+
+        # every payment is disabled with the purchase, so nothing remains paid
+        payment_service.deactivate_payments_by_purchase(purchase_id)
+        purchase = purchase_repository.update_purchase(purchase_id, {
+            "total_paid_value": 0,
+            "status": "pending"
+        })
 
     return purchase
 
@@ -150,31 +173,48 @@ def deactivate_purchase(purchase_id: int) -> Purchase:
 def get_purchases_by_client(client_id: int, only_active: bool = True) -> List[Purchase]:
     return purchase_repository.get_purchases_by_client_id(client_id, only_active)
 
+def get_purchases_by_client_page(client_id: int, only_active: bool = True) -> JSONPage:
+    """`get_purchases_by_client` serialized straight from the rows (JSON fast path of the list route)."""
+    return JSONPage(PURCHASE.encode(purchase_repository.get_purchase_rows_by_client_id(client_id, only_active)))
+
 def deactivate_purchases_by_client(client_id: int) -> bool:
     """Deactivate all purchases (and related payments) for a given client."""
-    # get purchases ids related to that client
-    purchases_ids = purchase_repository.get_purchases_ids_by_client_id(client_id)
-
-    # disable all purchases related to that client
-    success = purchase_repository.deactivate_purchases_by_client_id(client_id)
+    return purchase_repository.deactivate_purchases_by_client_id(client_id)
 
-    # cascade to payments
-    if success:
-        for purchase_id in purchases_ids:
-            payment_service.deactivate_payments_by_purchase(purchase_id)
-            purchase_repository.update_purchase(purchase_id, {
-                "total_paid_value": 0,
-                "status": "pending"
-            })
-
-    return success
+def restore_purchases_by_client(client_id: int) -> int:
+    """Reactivate the purchases (and related payments) disabled with the client."""
+    return purchase_repository.restore_purchases_by_client_id(client_id)
 
 # Payment related services (business logic)
-def get_payments_for_purchase(purchase_id: int, limit: int = None, offset: int = 0) -> List[Payment]:
+def get_payments_for_purchase(purchase_id: int, limit: int = None, offset: int = 0,
+                              after: tuple[int, int] | None = None) -> List[Payment]:
     """List payments for a specific purchase."""
-    # Special case: purchase_id = 0 -> returns all active payments
+    _check_payments_purchase(purchase_id)
+    return payment_service.get_payments(limit, offset, purchase_id, after)
+
+def get_payments_for_purchase_page(purchase_id: int, limit: int = None, offset: int = 0,
+                                   after: tuple[int, int] | None = None) -> JSONPage:
+    """`get_payments_for_purchase` serialized straight from the rows (JSON fast path of the list route)."""
+    _check_payments_purchase(purchase_id)
+    return payment_service.get_payments_page(limit, offset, purchase_id, after)
+
+def get_payments_for_purchase_by_ids(purchase_id: int, payment_ids: List[int]) -> Dict[int, Payment | None]:
+    """
+    Payments keyed by id, in one query; ids that do not exist map to None, and
+    so do payments of another purchase (any purchase when purchase_id = 0).
+    """
+    _check_payments_purchase(purchase_id)
+
+    payments = payment_service.get_payments_by_ids(payment_ids)
+    if purchase_id:
+        payments = [payment for payment in payments if payment.purchase_id == purchase_id]
+
+    return key_by(payment_ids, payments)
+
+def _check_payments_purchase(purchase_id: int):
+    # Special case: purchase_id = 0 -> lists all active payments
     if purchase_id == 0:
-        return payment_service.get_payments(limit, offset, purchase_id=0)
+        return
 
     if purchase_id < 0:
         raise ValidationError(error_messages.FOREIGN_KEY_ERROR)
@@ -183,79 +223,167 @@ def get_payments_for_purchase(purchase_id: int, limit: int = None, offset: int =
     if not purchase:
         raise NotFoundError(error_messages.PAYMENT_PURCHASE_NOT_FOUND)
 
-    return payment_service.get_payments(limit, offset, purchase_id)
-
 def get_payment_by_id(payment_id: int) -> Payment | None:
     return payment_service.get_payment_by_id(payment_id)
 
 def create_payment(purchase_id: int, data: dict) -> Payment:
     """Create a new payment and update purchase totals."""
-    purchase = purchase_repository.get_purchase_by_id(purchase_id)
-    if not purchase or not purchase.is_active:
-        raise BusinessRuleError(error_messages.PAYMENT_CREATION_FAILED)
+    with transaction():
+        purchase = purchase_repository.get_purchase_by_id(purchase_id)
+        if not purchase or not purchase.is_active:
+            raise BusinessRuleError(error_messages.PAYMENT_CREATION_FAILED)
 
-    data["purchase_id"] = purchase_id
-    payment = payment_service.create_payment(data)
-    recalculate_purchase_totals(purchase_id)
+        data["purchase_id"] = purchase_id
+        payment = payment_service.create_payment(data)
+        apply_purchase_payment_delta(purchase_id, payment.amount)
 
     return payment
 
+def allocate_client_payment(client_id: int, data: dict) -> tuple[List[Payment], List[Purchase]]:
+    """
+    Split one payment of a client across its open (pending/partial) purchases.
+
+    Without `allocations` the amount pays off the oldest purchases first; with
+    it, each entry ({purchase_id, amount, receipt_number}) says how much goes to
+    which purchase and the amounts must add up to the payment. One payment row
+    is created per purchase and the purchase totals are updated, all in one
+    transaction. Returns the new payments and the updated purchases.
+    """
+    try:
+        amount = round(float(data.get("amount")) * 100)
+    except (TypeError, ValueError):
+        raise ValidationError(error_messages.PAYMENT_INVALID_AMOUNT)
+    if amount <= 0:
+        raise ValidationError(error_messages.PAYMENT_INVALID_AMOUNT)
+
+    with transaction():
+        if not client_repository.get_client_by_id(client_id):
+            raise NotFoundError(error_messages.CLIENT_NOT_FOUND)
+
+        open_amounts = {purchase_id: round(open_amount * 100)
+                        for purchase_id, open_amount in purchase_repository.get_open_amounts_by_client_id(client_id)}
+        if not open_amounts:
+            raise BusinessRuleError(error_messages.PAYMENT_NO_OPEN_PURCHASES)
+
+        plan = _allocation_plan(amount, open_amounts, data.get("allocations"))
+
+        now = int(datetime.now().timestamp())
+        payment_date = int(data["payment_date"]) if data.get("payment_date") else None
+        results = bulk_repository.insert_payments([
+            (purchase_id, cents / 100, payment_date, data.get("method"), data.get("description"), receipt_number, now, now)
+            for purchase_id, cents, receipt_number in plan
+        ])
+        for result in results:
+            if not isinstance(result, int):
+                raise BusinessRuleError(result)
+
+        purchase_ids = [purchase_id for purchase_id, _, _ in plan]
+        purchase_repository.apply_payment_deltas([(purchase_id, cents / 100) for purchase_id, cents, _ in plan])
+
+        payments = key_by(results, payment_repository.get_payments_by_ids(results))
+        purchases = key_by(purchase_ids, purchase_repository.get_purchases_by_ids(purchase_ids))
+
+    return list(payments.values()), list(purchases.values())
+
+def _allocation_plan(amount: int, open_amounts: Dict[int, int],
+                     allocations: List[dict] | None) -> List[tuple[int, int, str | None]]:
+    """(purchase_id, amount, receipt_number) per payment to create; amounts in cents."""
+    if allocations is None:
+        if amount > sum(open_amounts.values()):
+            raise BusinessRuleError(error_messages.PAYMENT_EXCEEDS_OPEN_AMOUNT)
+
+        plan, remaining = [], amount
+        # open_amounts is in purchase order, oldest first
+        for purchase_id, open_amount in open_amounts.items():
+            if remaining <= 0:
+                break
+            part = min(remaining, open_amount)
+            plan.append((purchase_id, part, None))
+            remaining -= part
+        return plan
+
+    plan = []
+    for allocation in allocations:
+        purchase_id = allocation.get("purchase_id")
+        try:
+            part = round(float(allocation.get("amount")) * 100)
+        except (TypeError, ValueError):
+            raise ValidationError(error_messages.PAYMENT_INVALID_AMOUNT)
+        if part <= 0:
+            raise ValidationError(error_messages.PAYMENT_INVALID_AMOUNT)
+        if purchase_id not in open_amounts:
+            raise BusinessRuleError(error_messages.PAYMENT_ALLOCATION_NOT_OPEN)
+        if part > open_amounts[purchase_id]:
+            raise BusinessRuleError(error_messages.PAYMENT_EXCEEDS_OPEN_AMOUNT)
+        plan.append((purchase_id, part, allocation.get("receipt_number")))
+
+    if len({purchase_id for purchase_id, _, _ in plan}) != len(plan):
+        raise ValidationError(error_messages.PAYMENT_ALLOCATION_DUPLICATED)
+    if sum(part for _, part, _ in plan) != amount:
+        raise ValidationError(error_messages.PAYMENT_ALLOCATION_MISMATCH)
+    return plan
+
 def update_payment(purchase_id: int, payment_id: int, data: dict) -> Payment:
     """Update a payment and recalculate the related purchase totals."""
-    payment = payment_service.get_payment_by_id(payment_id)
-    if not payment:
-        raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
+    with transaction():
+        payment = payment_service.get_payment_by_id(payment_id)
+        if not payment:
+            raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
 
-    if payment.purchase_id != purchase_id:
-        raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
+        if payment.purchase_id != purchase_id:
+            raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
 
-    updated = payment_service.update_payment(payment_id, data)
-    if updated and "amount" in data:
-        recalculate_purchase_totals(purchase_id)
+        updated = payment_service.update_payment(payment_id, data)
+        # only active payments count towards the purchase totals
+        if updated and "amount" in data and payment.is_active:
+            apply_purchase_payment_delta(purchase_id, updated.amount - payment.amount)
 
     return updated or payment
 
 def activate_payment(purchase_id: int, payment_id: int) -> Payment:
     """Activate a payment that belongs to the given purchase and update totals."""
-    payment = payment_service.get_payment_by_id(payment_id)
-    if not payment:
-        raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
-    if payment.is_active:
-        raise BusinessRuleError(error_messages.PAYMENT_ALREADY_ENABLED)
-    if payment.purchase_id != purchase_id:
-        raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
-
-    purchase = purchase_repository.get_purchase_by_id(purchase_id)
-    if not purchase:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
-    if not purchase.is_active:
-        raise BusinessRuleError(error_messages.PAYMENT_ACTIVATION_FAILED)
-
-    payment = payment_service.activate_payment(payment_id)
-    if payment:
-        recalculate_purchase_totals(purchase_id)
+    with transaction():
+        payment = payment_service.get_payment_by_id(payment_id)
+        if not payment:
+            raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
+        if payment.is_active:
+            raise BusinessRuleError(error_messages.PAYMENT_ALREADY_ENABLED)
+        if payment.purchase_id != purchase_id:
+            raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
+
+        purchase = purchase_repository.get_purchase_by_id(purchase_id)
+        if not purchase:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+        if not purchase.is_active:
+            raise BusinessRuleError(error_messages.PAYMENT_ACTIVATION_FAILED)
+
+        payment = payment_service.activate_payment(payment_id)
+        if payment:
+            apply_purchase_payment_delta(purchase_id, payment.amount)
 
     return payment
 
 def deactivate_payment(purchase_id: int, payment_id: int) -> Payment:
     """Deactivate a payment that belongs to the given purchase and update totals."""
-    payment = payment_service.get_payment_by_id(payment_id)
-    if not payment:
-        raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
-    if not payment.is_active:
-        raise BusinessRuleError(error_messages.PAYMENT_ALREADY_DISABLED)
-    if payment.purchase_id != purchase_id:
-        raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
-
-    purchase_exists = purchase_repository.get_purchase_by_id(purchase_id)
-    if not purchase_exists:
-        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+    with transaction():
+        payment = payment_service.get_payment_by_id(payment_id)
+        if not payment:
+            raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
+        if not payment.is_active:
+            raise BusinessRuleError(error_messages.PAYMENT_ALREADY_DISABLED)
+        if payment.purchase_id != purchase_id:
+            raise BusinessRuleError(error_messages.PAYMENT_NOT_LINKED)
+
+        purchase_exists = purchase_repository.get_purchase_by_id(purchase_id)
+        if not purchase_exists:
+            raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+
+        payment = payment_service.deactivate_payment(payment_id)
+        if not payment:
+            raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
 
-    payment = payment_service.deactivate_payment(payment_id)
-    if not payment:
-        raise NotFoundError(error_messages.PAYMENT_NOT_FOUND)
+        apply_purchase_payment_delta(purchase_id, -payment.amount)
 
-    recalculate_purchase_totals(purchase_id)
     return payment
 
 def compute_purchase_totals(purchase: Purchase, payments: list[Payment]):
@@ -279,18 +407,37 @@ def recalculate_purchase_totals(purchase_id: int) -> Purchase:
     """
     Recalculate purchase total_paid_value and status based on active payments.
 
+    The sum is computed by SQLite in the same UPDATE, without loading payments.
+
     Returns:
         Purchase: The updated Puchase after recalculation
 
     Raises:
         NotFoundError: If Purchase is not found.
     """
-    purchase = purchase_repository.get_purchase_by_id(purchase_id)
+    purchase = purchase_repository.refresh_purchase_totals(purchase_id)
+    if not purchase:
+        raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
+
+    return purchase
+
+def apply_purchase_payment_delta(purchase_id: int, delta: float) -> Purchase:
+    """
+    Incrementally add `delta` to the purchase paid value and re-derive its status.
+
+    Raises:
+        NotFoundError: If Purchase is not found.
+    """
+    purchase = purchase_repository.apply_payment_delta(purchase_id, delta)
     if not purchase:
         raise NotFoundError(error_messages.PURCHASE_NOT_FOUND)
 
-    payments = payment_service.get_payments(limit = None, offset = 0, purchase_id = purchase_id)
-    updates = compute_purchase_totals(purchase, payments)
+    return purchase
+
+def verify_purchase_totals() -> List[dict]:
+    """Return the purchases whose stored totals disagree with their active payments."""
+    return purchase_repository.get_inconsistent_purchase_totals()
 
-    updated = purchase_repository.update_purchase(purchase_id, updates)
-    return updated or purchase
\ No newline at end of file
+def repair_purchase_totals(purchase_ids: List[int] | None = None) -> int:
+    """Recompute stored totals (all purchases when no IDs are given). Returns repaired count."""
+    return purchase_repository.repair_purchase_totals(purchase_ids)
@@ -0,0 +1,177 @@
+"""
+Reports computed in SQL.
+
+The receivables aging report is cached per report date until the next write
+to clients, purchases or payments, detected through their `table_versions`
+counters (the same ones behind the ETags). Client statements are streamed
+straight from their query.
+"""
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from itertools import chain
+from json.encoder import encode_basestring
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from app.models import AgingReport, AgingTotals, Client
+from app.repositories import report_repository
+from app.repositories.report_repository import AGING_COLUMNS, STATEMENT_COLUMNS
+from app.repositories.version_repository import get_table_versions
+from app.services.client_service import get_client_by_id
+from app.services.export_service import EXPORT_MEDIA_TYPES, encode_rows
+from app.utils.exceptions import ValidationError, error_messages
+from app.utils.serializers import STATEMENT_ENTRY
+
+# tables the aging report reads: a write to any of them invalidates it
+AGING_TABLES = ("clients", "purchases", "payments")
+# report dates kept in the cache (mostly "today" and a few closing dates)
+AGING_CACHE_SIZE = 16
+# rows per chunk when a cached report is streamed
+AGING_STREAM_BATCH = 500
+
+_aging_cache: OrderedDict[date, Tuple[Dict[str, int], AgingReport]] = OrderedDict()
+_aging_cache_lock = threading.Lock()
+
+def _midnight(day: date) -> int:
+    return int(datetime.combine(day, time.min).timestamp())
+
+def _aging_bounds(as_of: date) -> dict:
+    """Bucket boundaries: a purchase made on the report date is 0 days old."""
+    return {
+        "cutoff": _midnight(as_of + timedelta(days=1)),
+        "t30": _midnight(as_of - timedelta(days=30)),
+        "t60": _midnight(as_of - timedelta(days=60)),
+        "t90": _midnight(as_of - timedelta(days=90)),
+    }
+
+def _report_date(as_of: int | None) -> date:
+    if as_of is None:
+        return date.today()
+    try:
+        return datetime.fromtimestamp(as_of).date()
+    except (OverflowError, OSError, ValueError) as e:
+        raise ValidationError(error_messages.REPORT_INVALID_DATE) from e
+
+def aging_etag_key(as_of: str | None) -> str:
+    """
+    Report date of an aging request, for its ETag: without `as_of` the report
+    is for today, so it changes at midnight without any write.
+    """
+    try:
+        return _report_date(int(as_of) if as_of is not None else None).isoformat()
+    except (ValueError, ValidationError):
+        # invalid as_of: the route itself answers with the error
+        return ""
+
+def _query_args(as_of: date) -> tuple[dict, bool]:
+    # open amounts of today are stored in the purchases; past dates are rebuilt from the payments
+    return _aging_bounds(as_of), as_of < date.today()
+
+def _cached_aging(as_of: date, versions: Dict[str, int]) -> AgingReport | None:
+    with _aging_cache_lock:
+        entry = _aging_cache.get(as_of)
+        if entry is None or entry[0] != versions:
+            return None
+        _aging_cache.move_to_end(as_of)
+        return entry[1]
+
+def _store_aging(as_of: date, versions: Dict[str, int], report: AgingReport):
+    with _aging_cache_lock:
+        _aging_cache[as_of] = (versions, report)
+        _aging_cache.move_to_end(as_of)
+        while len(_aging_cache) > AGING_CACHE_SIZE:
+            _aging_cache.popitem(last=False)
+
+def get_aging_report(as_of: int | None = None) -> AgingReport:
+    """Open amounts per client and overall, bucketed 0-30, 31-60, 61-90 and 90+ days by purchase date."""
+    report_date = _report_date(as_of)
+
+    # counters read before the query: a write in between only makes the entry stale sooner
+    versions = get_table_versions(AGING_TABLES)
+    report = _cached_aging(report_date, versions)
+    if report is not None:
+        return report
+
+    clients = report_repository.get_client_aging(*_query_args(report_date))
+    report = AgingReport(as_of=report_date, totals=AgingTotals.from_clients(clients), clients=clients)
+    _store_aging(report_date, versions, report)
+    return report
+
+def stream_client_aging(as_of: int | None = None, format: str = "csv") -> Iterator[str]:
+    """
+    Stream the per-client aging as CSV or NDJSON text chunks.
+
+    A cached report is encoded as is; otherwise the rows are streamed from the
+    query without building the whole report in memory.
+    """
+    if format not in EXPORT_MEDIA_TYPES:
+        raise ValidationError(error_messages.EXPORT_INVALID_FORMAT)
+
+    report_date = _report_date(as_of)
+    report = _cached_aging(report_date, get_table_versions(AGING_TABLES))
+    if report is not None:
+        rows = [client.to_tuple() for client in report.clients]
+        batches = (rows[i:i + AGING_STREAM_BATCH] for i in range(0, len(rows), AGING_STREAM_BATCH))
+        return encode_rows(AGING_COLUMNS, batches, format)
+
+    batches = report_repository.iter_client_aging(*_query_args(report_date))
+    # start the query here, so a database error is still an HTTP error
+    first = next(batches, None)
+    if first is not None:
+        batches = chain([first], batches)
+
+    return encode_rows(AGING_COLUMNS, batches, format)
+
+def _check_timestamp(value: int | None):
+    if value is None:
+        return
+    try:
+        datetime.fromtimestamp(value)
+    except (OverflowError, OSError, ValueError) as e:
+        raise ValidationError(error_messages.REPORT_INVALID_DATE) from e
+
+def stream_client_statement(client_id: int, start: int | None = None, end: int | None = None,
+                            format: str = "json") -> Iterator[str]:
+    """
+    Stream the statement of a client: notes and payments dated in [start, end)
+    interleaved chronologically, each with the running balance after it,
+    preceded by the opening balance (everything before `start`).
+
+    `json` is a single document, `csv` and `ndjson` a file with one line per
+    entry (the opening balance first), like the exports.
+    """
+    if format != "json" and format not in EXPORT_MEDIA_TYPES:
+        raise ValidationError(error_messages.EXPORT_INVALID_FORMAT)
+    _check_timestamp(start)
+    _check_timestamp(end)
+    if start is not None and end is not None and start >= end:
+        raise ValidationError(error_messages.STATEMENT_INVALID_RANGE)
+
+    client = get_client_by_id(client_id)
+
+    batches = report_repository.iter_client_statement(client_id, start, end)
+    # start the query here, so a database error is still an HTTP error;
+    # there is always at least the opening row
+    batches = chain([next(batches)], batches)
+
+    if format == "json":
+        return _encode_statement(client, start, end, batches)
+    return encode_rows(STATEMENT_COLUMNS, batches, format)
+
+def _encode_statement(client: Client, start: int | None, end: int | None,
+                      batches: Iterable[List[Sequence]]) -> Iterator[str]:
+    """`{"message", "client", "start", "end", "entries": [...], "closing_balance"}`, one chunk per batch."""
+    balance = STATEMENT_COLUMNS.index("balance")
+    client_json = '{"id":%d,"name":%s,"nickname":%s}' % (
+        client.id, encode_basestring(client.name),
+        "null" if client.nickname is None else encode_basestring(client.nickname)
+    )
+    bounds = [datetime.fromtimestamp(value).isoformat() if value is not None else None for value in (start, end)]
+
+    yield '{"message":"Extrato gerado.","client":%s,"start":%s,"end":%s,"entries":[' % (
+        client_json, *(encode_basestring(value) if value else "null" for value in bounds)
+    )
+    closing, separator = 0.0, ""
+    for rows in batches:
+        yield separator + STATEMENT_ENTRY.join(rows)
+        closing, separator = rows[-1][balance], ","
+    yield '],"closing_balance":%r}' % float(closing)
@@ -0,0 +1,54 @@
+from typing import Dict, List
+import regex as re
+from config import BATCH_MAX_IDS
+from app.models import SearchResult
+from app.repositories import payment_repository, purchase_repository, search_repository
+from app.utils.helpers import key_by
+from app.utils.exceptions import (
+    ValidationError,
+    error_messages
+)
+
+SEARCH_TYPES = ("client", "purchase", "payment")
+
+def build_fts_query(text: str) -> str:
+    """
+    Turn free user text into a safe FTS5 query.
+
+    Every word becomes a quoted prefix term ("joao"*), so FTS5 operators typed by
+    the user are never interpreted and partial names/numbers still match.
+    """
+    terms = re.findall(r"[\p{L}\p{N}]+", text)
+    if not terms:
+        raise ValidationError(error_messages.SEARCH_INVALID_QUERY)
+
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search(text: str, types: List[str] | None = None, limit: int = 20, offset: int = 0,
+           only_active: bool = True) -> List[SearchResult]:
+    """Ranked full-text search over clients, purchases and payments."""
+    types = [t for t in SEARCH_TYPES if not types or t in types]
+    if not types:
+        raise ValidationError(error_messages.SEARCH_INVALID_TYPE)
+
+    return search_repository.search(build_fts_query(text), types, limit, offset, only_active)
+
+def lookup(numbers: List[str]) -> Dict[str, dict | None]:
+    """
+    Resolve note and receipt numbers, mixed, to their purchases and payments.
+
+    One query per table whatever the number of numbers. Each number maps to
+    {"purchase": ..., "payment": ...} (whichever matched) or None.
+    """
+    numbers = list(dict.fromkeys(numbers))
+    if len(numbers) > BATCH_MAX_IDS:
+        raise ValidationError(error_messages.BATCH_TOO_MANY_IDS)
+
+    purchases = key_by(numbers, purchase_repository.get_purchases_by_note_numbers(numbers), "note_number")
+    payments = key_by(numbers, payment_repository.get_payments_by_receipt_numbers(numbers), "receipt_number")
+
+    return {
+        number: {"purchase": purchases[number], "payment": payments[number]}
+        if purchases[number] or payments[number] else None
+        for number in numbers
+    }
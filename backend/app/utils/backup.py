@@ -0,0 +1,308 @@
+"""
+Online backup and restore of the SQLite database.
+
+Backups use the SQLite online backup API (`Connection.backup`), copying a few
+pages per step so the API keeps serving reads and writes while a backup runs.
+Each snapshot is checked with `PRAGMA integrity_check` and stored as a .zip in
+the backup folder; a background scheduler creates them periodically and keeps
+only the newest `BACKUP_RETENTION` files.
+
+Usage (from backend/):
+    python -m app.utils.backup create
+    python -m app.utils.backup list
+    python -m app.utils.backup verify notareal-20250101-120000-000.zip
+    python -m app.utils.backup restore notareal-20250101-120000-000.zip
+"""
+import logging
+import sqlite3
+import tempfile
+import threading
+import time
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List
+from config import (
+    BACKUP_DIR, BACKUP_PAGES_PER_STEP, BACKUP_STEP_SLEEP, BACKUP_INTERVAL, BACKUP_RETENTION
+)
+from app import database
+from app.migrations import LATEST_VERSION, get_version, run_migrations
+from app.utils.exceptions import (
+    BusinessRuleError, DatabaseError, NotFoundError,
+    error_messages
+)
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PREFIX = "notareal-"
+# name of the database file inside the .zip
+BACKUP_ARCNAME = "notareal.db"
+
+# one backup or restore at a time (a restore takes a safety backup first)
+_backup_lock = threading.RLock()
+
+@dataclass
+class BackupInfo:
+    name: str
+    size: int
+    created_at: datetime
+
+    @staticmethod
+    def from_path(path: Path):
+        stat = path.stat()
+        return BackupInfo(
+            name = path.name,
+            size = stat.st_size,
+            created_at = datetime.fromtimestamp(stat.st_mtime)
+        )
+
+def get_backup_dir() -> Path:
+    path = Path(BACKUP_DIR) if BACKUP_DIR else database.DB_PATH.parent / "backups"
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def list_backups() -> List[BackupInfo]:
+    """Backups in the backup folder, newest first."""
+    # names carry the creation time, so they sort chronologically
+    paths = sorted(get_backup_dir().glob(f"{BACKUP_PREFIX}*.zip"), reverse=True)
+    return [BackupInfo.from_path(path) for path in paths]
+
+def get_backup_path(name: str) -> Path:
+    path = get_backup_dir() / name
+
+    # only plain backup file names, never a path outside the backup folder
+    if Path(name).name != name or not name.startswith(BACKUP_PREFIX) or not name.endswith(".zip"):
+        raise NotFoundError(error_messages.BACKUP_NOT_FOUND)
+    if not path.is_file():
+        raise NotFoundError(error_messages.BACKUP_NOT_FOUND)
+
+    return path
+
+def _is_intact(conn: sqlite3.Connection) -> bool:
+    return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+def _copy_database(target: Path):
+    """Copy the live database into `target` with the online backup API."""
+    source = database.create_connection()
+    try:
+        target_conn = sqlite3.connect(target)
+        try:
+            # a read transaction pins the WAL snapshot: without it every commit made by
+            # another connection between two steps restarts the copy from the first page
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            # small steps between which writers keep committing (to the WAL, past the snapshot)
+            source.backup(target_conn, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP)
+            source.rollback()
+            # a snapshot must be a single self-contained file, without -wal/-shm
+            target_conn.execute("PRAGMA journal_mode = DELETE")
+
+            if not _is_intact(target_conn):
+                raise DatabaseError(error_messages.BACKUP_INTEGRITY_FAILED)
+        finally:
+            target_conn.close()
+    finally:
+        source.close()
+
+def create_backup(rotate: bool = True) -> BackupInfo:
+    """Take an online backup, verify it and store it as a .zip. Returns the new backup."""
+    with _backup_lock:
+        backup_dir = get_backup_dir()
+        now = datetime.now()
+        name = f"{BACKUP_PREFIX}{now:%Y%m%d-%H%M%S}-{now.microsecond // 1000:03d}.zip"
+
+        with tempfile.TemporaryDirectory(dir=backup_dir) as tmp:
+            snapshot = Path(tmp) / BACKUP_ARCNAME
+            try:
+                _copy_database(snapshot)
+            except sqlite3.Error as e:
+                raise DatabaseError(error_messages.BACKUP_FAILED) from e
+
+            partial = Path(tmp) / name
+            with zipfile.ZipFile(partial, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.write(snapshot, BACKUP_ARCNAME)
+
+            # the .zip only shows up in the backup folder once it is complete
+            partial.replace(backup_dir / name)
+
+        if rotate:
+            rotate_backups()
+
+    logger.info("Backup created: %s", name)
+    return BackupInfo.from_path(backup_dir / name)
+
+def rotate_backups(retention: int = BACKUP_RETENTION) -> List[str]:
+    """Delete all but the newest `retention` backups. Returns the deleted names."""
+    with _backup_lock:
+        expired = list_backups()[max(retention, 1):]
+        for backup in expired:
+            (get_backup_dir() / backup.name).unlink(missing_ok=True)
+
+    return [backup.name for backup in expired]
+
+def _extract(path: Path, folder: Path) -> Path:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return Path(archive.extract(BACKUP_ARCNAME, folder))
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise BusinessRuleError(error_messages.BACKUP_INTEGRITY_FAILED) from e
+
+def verify_backup(name: str) -> bool:
+    """Check that a stored backup unpacks into an intact database."""
+    path = get_backup_path(name)
+    with tempfile.TemporaryDirectory(dir=get_backup_dir()) as tmp:
+        try:
+            snapshot = _extract(path, Path(tmp))
+        except BusinessRuleError:
+            return False
+
+        conn = sqlite3.connect(snapshot)
+        try:
+            return _is_intact(conn)
+        except sqlite3.DatabaseError:
+            return False
+        finally:
+            conn.close()
+
+def _read_table_versions(conn: sqlite3.Connection) -> dict[str, int]:
+    try:
+        return dict(conn.execute("SELECT name, version FROM table_versions").fetchall())
+    except sqlite3.OperationalError:
+        # database older than the table_versions migration
+        return {}
+
+def _advance_table_versions(conn: sqlite3.Connection, previous: dict[str, int]):
+    """Move the restored change counters past the replaced ones, so no ETag issued before is reused."""
+    conn.executemany(
+        "UPDATE table_versions SET version = MAX(version, ?) + 1 WHERE name = ?",
+        [(version, name) for name, version in previous.items()]
+    )
+
+def restore_backup(name: str) -> BackupInfo:
+    """
+    Replace the database content with a stored backup.
+
+    The current data is saved first (the returned backup), so a restore can be
+    undone. The backup is copied over the live database through the backup API,
+    then migrated to the current schema version.
+    """
+    path = get_backup_path(name)
+
+    with _backup_lock, tempfile.TemporaryDirectory(dir=get_backup_dir()) as tmp:
+        snapshot = _extract(path, Path(tmp))
+        source = sqlite3.connect(snapshot)
+        try:
+            try:
+                if not _is_intact(source):
+                    raise BusinessRuleError(error_messages.BACKUP_INTEGRITY_FAILED)
+                if get_version(source) > LATEST_VERSION:
+                    raise BusinessRuleError(error_messages.BACKUP_INCOMPATIBLE_VERSION)
+            except sqlite3.DatabaseError as e:
+                raise BusinessRuleError(error_messages.BACKUP_INTEGRITY_FAILED) from e
+
+            # not rotated: rotation could drop the very backup being restored
+            safety_backup = create_backup(rotate=False)
+
+            target = database.create_connection()
+            try:
+                previous_versions = _read_table_versions(target)
+                # single step: the restore must not interleave with writes
+                source.backup(target)
+                run_migrations(target)
+                _advance_table_versions(target, previous_versions)
+            except sqlite3.Error as e:
+                raise DatabaseError(error_messages.BACKUP_RESTORE_FAILED) from e
+            finally:
+                target.close()
+        finally:
+            source.close()
+
+    # pooled connections were opened on the old content
+    database.close_pool()
+    logger.info("Backup restored: %s (previous data saved as %s)", name, safety_backup.name)
+    return safety_backup
+
+class BackupScheduler:
+    """Background thread taking a backup every `interval` seconds."""
+
+    def __init__(self, interval: float = BACKUP_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _next_delay(self) -> float:
+        # the app may restart often: count from the newest backup, not from startup
+        backups = list_backups()
+        if not backups:
+            return 0
+
+        age = time.time() - backups[0].created_at.timestamp()
+        return max(self.interval - age, 0)
+
+    def _run(self):
+        delay = self._next_delay()
+        while not self._stop.wait(delay):
+            try:
+                create_backup()
+            except Exception:
+                logger.exception("Scheduled backup failed")
+            delay = self.interval
+
+_scheduler: BackupScheduler | None = None
+
+def start_backup_scheduler():
+    """Start the automatic backups (no-op when `BACKUP_INTERVAL` is 0)."""
+    global _scheduler
+    if BACKUP_INTERVAL <= 0 or _scheduler is not None:
+        return
+
+    _scheduler = BackupScheduler(BACKUP_INTERVAL)
+    _scheduler.start()
+
+def stop_backup_scheduler():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.stop()
+        _scheduler = None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Back up and restore the database.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("create", help="take a new backup")
+    subparsers.add_parser("list", help="list stored backups")
+    subparsers.add_parser("verify", help="check the integrity of a backup").add_argument("name")
+    subparsers.add_parser("restore", help="restore a backup (current data is saved first)").add_argument("name")
+    args = parser.parse_args()
+
+    database.init_database()
+
+    try:
+        if args.command == "create":
+            backup = create_backup()
+            print(f"✅ Backup created: {backup.name} ({backup.size} bytes)")
+        elif args.command == "list":
+            for backup in list_backups():
+                print(f"{backup.name}  {backup.size:>12} bytes  {backup.created_at:%Y-%m-%d %H:%M:%S}")
+        elif args.command == "verify":
+            if not verify_backup(args.name):
+                print(f"⚠️ {args.name} is corrupted.")
+                raise SystemExit(1)
+            print(f"✅ {args.name} is intact.")
+        elif args.command == "restore":
+            safety_backup = restore_backup(args.name)
+            print(f"✅ Restored {args.name}. Previous data saved as {safety_backup.name}.")
+    except (NotFoundError, BusinessRuleError, DatabaseError) as e:
+        print(f"⚠️ {e}")
+        raise SystemExit(1)
@@ -0,0 +1,78 @@
+"""
+Read CSV/JSONL files for the bulk import and run it from the command line.
+
+Files are read line by line, so memory use does not depend on the file size.
+Each row may have a `type` column/key (client, purchase or payment); when the
+whole file holds one kind of record use `--entity` instead.
+
+Usage (from backend/):
+    python -m app.utils.bulk_import ledger.jsonl
+    python -m app.utils.bulk_import clients.csv --entity client
+"""
+import csv
+import json
+from pathlib import Path
+from typing import IO, Iterator
+from app.services.bulk_service import Record
+from app.utils.exceptions import ValidationError, error_messages
+
+BULK_FORMATS = {
+    ".csv": "csv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+}
+
+def detect_format(filename: str | None, format: str | None = None) -> str:
+    """Explicit `format` wins; otherwise it is taken from the file extension."""
+    if format is None and filename:
+        format = BULK_FORMATS.get(Path(filename).suffix.lower())
+
+    if format not in BULK_FORMATS.values():
+        raise ValidationError(error_messages.BULK_INVALID_FORMAT)
+
+    return format
+
+def iter_records(stream: IO[str], format: str) -> Iterator[Record]:
+    """Yield `(line, record)` pairs; lines that cannot be parsed yield the error instead."""
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line, text in enumerate(stream, start=1):
+        if not text.strip():
+            continue
+        try:
+            yield line, json.loads(text)
+        except ValueError as e:
+            yield line, e
+
+if __name__ == "__main__":
+    import argparse
+    from app.database import init_database
+    from app.services.bulk_service import import_records
+
+    parser = argparse.ArgumentParser(description="Bulk import clients, purchases and payments.")
+    parser.add_argument("file", type=Path, help="CSV or JSONL file")
+    parser.add_argument("--format", choices=sorted(set(BULK_FORMATS.values())), help="file format (default: from extension)")
+    parser.add_argument("--entity", help="record type of rows without a `type` column")
+    args = parser.parse_args()
+
+    init_database()
+
+    format = detect_format(args.file.name, args.format)
+    with args.file.open(encoding="utf-8-sig", newline="") as stream:
+        report = import_records(iter_records(stream, format), default_type=args.entity)
+
+    imported = ", ".join(f"{count} {name}(s)" for name, count in report.imported.items())
+    print(f"✅ Imported {imported}.")
+
+    if report.failed:
+        print(f"⚠️ {report.failed} row(s) failed:")
+        for error in report.errors:
+            print(f"   line {error['line']} ({error['type'] or '?'}): {error['error']}")
+        if report.errors_truncated:
+            print("   ...")
+
+    raise SystemExit(1 if report.failed else 0)
@@ -0,0 +1,51 @@
+"""
+Conditional GET (ETag / If-None-Match) for the read routes.
+
+The ETag of a response is derived from the request URL and the change
+counters of the tables the route reads (`table_versions`, kept by triggers),
+plus whatever else the response depends on (`key`, e.g. the current date).
+When the client already has that version the route answers 304 before running
+its query or serializing anything.
+"""
+import hashlib
+from typing import Callable
+from fastapi import Depends, HTTPException, Request, Response
+from app.executor import run_read
+from app.repositories.version_repository import get_table_versions
+from app.utils.exceptions import handle_service_exceptions
+
+def make_etag(request: Request, versions: dict[str, int], extra: str = "") -> str:
+    key = f"{request.url.path}?{request.url.query}|{extra}|" + ",".join(f"{name}:{versions.get(name, 0)}" for name in sorted(versions))
+    return '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        # If-None-Match uses the weak comparison
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+def conditional_get(*tables: str, key: Callable[[Request], str] | None = None):
+    """
+    Dependency: set the ETag of the route and answer 304 when the client's copy is current.
+
+    `key` returns the part of the response state that is neither in the URL
+    nor in the tables (it goes into the ETag as well).
+    """
+    @handle_service_exceptions
+    async def check_etag(request: Request, response: Response):
+        versions = await run_read(get_table_versions, tables)
+        etag = make_etag(request, versions, key(request) if key else "")
+
+        # clients must revalidate, but a 304 costs only the counters lookup
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+
+        response.headers.update(headers)
+
+    return Depends(check_etag)
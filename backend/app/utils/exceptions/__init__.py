@@ -1,3 +1,3 @@
-from .exceptions import (BaseClassError, BusinessRuleError, NotFoundError, ValidationError, DatabaseError)
+from .exceptions import (BaseClassError, BusinessRuleError, NotFoundError, ValidationError, DatabaseError, ServiceUnavailableError)
 from .error_messages import *
 from .http_exceptions import handle_service_exceptions
@@ -3,6 +3,7 @@ CLIENT_NOT_FOUND = "Cliente não encontrado."
 CLIENT_ALREADY_EXISTS = "Um cliente com esse apelido já existe."
 CLIENT_INVALID_NAME = "Nome inválido. Evite números e símbolos."
 CLIENT_DELETE_FAILED = "Não foi possível desativar o cliente."
+CLIENT_ALREADY_ENABLED = "Cliente já está ativo."
 
 # === Purchases ===
 PURCHASE_NOT_FOUND = "Compra não encontrada."
@@ -26,9 +27,50 @@ PAYMENT_CREATION_FAILED = "Não é possível adicionar pagamento a uma compra de
 PAYMENT_ACTIVATION_FAILED = "Não é possível ativar pagamento de uma compra desativada."
 PAYMENT_PURCHASE_CREATION_FAILED = "Não foi possível criar o pagamento junto com a compra."
 PAYMENT_INVALID_ACTIVATION_ROUTE = "Chamada inválida. Utilize a rota correta para a ativação ou desativação do pagamento."
+PAYMENT_NO_OPEN_PURCHASES = "O cliente não possui compras em aberto."
+PAYMENT_EXCEEDS_OPEN_AMOUNT = "O valor do pagamento é maior que o valor em aberto das compras."
+PAYMENT_ALLOCATION_NOT_OPEN = "O plano de pagamento inclui uma compra que não está em aberto ou não pertence ao cliente."
+PAYMENT_ALLOCATION_DUPLICATED = "O plano de pagamento repete uma compra."
+PAYMENT_ALLOCATION_MISMATCH = "A soma do plano de pagamento difere do valor do pagamento."
+
+# === Search ===
+SEARCH_INVALID_QUERY = "Termo de busca inválido. Informe ao menos uma letra ou número."
+SEARCH_INVALID_TYPE = "Tipo de busca inválido. Use 'client', 'purchase' ou 'payment'."
+
+# === Batch reads ===
+BATCH_INVALID_IDS = "Lista de ids inválida. Use números separados por vírgula (ex.: 1,2,3)."
+BATCH_TOO_MANY_IDS = "Muitos itens em uma única consulta em lote."
+
+# === Bulk import ===
+BULK_INVALID_TYPE = "Tipo de registro inválido. Use 'client', 'purchase' ou 'payment'."
+BULK_INVALID_FORMAT = "Formato de arquivo inválido. Use 'csv' ou 'jsonl'."
+BULK_INVALID_ROW = "Linha inválida: esperado um objeto JSON."
+BULK_MISSING_CLIENT = "Informe client_id ou client_nickname da compra."
+BULK_MISSING_PURCHASE = "Informe purchase_id ou note_number do pagamento."
+
+# === Export ===
+EXPORT_INVALID_ENTITY = "Tipo de exportação inválido. Use 'clients', 'purchases' ou 'payments'."
+EXPORT_INVALID_FORMAT = "Formato de exportação inválido. Use 'csv' ou 'ndjson'."
+
+# === Backup ===
+BACKUP_NOT_FOUND = "Backup não encontrado."
+BACKUP_INTEGRITY_FAILED = "O arquivo de backup está corrompido (falha na verificação de integridade)."
+BACKUP_INCOMPATIBLE_VERSION = "O backup foi criado por uma versão mais nova do sistema."
+BACKUP_FAILED = "Não foi possível criar o backup."
+BACKUP_RESTORE_FAILED = "Não foi possível restaurar o backup."
+
+# === Reports ===
+REPORT_INVALID_DATE = "Data de referência do relatório inválida."
+STATEMENT_INVALID_RANGE = "Período do extrato inválido: o início deve ser anterior ao fim."
+
+# === Printing ===
+PRINT_INVALID_MONTH = "Mês inválido. Use o formato AAAA-MM."
+PRINT_NO_NOTES = "Nenhuma nota encontrada no mês informado."
 
 # === Database / Generic ===
 DATABASE_ERROR = "Erro inesperado no banco de dados."
 FOREIGN_KEY_ERROR = "Uma referência estrangeira não existe. Utilize um ID correto."
 DATA_FIELDS_EMPTY = "Nenhum campo válido fornecido para a atualização do recurso."
+SERVICE_BUSY = "Servidor ocupado. Tente novamente em instantes."
+INVALID_CURSOR = "Cursor de paginação inválido."
 RESOURCE_CREATION_VALUE_ERROR = "Campos fornecidos para a criação ou atualização possuem valores inválidos ou do tipo incorreto."
@@ -20,3 +20,8 @@ class ValidationError(BaseClassError):
 class DatabaseError(BaseClassError):
     """Raised for unexpected database-related issues."""
     pass
+
+
+class ServiceUnavailableError(BaseClassError):
+    """Raised when the database executor is saturated and the request should be retried later."""
+    pass
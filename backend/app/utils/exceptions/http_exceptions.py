@@ -1,19 +1,42 @@
 import functools
+import inspect
 from fastapi import HTTPException
-from .exceptions import NotFoundError, BusinessRuleError, ValidationError, DatabaseError
+from config import DB_RETRY_AFTER
+from app.instrumentation import endpoint_finished
+from .exceptions import NotFoundError, BusinessRuleError, ValidationError, DatabaseError, ServiceUnavailableError
+
+def to_http_exception(e: Exception) -> HTTPException | None:
+    """Translate a service exception into its HTTP error (None if it is not one)."""
+    if isinstance(e, NotFoundError):
+        return HTTPException(status_code=404, detail=str(e))
+    if isinstance(e, ValidationError):
+        return HTTPException(status_code=400, detail=str(e))
+    if isinstance(e, BusinessRuleError):
+        return HTTPException(status_code=409, detail=str(e))
+    if isinstance(e, DatabaseError):
+        return HTTPException(status_code=500, detail=str(e))
+    if isinstance(e, ServiceUnavailableError):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(DB_RETRY_AFTER)})
+    return None
 
 def handle_service_exceptions(func):
-    """Decorator to translate service exceptions into HTTP errors."""
+    """Decorator to translate service exceptions into HTTP errors (sync and async routes)."""
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            try:
+                result = await func(*args, **kwargs)
+            except (NotFoundError, ValidationError, BusinessRuleError, DatabaseError, ServiceUnavailableError) as e:
+                raise to_http_exception(e)
+            # what follows is FastAPI serializing the result (Server-Timing)
+            endpoint_finished()
+            return result
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
         try:
             return func(*args, **kwargs)
-        except NotFoundError as e:
-            raise HTTPException(status_code=404, detail=str(e))
-        except ValidationError as e:
-            raise HTTPException(status_code=400, detail=str(e))
-        except BusinessRuleError as e:
-            raise HTTPException(status_code=409, detail=str(e))
-        except DatabaseError as e:
-            raise HTTPException(status_code=500, detail=str(e))
+        except (NotFoundError, ValidationError, BusinessRuleError, DatabaseError, ServiceUnavailableError) as e:
+            raise to_http_exception(e)
     return wrapper
@@ -1,10 +1,17 @@
 import unicodedata
+from config import BATCH_MAX_IDS
+from app.utils.exceptions import ValidationError, error_messages
 
 ALLOWED_EXTRA = set(" .'-")
 
 def filter_allowed(data: dict, allowed: set[str]) -> dict:
     return {k: v for k, v in data.items() if k in allowed}
 
+def key_by(keys: list, items: list, attribute: str = "id") -> dict:
+    """Map each of `keys` (in order) to the item whose `attribute` equals it, or None when there is none."""
+    found = {getattr(item, attribute): item for item in items}
+    return {key: found.get(key) for key in keys}
+
 def is_valid_name(name: str) -> bool:
     for ch in name:
         if ch in ALLOWED_EXTRA:
@@ -18,3 +25,18 @@ def is_valid_name(name: str) -> bool:
         return False
 
     return True
+
+def parse_ids(text: str, max_ids: int = BATCH_MAX_IDS) -> list[int]:
+    """Parse the `ids` query parameter ("1,2,3") of the batch reads, dropping repeated ids."""
+    try:
+        ids = [int(part) for part in text.split(",") if part.strip()]
+    except ValueError as e:
+        raise ValidationError(error_messages.BATCH_INVALID_IDS) from e
+
+    ids = list(dict.fromkeys(ids))
+    if not ids or any(entity_id < 1 for entity_id in ids):
+        raise ValidationError(error_messages.BATCH_INVALID_IDS)
+    if len(ids) > max_ids:
+        raise ValidationError(error_messages.BATCH_TOO_MANY_IDS)
+
+    return ids
@@ -0,0 +1,44 @@
+import base64
+import binascii
+from app.utils.exceptions import ValidationError, error_messages
+
+def encode_cursor(*values: int | float) -> str:
+    """Encode the sort key of the last listed row into an opaque cursor."""
+    raw = ",".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str | None, *types: type) -> tuple | None:
+    """
+    Decode a cursor produced by `encode_cursor` back into its typed values.
+
+    Defaults to the `(created_at, id)` key used by the list routes.
+    """
+    if cursor is None:
+        return None
+
+    types = types or (int, int)
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        parts = base64.urlsafe_b64decode(padded.encode()).decode().split(",")
+        if len(parts) != len(types):
+            raise ValueError(cursor)
+
+        return tuple(cast(part) for cast, part in zip(types, parts))
+    except (ValueError, binascii.Error, UnicodeDecodeError) as e:
+        raise ValidationError(error_messages.INVALID_CURSOR) from e
+
+def next_cursor(items: list, limit: int | None) -> str | None:
+    """Cursor for the page after `items`, or None when this is the last page."""
+    if not limit or len(items) < limit:
+        return None
+
+    last = items[-1]
+    return encode_cursor(last.created_ts, last.id)
+
+def next_row_cursor(rows: list, limit: int | None, *positions: int) -> str | None:
+    """`next_cursor` for plain rows: the cursor holds the values at `positions` of the last row."""
+    if not limit or len(rows) < limit:
+        return None
+
+    last = rows[-1]
+    return encode_cursor(*(last[position] for position in positions))
@@ -0,0 +1,468 @@
+"""
+PDF rendering of purchase notes and payment receipts.
+
+Documents use the standard Helvetica fonts (nothing to embed) and are written
+as plain PDF 1.4 by hand, so printing needs no extra dependency:
+
+- each layout is a template compiled once: its static part (titles, labels,
+  rules) becomes a ready content-stream fragment and rendering only adds the
+  field values;
+- text widths, used to right-align amounts and wrap descriptions, come from
+  the Helvetica metrics and are cached per string;
+- batch printing splits the documents in chunks rendered by a process pool,
+  so a long print run uses other cores instead of the API threads.
+
+Usage (from backend/):
+    python -m app.utils.printer notes 2025-01 -o notas-2025-01.pdf
+"""
+import asyncio
+import functools
+import multiprocessing
+import threading
+import unicodedata
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List, Sequence, Tuple
+from config import STORE_NAME, PRINT_WORKERS, PRINT_DOCUMENTS_PER_TASK
+from app.models import Payment, Purchase
+
+# A5 portrait, in points
+PAGE_WIDTH = 420
+PAGE_HEIGHT = 595
+MARGIN = 36
+RIGHT = PAGE_WIDTH - MARGIN
+
+# resource name -> base font (standard 14 fonts, WinAnsi covers Portuguese)
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+# Helvetica AFM widths (1/1000 em) of the printable ASCII range, from 32 (space) to 126 (~)
+_WIDTHS = {
+    "F1": (
+        278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+        1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+        333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+        556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+    ),
+    "F2": (
+        278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+        556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+        975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+        667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+        333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+        611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+    ),
+}
+_DEFAULT_WIDTH = 556
+
+STATUS_LABELS = {"pending": "Pendente", "partial": "Parcial", "paid": "Paga"}
+
+# ===== Text =====
+def _char_width(char: str, font: str) -> int:
+    code = ord(char)
+    if not 32 <= code <= 126:
+        # accented letters have the width of their base letter
+        code = ord(unicodedata.normalize("NFD", char)[0])
+    if 32 <= code <= 126:
+        return _WIDTHS[font][code - 32]
+    return _DEFAULT_WIDTH
+
+@functools.lru_cache(maxsize=8192)
+def text_width(text: str, font: str = "F1", size: float = 10) -> float:
+    """Width of `text` in points."""
+    return sum(_char_width(char, font) for char in text) * size / 1000
+
+@functools.lru_cache(maxsize=1024)
+def wrap_text(text: str, max_width: float, font: str = "F1", size: float = 10) -> Tuple[str, ...]:
+    """Split `text` in lines no wider than `max_width` (breaking at spaces when possible)."""
+    lines = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate, font, size) <= max_width:
+            current = candidate
+            continue
+
+        if current:
+            lines.append(current)
+        # a single word longer than the line is cut
+        while text_width(word, font, size) > max_width and len(word) > 1:
+            cut = len(word) - 1
+            while cut > 1 and text_width(word[:cut], font, size) > max_width:
+                cut -= 1
+            lines.append(word[:cut])
+            word = word[cut:]
+        current = word
+
+    if current:
+        lines.append(current)
+    return tuple(lines)
+
+def _encode(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+def _text_op(text: str, x: float, y: float, font: str, size: float, align: str = "left") -> bytes:
+    if align == "right":
+        x -= text_width(text, font, size)
+    elif align == "center":
+        x -= text_width(text, font, size) / 2
+    return b"BT /%s %g Tf %.2f %.2f Td (%s) Tj ET\n" % (font.encode(), size, x, y, _encode(text))
+
+def _line_op(x1: float, y1: float, x2: float, y2: float, width: float = 0.5) -> bytes:
+    return b"%g w %.2f %.2f m %.2f %.2f l S\n" % (width, x1, y1, x2, y2)
+
+def format_money(value: float) -> str:
+    """1234.5 -> 'R$ 1.234,50'."""
+    text = f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"R$ {text}"
+
+def format_date(value: datetime | None) -> str:
+    return value.strftime("%d/%m/%Y") if value else "-"
+
+# ===== Templates =====
+@dataclass(frozen=True)
+class Slot:
+    x: float
+    y: float
+    font: str = "F1"
+    size: float = 10
+    align: str = "left"
+
+class Template:
+    """A page layout: the static drawing is compiled once, the slots are filled per page."""
+
+    def __init__(self, static: Sequence[tuple], slots: Dict[str, Slot]):
+        ops = []
+        for kind, *args in static:
+            if kind == "text":
+                ops.append(_text_op(*args))
+            elif kind == "line":
+                ops.append(_line_op(*args))
+        self.static = b"".join(ops)
+        self.slots = slots
+
+    def render(self, values: Dict[str, str], extra: Iterable[bytes] = ()) -> bytes:
+        """Page content stream (compressed) with `values` in the slots and `extra` operators."""
+        ops = [self.static]
+        for name, value in values.items():
+            slot = self.slots[name]
+            ops.append(_text_op(value, slot.x, slot.y, slot.font, slot.size, slot.align))
+        ops.extend(extra)
+        return zlib.compress(b"".join(ops))
+
+def _header(title: str) -> List[tuple]:
+    return [
+        ("text", STORE_NAME, MARGIN, 548, "F2", 16),
+        ("text", title, RIGHT, 550, "F2", 11, "right"),
+        ("line", MARGIN, 538, RIGHT, 538, 1),
+    ]
+
+def _footer(signature: str) -> List[tuple]:
+    return [
+        ("line", MARGIN, 64, MARGIN + 190, 64),
+        ("text", signature, MARGIN, 52, "F1", 8),
+    ]
+
+# columns of the payments table of a note
+_TABLE_COLUMNS = ((MARGIN, "Data", "left"), (MARGIN + 80, "Recibo", "left"),
+                  (MARGIN + 190, "Forma", "left"), (RIGHT, "Valor", "right"))
+_ROW_HEIGHT = 14
+_TABLE_BOTTOM = 88
+_DESCRIPTION_LINES = 3
+
+def _table_header(y: float) -> List[tuple]:
+    return [("text", label, x, y, "F2", 9, align) for x, label, align in _TABLE_COLUMNS] + [
+        ("line", MARGIN, y - 5, RIGHT, y - 5),
+    ]
+
+@functools.lru_cache(maxsize=None)
+def get_template(name: str) -> Template:
+    """Compiled template by name (compiled on first use, once per process)."""
+    page_slots = {"page": Slot(RIGHT, 52, "F1", 8, "right")}
+
+    if name == "note":
+        return Template(
+            _header("NOTA DE COMPRA") + [
+                ("text", "Nota nº", MARGIN, 516, "F2", 9),
+                ("text", "Data", 250, 516, "F2", 9),
+                ("text", "Cliente", MARGIN, 498, "F2", 9),
+                ("text", "Descrição", MARGIN, 480, "F2", 9),
+                ("line", MARGIN, 432, RIGHT, 432),
+                ("text", "Total", MARGIN, 414, "F2", 10),
+                ("text", "Pago", MARGIN, 398, "F1", 10),
+                ("text", "Em aberto", MARGIN, 382, "F2", 10),
+                ("text", "Situação", MARGIN, 366, "F1", 10),
+                ("text", "Pagamentos", MARGIN, 338, "F2", 10),
+            ] + _table_header(320) + _footer("Assinatura do cliente"),
+            {
+                "note_number": Slot(92, 516),
+                "date": Slot(280, 516),
+                "client": Slot(92, 498),
+                "total": Slot(RIGHT, 414, "F2", 10, "right"),
+                "paid": Slot(RIGHT, 398, "F1", 10, "right"),
+                "open": Slot(RIGHT, 382, "F2", 10, "right"),
+                "status": Slot(RIGHT, 366, "F1", 10, "right"),
+                **page_slots,
+            },
+        )
+    if name == "note_continued":
+        return Template(
+            _header("NOTA DE COMPRA") + [
+                ("text", "Nota nº", MARGIN, 516, "F2", 9),
+                ("text", "Pagamentos (continuação)", MARGIN, 494, "F2", 10),
+            ] + _table_header(476) + _footer("Assinatura do cliente"),
+            {"note_number": Slot(92, 516), **page_slots},
+        )
+    if name == "receipt":
+        return Template(
+            _header("RECIBO") + [
+                ("text", "Recibo nº", MARGIN, 516, "F2", 9),
+                ("text", "Data", 250, 516, "F2", 9),
+                ("text", "Recebemos de", MARGIN, 490, "F1", 10),
+                ("text", "a importância de", MARGIN, 462, "F1", 10),
+                ("line", MARGIN, 440, RIGHT, 440),
+                ("text", "Forma de pagamento", MARGIN, 420, "F2", 9),
+                ("text", "Referente à nota", MARGIN, 404, "F2", 9),
+                ("text", "Descrição", MARGIN, 388, "F2", 9),
+                ("line", MARGIN, 360, RIGHT, 360),
+                ("text", "Total da nota", MARGIN, 342, "F1", 10),
+                ("text", "Total pago", MARGIN, 326, "F1", 10),
+                ("text", "Saldo em aberto", MARGIN, 310, "F2", 10),
+            ] + _footer("Assinatura do recebedor"),
+            {
+                "receipt_number": Slot(92, 516),
+                "date": Slot(280, 516),
+                "client": Slot(110, 490, "F2", 11),
+                "amount": Slot(110, 460, "F2", 14),
+                "method": Slot(140, 420),
+                "note_number": Slot(140, 404),
+                "total": Slot(RIGHT, 342, "F1", 10, "right"),
+                "paid": Slot(RIGHT, 326, "F1", 10, "right"),
+                "open": Slot(RIGHT, 310, "F2", 10, "right"),
+                **page_slots,
+            },
+        )
+    raise KeyError(name)
+
+# ===== Documents =====
+@dataclass
+class NoteDocument:
+    purchase: Purchase
+    client_name: str
+    payments: List[Payment] = field(default_factory=list)
+
+@dataclass
+class ReceiptDocument:
+    payment: Payment
+    purchase: Purchase
+    client_name: str
+
+def _payment_row(payment: Payment, y: float) -> bytes:
+    values = (
+        format_date(payment.payment_date or payment.created_at),
+        payment.receipt_number or "-",
+        payment.method or "-",
+        format_money(payment.amount),
+    )
+    return b"".join(
+        _text_op(value, x, y, "F1", 9, align)
+        for (x, _, align), value in zip(_TABLE_COLUMNS, values)
+    )
+
+def render_note_pages(note: NoteDocument) -> List[bytes]:
+    """Content streams of the pages of one purchase note (the payments table may continue on more pages)."""
+    purchase = note.purchase
+    rows = [payment for payment in note.payments if payment.is_active]
+
+    first_rows = int((320 - 18 - _TABLE_BOTTOM) // _ROW_HEIGHT)
+    next_rows = int((476 - 18 - _TABLE_BOTTOM) // _ROW_HEIGHT)
+    chunks = [rows[:first_rows]]
+    for start in range(first_rows, len(rows), next_rows):
+        chunks.append(rows[start:start + next_rows])
+
+    description = wrap_text(purchase.description or "-", RIGHT - 92)
+    if len(description) > _DESCRIPTION_LINES:
+        description = description[:_DESCRIPTION_LINES - 1] + (description[_DESCRIPTION_LINES - 1] + " ...",)
+
+    pages = []
+    for index, chunk in enumerate(chunks):
+        page = f"Página {index + 1}/{len(chunks)}"
+        top = 320 if index == 0 else 476
+        extra = [_payment_row(payment, top - 18 - i * _ROW_HEIGHT) for i, payment in enumerate(chunk)]
+
+        if index == 0:
+            extra += [_text_op(line, 92, 480 - i * 13, "F1", 10) for i, line in enumerate(description)]
+            if not chunk:
+                extra.append(_text_op("Nenhum pagamento registrado.", MARGIN, top - 18, "F1", 9))
+
+            pages.append(get_template("note").render({
+                "note_number": purchase.note_number or "-",
+                "date": format_date(purchase.created_at),
+                "client": note.client_name,
+                "total": format_money(purchase.total_value),
+                "paid": format_money(purchase.total_paid_value),
+                "open": format_money(max(purchase.total_value - purchase.total_paid_value, 0)),
+                "status": STATUS_LABELS.get(purchase.status, purchase.status),
+                "page": page,
+            }, extra))
+        else:
+            pages.append(get_template("note_continued").render({
+                "note_number": purchase.note_number or "-",
+                "page": page,
+            }, extra))
+
+    return pages
+
+def render_receipt_pages(receipt: ReceiptDocument) -> List[bytes]:
+    payment = receipt.payment
+    purchase = receipt.purchase
+
+    description = wrap_text(payment.description or "-", RIGHT - 140)[:2]
+    extra = [_text_op(line, 140, 388 - i * 13, "F1", 10) for i, line in enumerate(description)]
+
+    return [get_template("receipt").render({
+        "receipt_number": payment.receipt_number or "-",
+        "date": format_date(payment.payment_date or payment.created_at),
+        "client": receipt.client_name,
+        "amount": format_money(payment.amount),
+        "method": payment.method or "-",
+        "note_number": purchase.note_number or "-",
+        "total": format_money(purchase.total_value),
+        "paid": format_money(purchase.total_paid_value),
+        "open": format_money(max(purchase.total_value - purchase.total_paid_value, 0)),
+        "page": "Página 1/1",
+    }, extra)]
+
+# ===== PDF file =====
+def build_pdf(pages: Iterable[bytes], title: str = "") -> bytes:
+    """Assemble compressed page content streams into a PDF file."""
+    pages = list(pages)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")
+    pages_id = add(b"")
+    font_refs = b" ".join(
+        b"/%s %d 0 R" % (
+            name.encode(),
+            add(b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % base.encode())
+        )
+        for name, base in FONTS.items()
+    )
+    info = add(b"<< /Title (%s) /Producer (NotaReal Fiados) >>" % _encode(title))
+
+    kids = []
+    for content in pages:
+        content_id = add(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(content), content))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (pages_id, PAGE_WIDTH, PAGE_HEIGHT, font_refs, content_id)
+        ))
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids)
+    )
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1, catalog, info, xref
+    )
+    return bytes(out)
+
+def render_note(note: NoteDocument) -> bytes:
+    return build_pdf(render_note_pages(note), f"Nota {note.purchase.note_number}")
+
+def render_receipt(receipt: ReceiptDocument) -> bytes:
+    return build_pdf(render_receipt_pages(receipt), f"Recibo {receipt.payment.receipt_number}")
+
+# ===== Batch printing =====
+def _render_notes_chunk(notes: List[NoteDocument]) -> List[bytes]:
+    # runs in a worker process
+    return list(chain.from_iterable(render_note_pages(note) for note in notes))
+
+_print_pool: ProcessPoolExecutor | None = None
+_print_pool_lock = threading.Lock()
+
+def get_print_pool() -> ProcessPoolExecutor:
+    global _print_pool
+    if _print_pool is None:
+        with _print_pool_lock:
+            if _print_pool is None:
+                # spawn: forking a process that runs threads (executor, writer, pool) is unsafe
+                _print_pool = ProcessPoolExecutor(
+                    max_workers=PRINT_WORKERS, mp_context=multiprocessing.get_context("spawn")
+                )
+    return _print_pool
+
+def shutdown_print_pool():
+    """Stop the rendering processes (application shutdown)."""
+    global _print_pool
+    with _print_pool_lock:
+        if _print_pool is not None:
+            _print_pool.shutdown(wait=True, cancel_futures=True)
+            _print_pool = None
+
+async def render_notes_batch(notes: List[NoteDocument], title: str = "") -> bytes:
+    """
+    Render many notes into one PDF, `PRINT_DOCUMENTS_PER_TASK` notes per task
+    on the process pool (on a thread when `PRINT_WORKERS` is 0).
+    """
+    chunks = [notes[i:i + PRINT_DOCUMENTS_PER_TASK] for i in range(0, len(notes), PRINT_DOCUMENTS_PER_TASK)]
+
+    if PRINT_WORKERS <= 0:
+        results = [await asyncio.to_thread(_render_notes_chunk, chunk) for chunk in chunks]
+    else:
+        loop = asyncio.get_running_loop()
+        pool = get_print_pool()
+        results = await asyncio.gather(*(loop.run_in_executor(pool, _render_notes_chunk, chunk) for chunk in chunks))
+
+    return await asyncio.to_thread(build_pdf, chain.from_iterable(results), title)
+
+if __name__ == "__main__":
+    import argparse
+    from pathlib import Path
+    from app import database
+    from app.services.print_service import get_month_notes, parse_month
+    from app.utils.exceptions import ValidationError
+
+    parser = argparse.ArgumentParser(description="Print purchase notes to PDF.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    notes_parser = subparsers.add_parser("notes", help="every note of a month in one PDF")
+    notes_parser.add_argument("month", help="YYYY-MM")
+    notes_parser.add_argument("-o", "--output", help="output file (default: notas-YYYY-MM.pdf)")
+    args = parser.parse_args()
+
+    database.init_database()
+
+    try:
+        year, month = parse_month(args.month)
+    except ValidationError as e:
+        print(f"⚠️ {e}")
+        raise SystemExit(1)
+
+    notes = get_month_notes(year, month)
+    try:
+        pdf = asyncio.run(render_notes_batch(notes, f"Notas {args.month}"))
+    finally:
+        shutdown_print_pool()
+
+    output = Path(args.output or f"notas-{args.month}.pdf")
+    output.write_bytes(pdf)
+    print(f"✅ {len(notes)} note(s) written to {output}.")
@@ -0,0 +1,40 @@
+"""
+Verify (and optionally repair) purchase totals against their active payments.
+
+Usage (from backend/):
+    python -m app.utils.repair_totals           # only report inconsistencies
+    python -m app.utils.repair_totals --repair  # fix them in one aggregate UPDATE
+"""
+import argparse
+from app.database import init_database
+from app.services.purchase_service import verify_purchase_totals, repair_purchase_totals
+
+def run(repair: bool = False) -> int:
+    init_database()
+
+    inconsistent = verify_purchase_totals()
+    if not inconsistent:
+        print("✅ All purchase totals are consistent.")
+        return 0
+
+    print(f"⚠️ {len(inconsistent)} purchase(s) with inconsistent totals:")
+    for row in inconsistent:
+        print(
+            f"   id={row['id']}: paid={row['total_paid_value']} status={row['status']} "
+            f"→ expected paid={row['expected_paid_value']} status={row['expected_status']}"
+        )
+
+    if not repair:
+        print("\nRun again with --repair to fix them.")
+        return 1
+
+    repaired = repair_purchase_totals()
+    print(f"\n🔧 Repaired {repaired} purchase(s).")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verify and repair purchase totals.")
+    parser.add_argument("--repair", action="store_true", help="recompute the inconsistent totals")
+    args = parser.parse_args()
+
+    raise SystemExit(run(args.repair))
@@ -0,0 +1,188 @@
+"""
+Single-writer group commit.
+
+Write operations from the routes are queued to one writer thread, which
+applies them in batches: up to `WRITE_BATCH_SIZE` operations, collected for at
+most `WRITE_BATCH_WAIT` seconds, run inside a single `BEGIN IMMEDIATE ...
+COMMIT`. The batch pays one WAL commit instead of one per operation.
+
+Each operation runs in its own SAVEPOINT within the batch, with the batch
+connection bound to its context, so the services' `transaction()` blocks join
+it unchanged. A failing operation is rolled back to its savepoint and only its
+caller gets the error; results are delivered after the batch commits.
+"""
+import asyncio
+import contextvars
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, TypeVar
+from config import WRITE_BATCH_SIZE, WRITE_BATCH_WAIT, DB_MAX_PENDING_WRITES
+from app import metrics
+from app.database import bind_connection, get_pool, sqlite3
+from app.utils.exceptions import DatabaseError, ServiceUnavailableError, error_messages
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+@dataclass
+class WriteOperation:
+    func: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    # runs alone, outside of a batch transaction (it manages its own transactions)
+    exclusive: bool = False
+    context: contextvars.Context = field(default_factory=contextvars.copy_context)
+    future: Future = field(default_factory=Future)
+
+class GroupCommitWriter:
+    def __init__(self, max_batch: int = WRITE_BATCH_SIZE, max_wait: float = WRITE_BATCH_WAIT,
+                 max_pending: int = DB_MAX_PENDING_WRITES):
+        self.max_batch = max(max_batch, 1)
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+
+        self._queue: queue.Queue[WriteOperation | None] = queue.Queue()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def submit(self, func: Callable[..., T], *args: Any, exclusive: bool = False, **kwargs: Any) -> Future:
+        """Queue a write operation; the future resolves once its batch is committed."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.executor_rejected.inc("db-writer")
+                raise ServiceUnavailableError(error_messages.SERVICE_BUSY)
+            self._pending += 1
+
+        operation = WriteOperation(func, args, kwargs, exclusive)
+        operation.future.add_done_callback(lambda _: self._done())
+        self._queue.put(operation)
+        return operation.future
+
+    async def run(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    async def run_exclusive(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        return await asyncio.wrap_future(self.submit(func, *args, exclusive=True, **kwargs))
+
+    def shutdown(self):
+        """Apply the queued operations and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            operation = self._queue.get()
+            if operation is None:
+                break
+
+            if operation.exclusive:
+                self._apply_exclusive(operation)
+                continue
+
+            batch = [operation]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                try:
+                    remaining = deadline - time.monotonic()
+                    next_operation = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if next_operation is None:
+                    stopping = True
+                    break
+                if next_operation.exclusive:
+                    # keep the submission order: commit this batch first
+                    self._apply_batch(batch)
+                    batch = []
+                    self._apply_exclusive(next_operation)
+                    break
+                batch.append(next_operation)
+
+            if batch:
+                self._apply_batch(batch)
+
+    @staticmethod
+    def _apply_exclusive(operation: WriteOperation):
+        try:
+            result = operation.context.run(operation.func, *operation.args, **operation.kwargs)
+        except BaseException as e:
+            operation.future.set_exception(e)
+        else:
+            operation.future.set_result(result)
+
+    def _apply_batch(self, batch: List[WriteOperation]):
+        outcomes: List[tuple[bool, Any]] = []
+        pool = get_pool()
+        try:
+            conn = pool.acquire()
+        except sqlite3.Error as e:
+            self._fail(batch, e)
+            return
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for operation in batch:
+                outcomes.append(operation.context.run(self._apply_one, conn, operation))
+
+                if not conn.in_transaction:
+                    # SQLite aborted the whole transaction: nothing of this batch was kept
+                    raise sqlite3.OperationalError("batch transaction aborted")
+
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.exception("Group commit of %s write(s) failed", len(batch))
+            if conn.in_transaction:
+                conn.rollback()
+            self._fail(batch, e)
+            return
+        finally:
+            pool.release(conn)
+
+        for operation, (ok, value) in zip(batch, outcomes):
+            if ok:
+                operation.future.set_result(value)
+            else:
+                operation.future.set_exception(value)
+
+        metrics.write_batch_size.observe(len(batch))
+        logger.debug("Group commit of %s write(s)", len(batch))
+
+    @staticmethod
+    def _apply_one(conn: sqlite3.Connection, operation: WriteOperation) -> tuple[bool, Any]:
+        with bind_connection(conn):
+            conn.execute("SAVEPOINT write_operation")
+            try:
+                result = operation.func(*operation.args, **operation.kwargs)
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK TO write_operation")
+                    conn.execute("RELEASE write_operation")
+                return False, e
+
+            conn.execute("RELEASE write_operation")
+            return True, result
+
+    @staticmethod
+    def _fail(batch: List[WriteOperation], error: Exception):
+        for operation in batch:
+            if not operation.future.done():
+                exception = DatabaseError(error_messages.DATABASE_ERROR)
+                exception.__cause__ = error
+                operation.future.set_exception(exception)
@@ -0,0 +1,13 @@
+"""
+Benchmark suite: synthetic ledgers, micro-benchmarks and end-to-end scenarios.
+
+Usage (from backend/):
+    python -m benchmarks.generate data/bench/ledger.db --clients 100000
+    python -m benchmarks.run --clients 10000 -o results.json
+    python -m benchmarks.compare baseline.json results.json
+    python -m benchmarks.loadtest --preset checkout --concurrency 64
+"""
+import os
+
+# before config is imported: no automatic backups of the benchmark databases
+os.environ.setdefault("NOTAREAL_BACKUP_INTERVAL", "0")
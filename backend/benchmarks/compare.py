@@ -0,0 +1,63 @@
+"""
+Compare two benchmark result files (e.g. the base commit and a branch).
+
+Benchmarks are matched by name and compared on the median; a change beyond
+`--threshold` is reported as a regression or an improvement. Exits with 1
+when any benchmark regressed, so it can gate a CI job.
+
+Usage (from backend/):
+    python -m benchmarks.compare baseline.json results.json --threshold 0.10
+"""
+from pathlib import Path
+from typing import List
+from benchmarks.harness import format_seconds, read_results
+
+def compare_results(baseline: dict, current: dict, threshold: float = 0.10, metric: str = "median") -> List[dict]:
+    """One entry per benchmark present in both files, with the relative change of `metric`."""
+    previous = {result["name"]: result for result in baseline["results"]}
+
+    changes = []
+    for result in current["results"]:
+        before = previous.get(result["name"])
+        if before is None or not before[metric]:
+            continue
+
+        change = result[metric] / before[metric] - 1
+        if change > threshold:
+            verdict = "regression"
+        elif change < -threshold:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+
+        changes.append({
+            "name": result["name"],
+            "before": before[metric],
+            "after": result[metric],
+            "change": change,
+            "verdict": verdict,
+        })
+    return changes
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change reported (default: 0.10)")
+    parser.add_argument("--metric", choices=("min", "median", "mean", "p95"), default="median")
+    args = parser.parse_args()
+
+    baseline, current = read_results(args.baseline), read_results(args.current)
+    if baseline["profile"] != current["profile"]:
+        print("⚠️ The results were measured on different ledger profiles.")
+
+    print(f"{baseline['environment']['commit'] or args.baseline.name} -> {current['environment']['commit'] or args.current.name}")
+    marks = {"regression": "🔺", "improvement": "🔻", "unchanged": "  "}
+    changes = compare_results(baseline, current, args.threshold, args.metric)
+    for change in changes:
+        print(f"{marks[change['verdict']]} {change['name']:<50} {format_seconds(change['before']):>9} -> "
+              f"{format_seconds(change['after']):>9}  {change['change']:+.1%}")
+
+    raise SystemExit(1 if any(change["verdict"] == "regression" for change in changes) else 0)
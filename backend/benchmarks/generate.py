@@ -0,0 +1,357 @@
+"""
+Synthetic ledger generator, writing straight into a new SQLite database.
+
+The rows are produced by a seeded random generator, so the same profile
+always yields the same ledger. Every purchase is split into installments
+(one payment each); paid purchases have all of them, open ones only the
+installments already paid. Purchases are inserted with their final
+`total_paid_value`/`status`, so the schema triggers (table_versions,
+client_balances) leave the database exactly as the API would. The FTS
+triggers, by far the most expensive, are dropped while loading and the
+indexes rebuilt in one pass at the end.
+
+Usage (from backend/):
+    python -m benchmarks.generate data/bench/ledger.db --clients 100000 --purchases-per-client 10
+    python -m benchmarks.generate ledger.db --installments 1:50,3:30,12:20 --paid-ratio 0.4
+"""
+import hashlib
+import json
+import random
+import sqlite3
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, time as dt_time
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from app.migrations import run_migrations
+
+# rows per executemany / transaction while loading
+CHUNK_SIZE = 20_000
+# bumped when the same profile generates different data, so cached ledgers are rebuilt
+GENERATOR_VERSION = 2
+
+DAY = 86_400
+# days between two installments of a purchase
+INSTALLMENT_INTERVAL = 30
+
+FIRST_NAMES = (
+    "Ana", "Antônio", "Beatriz", "Bruno", "Carla", "Carlos", "Daniel", "Eduarda", "Fernanda", "Francisco",
+    "Gabriel", "Helena", "Igor", "Joana", "João", "José", "Júlia", "Lucas", "Luíza", "Marcos",
+    "Maria", "Mateus", "Patrícia", "Paulo", "Pedro", "Rafaela", "Raimundo", "Sebastião", "Sofia", "Vitória",
+)
+LAST_NAMES = (
+    "Almeida", "Alves", "Araújo", "Barbosa", "Cardoso", "Carvalho", "Costa", "Dias", "Ferreira", "Gomes",
+    "Lima", "Martins", "Melo", "Oliveira", "Pereira", "Ribeiro", "Rocha", "Santos", "Silva", "Souza",
+)
+PRODUCTS = (
+    "sementes", "adubo", "ferramentas", "ração", "arroz", "feijão", "café", "material de limpeza",
+    "roupas", "calçados", "remédios", "gás", "tecidos", "utensílios", "material escolar",
+)
+METHODS = (("Pix", 50), ("Dinheiro", 30), ("Cartão", 20))
+
+@dataclass
+class LedgerProfile:
+    clients: int = 1_000
+    # mean purchases per client; the actual count is skewed (a few clients buy a lot)
+    purchases_per_client: float = 10.0
+    # installments per purchase -> weight
+    installments: Dict[int, float] = field(default_factory=lambda: {1: 35, 2: 20, 3: 20, 6: 15, 12: 10})
+    # share of purchases paid in full
+    paid_ratio: float = 0.6
+    # share of purchases (with their payments) deactivated
+    inactive_ratio: float = 0.02
+    # purchases are spread over this many days before `as_of`
+    history_days: int = 730
+    as_of: date = field(default_factory=date.today)
+    seed: int = 42
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["as_of"] = self.as_of.isoformat()
+        data["installments"] = {str(count): weight for count, weight in self.installments.items()}
+        return data
+
+    def fingerprint(self) -> str:
+        """Short hash of the profile, used to name (and reuse) generated databases."""
+        text = json.dumps({**self.to_dict(), "generator": GENERATOR_VERSION}, sort_keys=True)
+        return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+def parse_installments(text: str) -> Dict[int, float]:
+    """Parse `count:weight` pairs, e.g. "1:35,3:40,12:25"."""
+    distribution = {}
+    for pair in text.split(","):
+        count, _, weight = pair.partition(":")
+        distribution[int(count)] = float(weight or 1)
+
+    if not distribution or min(distribution) < 1 or min(distribution.values()) < 0:
+        raise ValueError(f"invalid installment distribution: {text!r}")
+    return distribution
+
+@dataclass
+class LedgerStats:
+    clients: int = 0
+    purchases: int = 0
+    payments: int = 0
+    seconds: float = 0.0
+
+def _split(total: float, parts: int) -> List[float]:
+    """Installment amounts adding up to `total` (the last one takes the rounding)."""
+    base = round(total / parts, 2)
+    return [base] * (parts - 1) + [round(total - base * (parts - 1), 2)]
+
+class LedgerGenerator:
+    """Produce the client, purchase and payment rows of a profile, in id order."""
+
+    def __init__(self, profile: LedgerProfile):
+        self.profile = profile
+        self.rng = random.Random(profile.seed)
+
+        self.end = int(datetime.combine(profile.as_of, dt_time.min).timestamp()) + DAY - 1
+        self.start = self.end - profile.history_days * DAY
+
+        self._counts = list(profile.installments)
+        self._weights = list(profile.installments.values())
+        self._methods = [method for method, _ in METHODS]
+        self._method_weights = [weight for _, weight in METHODS]
+
+        self.purchase_id = 0
+        self.payment_id = 0
+
+    def clients(self) -> Iterator[Tuple[tuple, int]]:
+        """Yield `(client row, created_at)`; the row is in column order, id first."""
+        rng = self.rng
+        for client_id in range(1, self.profile.clients + 1):
+            # customers join over the first 80% of the history
+            created_at = rng.randint(self.start, self.start + int((self.end - self.start) * 0.8))
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+            phone = f"{rng.randint(11, 99)}9{rng.randint(10_000_000, 99_999_999)}"
+            row = (client_id, name, f"cliente{client_id}", phone, f"cliente{client_id}@email.com", 1, created_at, created_at)
+            yield row, created_at
+
+    def purchases(self, client_id: int, since: int) -> Iterator[Tuple[tuple, List[tuple]]]:
+        """Yield `(purchase row, payment rows)` for one client."""
+        rng = self.rng
+        profile = self.profile
+        count = round(rng.expovariate(1 / profile.purchases_per_client)) if profile.purchases_per_client > 0 else 0
+
+        for _ in range(count):
+            self.purchase_id += 1
+            purchase_id = self.purchase_id
+            created_at = rng.randint(since, self.end)
+            total_value = round(min(rng.lognormvariate(4.5, 0.8), 20_000), 2) or 1.0
+            is_active = 0 if rng.random() < profile.inactive_ratio else 1
+
+            installments = rng.choices(self._counts, self._weights)[0]
+            # only installments already due can have been paid
+            due = min(installments, (self.end - created_at) // (INSTALLMENT_INTERVAL * DAY) + 1)
+            paid = installments if rng.random() < profile.paid_ratio else rng.randint(0, max(due - 1, 0))
+
+            payments = []
+            total_paid_value = 0.0
+            for number, amount in enumerate(_split(total_value, installments)[:paid]):
+                self.payment_id += 1
+                payment_date = min(created_at + number * INSTALLMENT_INTERVAL * DAY + rng.randint(0, 5 * DAY), self.end)
+                total_paid_value += amount
+                payments.append((
+                    self.payment_id, purchase_id, amount, payment_date,
+                    rng.choices(self._methods, self._method_weights)[0],
+                    f"Parcela {number + 1}/{installments}", f"REC-{self.payment_id:08d}",
+                    is_active, payment_date, payment_date,
+                ))
+
+            total_paid_value = round(total_paid_value, 2)
+            if not is_active:
+                # like deactivate_purchase: inactive payments no longer count
+                total_paid_value = 0.0
+                status = "pending"
+            elif total_paid_value >= total_value:
+                status = "paid"
+            elif total_paid_value > 0:
+                status = "partial"
+            else:
+                status = "pending"
+
+            updated_at = payments[-1][3] if payments else created_at
+            row = (
+                purchase_id, client_id, f"Compra de {rng.choice(PRODUCTS)}", total_value, total_paid_value,
+                status, f"NF-{purchase_id:07d}", is_active, created_at, updated_at,
+            )
+            yield row, payments
+
+CLIENT_INSERT = "INSERT INTO clients (id, name, nickname, phone, email, is_active, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+PURCHASE_INSERT = """
+    INSERT INTO purchases (id, client_id, description, total_value, total_paid_value, status, note_number, is_active, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+PAYMENT_INSERT = """
+    INSERT INTO payments (id, purchase_id, amount, payment_date, method, description, receipt_number, is_active, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# full-text search tables rebuilt after the load
+FTS_TABLES = ("clients_fts", "purchases_fts", "payments_fts")
+
+def _load(conn: sqlite3.Connection, sql: str, rows: List[tuple]):
+    conn.execute("BEGIN")
+    conn.executemany(sql, rows)
+    conn.execute("COMMIT")
+    rows.clear()
+
+def generate_ledger(path: Path | str, profile: LedgerProfile, progress: bool = False) -> LedgerStats:
+    """Create a new database at `path` (it must not exist) filled with the profile's ledger."""
+    path = Path(path)
+    if path.exists():
+        raise FileExistsError(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    stats = LedgerStats()
+    generator = LedgerGenerator(profile)
+
+    conn = sqlite3.connect(path, isolation_level=None)
+    try:
+        run_migrations(conn)
+        # throwaway file until it is complete: no journal, no fsync
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -200000")
+
+        fts_triggers = conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%\\_fts\\_%' ESCAPE '\\'"
+        ).fetchall()
+        for name, _ in fts_triggers:
+            conn.execute(f"DROP TRIGGER {name}")
+
+        clients = list(generator.clients())
+        for start in range(0, len(clients), CHUNK_SIZE):
+            _load(conn, CLIENT_INSERT, [row for row, _ in clients[start:start + CHUNK_SIZE]])
+        stats.clients = len(clients)
+
+        purchases: List[tuple] = []
+        payments: List[tuple] = []
+        for (client_id, *_), since in clients:
+            for purchase, purchase_payments in generator.purchases(client_id, since):
+                purchases.append(purchase)
+                payments.extend(purchase_payments)
+
+            if len(purchases) >= CHUNK_SIZE:
+                stats.purchases += len(purchases)
+                stats.payments += len(payments)
+                _load(conn, PURCHASE_INSERT, purchases)
+                _load(conn, PAYMENT_INSERT, payments)
+                if progress:
+                    print(f"   {stats.purchases} purchases, {stats.payments} payments...", flush=True)
+
+        stats.purchases += len(purchases)
+        stats.payments += len(payments)
+        _load(conn, PURCHASE_INSERT, purchases)
+        _load(conn, PAYMENT_INSERT, payments)
+
+        conn.execute("BEGIN")
+        for table in FTS_TABLES:
+            conn.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+        for _, sql in fts_triggers:
+            conn.execute(sql)
+        conn.execute("COMMIT")
+
+        conn.execute("ANALYZE")
+        # same journal mode the API uses
+        conn.execute("PRAGMA journal_mode = WAL")
+    except BaseException:
+        conn.close()
+        path.unlink(missing_ok=True)
+        raise
+    conn.close()
+
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+@dataclass
+class LedgerSample:
+    """Row counts of a ledger and the ids the benchmarks query."""
+    clients: int
+    purchases: int
+    payments: int
+    # client with the median number of purchases, and the one with the most
+    client_id: int
+    busy_client_id: int
+    # purchase with the most payments, and an open one (payments can still be added)
+    purchase_id: int
+    open_purchase_id: int
+    note_number: str
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+def sample_ledger(path: Path | str) -> LedgerSample:
+    conn = sqlite3.connect(path)
+    try:
+        counts = [conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("clients", "purchases", "payments")]
+        per_client = conn.execute(
+            "SELECT client_id FROM purchases WHERE is_active = 1 GROUP BY client_id ORDER BY COUNT(*), client_id"
+        ).fetchall()
+        purchase_id, note_number = conn.execute("""
+            SELECT p.id, p.note_number FROM purchases p JOIN payments pay ON pay.purchase_id = p.id
+            WHERE p.is_active = 1 GROUP BY p.id ORDER BY COUNT(*) DESC, p.id LIMIT 1
+        """).fetchone()
+        open_purchase_id = conn.execute(
+            "SELECT id FROM purchases WHERE is_active = 1 AND status != 'paid' ORDER BY total_value - total_paid_value DESC LIMIT 1"
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+    return LedgerSample(
+        *counts,
+        client_id=per_client[len(per_client) // 2][0],
+        busy_client_id=per_client[-1][0],
+        purchase_id=purchase_id,
+        open_purchase_id=open_purchase_id,
+        note_number=note_number,
+    )
+
+def profile_arguments(parser):
+    """Add the ledger profile options to an argparse parser."""
+    defaults = LedgerProfile()
+    parser.add_argument("--clients", type=int, default=defaults.clients, help="number of clients")
+    parser.add_argument("--purchases-per-client", type=float, default=defaults.purchases_per_client,
+                        help="mean purchases per client")
+    parser.add_argument("--installments", type=parse_installments, default=defaults.installments,
+                        help='installment distribution as count:weight pairs (default: "1:35,2:20,3:20,6:15,12:10")')
+    parser.add_argument("--paid-ratio", type=float, default=defaults.paid_ratio, help="share of purchases paid in full")
+    parser.add_argument("--inactive-ratio", type=float, default=defaults.inactive_ratio, help="share of deactivated purchases")
+    parser.add_argument("--history-days", type=int, default=defaults.history_days, help="days of history")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=defaults.as_of, help="last day of the history (YYYY-MM-DD)")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="random seed")
+
+def profile_from_args(args) -> LedgerProfile:
+    return LedgerProfile(
+        clients=args.clients,
+        purchases_per_client=args.purchases_per_client,
+        installments=args.installments,
+        paid_ratio=args.paid_ratio,
+        inactive_ratio=args.inactive_ratio,
+        history_days=args.history_days,
+        as_of=args.as_of,
+        seed=args.seed,
+    )
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic ledger database.")
+    parser.add_argument("path", type=Path, help="database file to create")
+    parser.add_argument("--force", action="store_true", help="replace the file if it exists")
+    profile_arguments(parser)
+    args = parser.parse_args()
+
+    if args.force:
+        for suffix in ("", "-wal", "-shm"):
+            Path(f"{args.path}{suffix}").unlink(missing_ok=True)
+
+    try:
+        stats = generate_ledger(args.path, profile_from_args(args), progress=True)
+    except FileExistsError:
+        print(f"⚠️ {args.path} already exists (use --force to replace it).")
+        raise SystemExit(1)
+
+    print(f"✅ {stats.clients} clients, {stats.purchases} purchases, {stats.payments} payments in {stats.seconds:.1f}s")
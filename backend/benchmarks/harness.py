@@ -0,0 +1,110 @@
+"""
+Timing helpers and the JSON result format shared by the benchmark suites.
+
+A result file holds the environment (commit, Python and SQLite versions,
+machine), the ledger profile and one entry per benchmark with its timing
+statistics in seconds per operation. `benchmarks.compare` diffs two files.
+"""
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import timeit
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List
+
+RESULTS_VERSION = 1
+
+def percentile(sorted_samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_samples[min(int(len(sorted_samples) * fraction), len(sorted_samples) - 1)]
+
+@dataclass
+class Measurement:
+    name: str
+    group: str
+    # seconds per operation, one value per sample
+    samples: List[float]
+    # operations timed per sample
+    ops: int = 1
+    extra: dict = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        samples = sorted(self.samples)
+        median = statistics.median(samples)
+        return {
+            "name": self.name,
+            "group": self.group,
+            "samples": len(samples),
+            "ops": self.ops,
+            "min": samples[0],
+            "median": median,
+            "mean": statistics.fmean(samples),
+            "p90": percentile(samples, 0.90),
+            "p95": percentile(samples, 0.95),
+            "p99": percentile(samples, 0.99),
+            "max": samples[-1],
+            "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            "ops_per_sec": 1 / median if median else None,
+            **self.extra,
+        }
+
+def time_call(fn: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> tuple[List[float], int]:
+    """
+    Time `fn` like `timeit`: pick how many calls fill `min_time`, then time
+    that many calls `repeat` times. Returns (seconds per call per sample, calls per sample).
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / elapsed) + 1) if elapsed else number * 10
+
+    return [timer.timeit(number) / number for _ in range(repeat)], number
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+            cwd=Path(__file__).resolve().parent
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+def environment() -> dict:
+    return {
+        "commit": git_commit(),
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+def write_results(path: Path | str, profile: dict, ledger: dict, measurements: List[Measurement]):
+    data = {
+        "version": RESULTS_VERSION,
+        "environment": environment(),
+        "profile": profile,
+        "ledger": ledger,
+        "results": [measurement.to_dict() for measurement in measurements],
+    }
+    Path(path).write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+def read_results(path: Path | str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
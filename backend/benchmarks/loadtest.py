@@ -0,0 +1,316 @@
+"""
+Concurrent load test: a mix of reads and writes against the API.
+
+Workers pick operations at random by weight (`--mix` or a preset), for a
+fixed duration, either in process through the ASGI app on a copy of a
+generated ledger, or against a running server (`--url`). The report gives
+throughput, latency percentiles and errors per operation, plus the lock
+contention seen by the server during the run, taken from the difference of
+its `/metrics` counters: statements retried or failed on SQLITE_BUSY, time
+writers waited for the write lock (busy_timeout included), requests turned
+away with 503 and the wait for pooled connections.
+
+With several uvicorn workers `/metrics` answers from one process only, so
+the contention counters cover that process.
+
+Usage (from backend/):
+    python -m benchmarks.loadtest --preset checkout --concurrency 64 --duration 30
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --mix get_client:50,create_purchase:50
+"""
+import asyncio
+import random
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List
+import httpx
+from benchmarks.harness import Measurement, format_seconds
+
+Operation = Callable[[httpx.AsyncClient, random.Random, "Targets"], Awaitable[httpx.Response]]
+
+# ===== Targets =====
+@dataclass
+class Targets:
+    """Ids the operations use, discovered through the API before the run."""
+    max_client_id: int
+    open_purchase_ids: List[int]
+    # makes nicknames unique across runs against the same database
+    run_id: str = field(default_factory=lambda: f"{time.time_ns():x}")
+    created: int = 0
+
+async def _client_exists(client: httpx.AsyncClient, client_id: int) -> bool:
+    return (await client.get(f"/clients/{client_id}")).status_code == 200
+
+async def _max_client_id(client: httpx.AsyncClient, known_id: int) -> int:
+    """
+    Largest client id. The lists are ordered by created_at, not id, but ids are
+    AUTOINCREMENT and clients are only deactivated, never deleted, so every id
+    up to the largest exists: double from a known id until one is missing, then bisect.
+    """
+    low, high = known_id, known_id * 2
+    while await _client_exists(client, high):
+        low, high = high, high * 2
+
+    # low exists, high does not
+    while high - low > 1:
+        middle = (low + high) // 2
+        if await _client_exists(client, middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+async def discover_targets(client: httpx.AsyncClient) -> Targets:
+    clients = (await client.get("/clients/", params={"limit": 1})).json()["clients"]
+    purchases = (await client.get("/purchases/", params={"only_pending": "true", "limit": 100})).json()["purchases"]
+    if not clients or not purchases:
+        raise SystemExit("⚠️ The database needs clients and open purchases (generate a ledger first).")
+    return Targets(await _max_client_id(client, clients[0]["id"]), [purchase["id"] for purchase in purchases])
+
+# ===== Operations =====
+def _client_id(rng: random.Random, targets: Targets) -> int:
+    return rng.randint(1, targets.max_client_id)
+
+async def get_client(client, rng, targets):
+    return await client.get(f"/clients/{_client_id(rng, targets)}")
+
+async def list_clients(client, rng, targets):
+    return await client.get("/clients/", params={"limit": 50})
+
+async def client_purchases(client, rng, targets):
+    return await client.get(f"/clients/{_client_id(rng, targets)}/purchases")
+
+async def open_purchases(client, rng, targets):
+    return await client.get("/purchases/", params={"only_pending": "true", "limit": 50})
+
+async def balances(client, rng, targets):
+    return await client.get("/clients/balances", params={"limit": 50})
+
+async def aging(client, rng, targets):
+    return await client.get("/reports/aging")
+
+async def search(client, rng, targets):
+    return await client.get("/search/", params={"q": rng.choice(("silva", "santos", "sementes", "adubo"))})
+
+async def create_client(client, rng, targets):
+    targets.created += 1
+    return await client.post("/clients/", json={"name": "Cliente Carga", "nickname": f"carga-{targets.run_id}-{targets.created}"})
+
+async def create_purchase(client, rng, targets):
+    return await client.post(f"/purchases/{_client_id(rng, targets)}", json={
+        "description": "Compra de teste de carga", "total_value": 120.0, "amount": 40.0, "method": "Pix"
+    })
+
+async def add_payment(client, rng, targets):
+    return await client.post(f"/purchases/{rng.choice(targets.open_purchase_ids)}/payments/", json={
+        "amount": 0.01, "method": "Pix", "description": "Pagamento de teste de carga"
+    })
+
+OPERATIONS: Dict[str, Operation] = {
+    "get_client": get_client,
+    "list_clients": list_clients,
+    "client_purchases": client_purchases,
+    "open_purchases": open_purchases,
+    "balances": balances,
+    "aging": aging,
+    "search": search,
+    "create_client": create_client,
+    "create_purchase": create_purchase,
+    "add_payment": add_payment,
+}
+
+PRESETS: Dict[str, Dict[str, float]] = {
+    # cashiers at the counter: lookups and a lot of writes
+    "checkout": {"get_client": 30, "search": 15, "client_purchases": 15, "create_purchase": 25, "add_payment": 15},
+    # dashboards polling the lists and reports
+    "dashboards": {"list_clients": 25, "open_purchases": 25, "balances": 25, "aging": 15, "get_client": 10},
+    "mixed": {
+        "get_client": 20, "list_clients": 10, "client_purchases": 10, "open_purchases": 10, "balances": 10,
+        "aging": 5, "search": 10, "create_client": 5, "create_purchase": 12, "add_payment": 8,
+    },
+}
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Parse `operation:weight` pairs, e.g. "get_client:70,create_purchase:30"."""
+    mix = {}
+    for pair in text.split(","):
+        name, _, weight = pair.partition(":")
+        if name not in OPERATIONS:
+            raise ValueError(f"unknown operation {name!r} (choose from {', '.join(OPERATIONS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+# ===== Server metrics =====
+def parse_metrics(text: str) -> Dict[str, float]:
+    """Sum the samples of each metric (over all label sets) in the Prometheus text format."""
+    totals: Dict[str, float] = defaultdict(float)
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        name, _, value = line.rpartition(" ")
+        totals[name.partition("{")[0]] += float(value)
+        # histogram bucket of the write lock waits above 1ms
+        if name.startswith("notareal_db_write_lock_wait_seconds_bucket") and 'le="0.001"' in name:
+            totals["write_lock_wait_fast"] += float(value)
+    return totals
+
+async def scrape_metrics(client: httpx.AsyncClient) -> Dict[str, float] | None:
+    response = await client.get("/metrics")
+    return parse_metrics(response.text) if response.status_code == 200 else None
+
+def contention(before: Dict[str, float], after: Dict[str, float]) -> dict:
+    delta = lambda name: after.get(name, 0) - before.get(name, 0)
+    lock_waits = delta("notareal_db_write_lock_wait_seconds_count")
+    return {
+        "busy_retries": int(delta("notareal_db_busy_retries_total")),
+        "busy_errors": int(delta("notareal_db_busy_errors_total")),
+        "write_locks": int(lock_waits),
+        "write_locks_waited": int(lock_waits - delta("write_lock_wait_fast")),
+        "write_lock_wait_seconds": delta("notareal_db_write_lock_wait_seconds_sum"),
+        "rejected_503": int(delta("notareal_executor_rejected_total")),
+        "pool_wait_seconds": delta("notareal_db_pool_wait_seconds_total"),
+        "commits": int(delta("notareal_db_commits_total")),
+    }
+
+# ===== Run =====
+@dataclass
+class OperationStats:
+    latencies: List[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    failures: int = 0
+
+async def _worker(client: httpx.AsyncClient, rng: random.Random, mix: Dict[str, float], targets: Targets,
+                  deadline: float, think: float, stats: Dict[str, OperationStats]):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            response = await OPERATIONS[name](client, rng, targets)
+        except httpx.HTTPError:
+            stats[name].failures += 1
+            continue
+        stats[name].latencies.append(time.perf_counter() - started)
+        stats[name].statuses[response.status_code] += 1
+        if think:
+            await asyncio.sleep(rng.expovariate(1 / think))
+
+async def load_test(client: httpx.AsyncClient, mix: Dict[str, float], concurrency: int, duration: float,
+                    think: float = 0.0, seed: int = 42) -> dict:
+    targets = await discover_targets(client)
+    before = await scrape_metrics(client)
+
+    stats: Dict[str, OperationStats] = defaultdict(OperationStats)
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        _worker(client, random.Random(seed + number), mix, targets, deadline, think, stats)
+        for number in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    after = await scrape_metrics(client)
+
+    operations = []
+    for name, operation in sorted(stats.items()):
+        errors = sum(count for status, count in operation.statuses.items() if status >= 400) + operation.failures
+        requests = len(operation.latencies) + operation.failures
+        measurement = Measurement(name, "loadtest", operation.latencies or [0.0], extra={
+            "requests": requests,
+            "throughput": requests / elapsed,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "statuses": {str(status): count for status, count in sorted(operation.statuses.items())},
+        })
+        operations.append(measurement.to_dict())
+
+    all_latencies = [latency for operation in stats.values() for latency in operation.latencies]
+    requests = sum(operation["requests"] for operation in operations)
+    errors = sum(operation["errors"] for operation in operations)
+    total = Measurement("total", "loadtest", all_latencies or [0.0], extra={
+        "requests": requests,
+        "throughput": requests / elapsed,
+        "errors": errors,
+        "error_rate": errors / requests if requests else 0.0,
+    }).to_dict()
+
+    return {
+        "config": {"mix": mix, "concurrency": concurrency, "duration": duration, "think": think, "seed": seed},
+        "elapsed": elapsed,
+        "total": total,
+        "operations": operations,
+        "contention": contention(before, after) if before is not None and after is not None else None,
+    }
+
+def print_report(report: dict):
+    print(f"{'operation':<18}{'requests':>9}{'req/s':>9}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'errors':>8}")
+    for row in report["operations"] + [report["total"]]:
+        print(f"{row['name']:<18}{row['requests']:>9}{row['throughput']:>9.0f}{format_seconds(row['median']):>10}"
+              f"{format_seconds(row['p90']):>10}{format_seconds(row['p99']):>10}"
+              f"{format_seconds(row['max']):>10}{row['error_rate']:>8.1%}")
+
+    if report["contention"] is None:
+        print("⚠️ /metrics not available: lock contention not measured.")
+        return
+
+    c = report["contention"]
+    print(f"\n🔒 {c['write_locks']} write transactions ({c['commits']} commits); "
+          f"{c['write_locks_waited']} waited over 1ms for the write lock ({format_seconds(c['write_lock_wait_seconds'])} in total)")
+    print(f"   SQLITE_BUSY: {c['busy_retries']} retries, {c['busy_errors']} errors; "
+          f"503 (queue full): {c['rejected_503']}; pool wait: {format_seconds(c['pool_wait_seconds'])}")
+
+async def _run_in_process(mix, concurrency, duration, think, seed) -> dict:
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            return await load_test(client, mix, concurrency, duration, think, seed)
+
+async def _run_remote(url, mix, concurrency, duration, think, seed) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        return await load_test(client, mix, concurrency, duration, think, seed)
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from pathlib import Path
+    from benchmarks.harness import environment
+
+    parser = argparse.ArgumentParser(description="Run a concurrent load test against the API.")
+    parser.add_argument("--url", help="running server (default: in process, on a generated ledger)")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="mixed", help="request mix (default: mixed)")
+    parser.add_argument("--mix", type=parse_mix, help="request mix as operation:weight pairs (overrides --preset)")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20, help="seconds")
+    parser.add_argument("--think", type=float, default=0.0, help="mean pause between requests of a client (seconds)")
+    parser.add_argument("-o", "--output", type=Path, help="JSON report file")
+    # ledger of the in-process run
+    from benchmarks.generate import profile_arguments, profile_from_args
+    profile_arguments(parser)
+    args = parser.parse_args()
+
+    mix = args.mix or PRESETS[args.preset]
+    print(f"🚀 {args.concurrency} clients for {args.duration:.0f}s: " + ", ".join(f"{name} {weight:g}" for name, weight in mix.items()))
+
+    if args.url:
+        try:
+            report = asyncio.run(_run_remote(args.url, mix, args.concurrency, args.duration, args.think, args.seed))
+        except httpx.ConnectError:
+            print(f"⚠️ Could not connect to {args.url}.")
+            raise SystemExit(1)
+        profile = None
+    else:
+        from benchmarks.run import bench_database
+
+        profile = profile_from_args(args)
+        with bench_database(profile):
+            report = asyncio.run(_run_in_process(mix, args.concurrency, args.duration, args.think, args.seed))
+        profile = profile.to_dict()
+
+    print_report(report)
+    if args.output:
+        data = {"environment": environment(), "target": args.url or "in-process", "profile": profile, **report}
+        args.output.write_text(json.dumps(data, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"✅ Report written to {args.output}")
@@ -0,0 +1,77 @@
+"""
+Micro-benchmarks: model construction, list serialization, the pure service
+helpers and the repository queries, called directly against the generated ledger.
+
+Repository lookups behind the entity cache are timed twice: through the
+cache (`[cached]`) and through the undecorated function, which always runs
+the query.
+"""
+from datetime import date
+from typing import Callable, List, Tuple
+from app.database import connection
+from app.models import Client, Purchase, Payment
+from app.repositories import (
+    balance_repository, client_repository, payment_repository, purchase_repository,
+    report_repository, version_repository
+)
+from app.schemas.purchase import PurchaseListResponseSchema
+from app.services import report_service, search_service
+from app.services.purchase_service import compute_purchase_totals
+from app.utils.serializers import PURCHASE
+from benchmarks.generate import LedgerSample
+from benchmarks.harness import Measurement, time_call
+
+MicroBenchmark = Tuple[str, Callable[[], object]]
+
+def micro_benchmarks(sample: LedgerSample) -> List[MicroBenchmark]:
+    with connection() as conn:
+        client_row = conn.execute("SELECT * FROM clients WHERE id = ?", (sample.client_id,)).fetchone()
+        purchase_row = conn.execute("SELECT * FROM purchases WHERE id = ?", (sample.purchase_id,)).fetchone()
+        payment_rows = conn.execute("SELECT * FROM payments WHERE purchase_id = ?", (sample.purchase_id,)).fetchall()
+
+    busy_rows = purchase_repository.get_purchase_rows_by_client_id(sample.busy_client_id)
+    busy_purchases = [Purchase.from_row(row) for row in busy_rows]
+    purchase = Purchase.from_row(purchase_row)
+    payments = [Payment.from_row(row) for row in payment_rows]
+    bounds = report_service._aging_bounds(date.today())
+
+    return [
+        # ===== Models =====
+        ("models.Client.from_row", lambda: Client.from_row(client_row)),
+        ("models.Purchase.from_row", lambda: Purchase.from_row(purchase_row)),
+        ("models.Payment.from_row", lambda: Payment.from_row(payment_rows[0])),
+        ("models.Payment.from_row[purchase]", lambda: [Payment.from_row(row) for row in payment_rows]),
+        # ===== Serialization (list of a busy client's purchases) =====
+        ("serializers.PurchaseListResponseSchema[busy]", lambda: PurchaseListResponseSchema.model_validate(
+            {"message": "", "purchases": busy_purchases}, from_attributes=True).model_dump_json()),
+        ("serializers.PURCHASE.encode[busy]", lambda: PURCHASE.encode(busy_rows)),
+        # ===== Services =====
+        ("services.compute_purchase_totals", lambda: compute_purchase_totals(purchase, payments)),
+        ("services.search[silva]", lambda: search_service.search("silva")),
+        # ===== Repositories =====
+        ("repositories.get_client_by_id[cached]", lambda: client_repository.get_client_by_id(sample.client_id)),
+        ("repositories.get_client_by_id", lambda: client_repository.get_client_by_id.__wrapped__(sample.client_id)),
+        ("repositories.get_purchase_by_id", lambda: purchase_repository.get_purchase_by_id.__wrapped__(sample.purchase_id)),
+        ("repositories.get_clients[50]", lambda: client_repository.get_clients(50)),
+        ("repositories.get_purchases[pending,50]", lambda: purchase_repository.get_purchases(50, 0, True)),
+        ("repositories.get_purchases_by_client_id[busy]",
+         lambda: purchase_repository.get_purchases_by_client_id(sample.busy_client_id)),
+        ("repositories.get_payments[purchase]", lambda: payment_repository.get_payments(purchase_id=sample.purchase_id)),
+        ("repositories.get_client_balances[50]", lambda: balance_repository.get_client_balances(50)),
+        ("repositories.get_client_aging", lambda: report_repository.get_client_aging(bounds)),
+        ("repositories.get_table_versions", lambda: version_repository.get_table_versions(("clients", "purchases", "payments"))),
+    ]
+
+def run_micro(sample: LedgerSample, repeat: int = 5, min_time: float = 0.2,
+              only: str | None = None, progress: Callable[[Measurement], None] | None = None) -> List[Measurement]:
+    measurements = []
+    for name, fn in micro_benchmarks(sample):
+        if only and only not in name:
+            continue
+
+        samples, number = time_call(fn, repeat, min_time)
+        measurement = Measurement(name, "micro", samples, number)
+        measurements.append(measurement)
+        if progress:
+            progress(measurement)
+    return measurements
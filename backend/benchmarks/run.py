@@ -0,0 +1,90 @@
+"""
+Run the benchmark suites against a generated ledger and write the results as JSON.
+
+The ledger of a profile is generated once into `data/bench/` (named after the
+profile fingerprint) and copied before each run, since the write scenarios
+change it. The default profile ends today: pin `--as-of` to compare runs
+made on different days.
+
+Usage (from backend/):
+    python -m benchmarks.run -o results.json
+    python -m benchmarks.run --clients 100000 --suite micro --only repositories
+"""
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from app import database
+from benchmarks.generate import LedgerProfile, LedgerSample, generate_ledger, sample_ledger
+from benchmarks.harness import Measurement, format_seconds, write_results
+
+BENCH_DIR = database.DATA_DIR / "bench"
+
+def ledger_path(profile: LedgerProfile) -> Path:
+    """Generated ledger of `profile`, created on first use."""
+    path = BENCH_DIR / f"ledger-{profile.fingerprint()}.db"
+    if not path.exists():
+        print(f"🚀 Generating ledger ({profile.clients} clients) into {path}...")
+        stats = generate_ledger(path, profile)
+        print(f"   {stats.purchases} purchases, {stats.payments} payments in {stats.seconds:.1f}s")
+    return path
+
+@contextmanager
+def bench_database(profile: LedgerProfile) -> Iterator[LedgerSample]:
+    """Point the app at a fresh copy of the profile's ledger for the `with` block."""
+    source = ledger_path(profile)
+    sample = sample_ledger(source)
+
+    with tempfile.TemporaryDirectory(dir=BENCH_DIR) as tmp:
+        database.DB_PATH = Path(tmp) / source.name
+        shutil.copyfile(source, database.DB_PATH)
+        try:
+            yield sample
+        finally:
+            database.close_pool()
+
+def print_measurement(measurement: Measurement):
+    result = measurement.to_dict()
+    line = f"   {measurement.name:<50} median {format_seconds(result['median']):>9}  p95 {format_seconds(result['p95']):>9}"
+    if "throughput" in result:
+        line += f"  {result['throughput']:8.0f} req/s"
+        if result["errors"]:
+            line += f"  ⚠️ {result['errors']} errors"
+    print(line)
+
+def run(profile: LedgerProfile, suites: list[str], output: Path | None, repeat: int, requests: int,
+        only: str | None = None) -> list[Measurement]:
+    with bench_database(profile) as sample:
+        # imported here: they import the app, which must see the benchmark database
+        from benchmarks.micro import run_micro
+        from benchmarks.scenarios import run_scenarios
+
+        measurements = []
+        if "micro" in suites:
+            print("⏱️ Micro-benchmarks")
+            measurements += run_micro(sample, repeat, only=only, progress=print_measurement)
+        if "scenarios" in suites:
+            print("⏱️ Scenarios")
+            measurements += run_scenarios(sample, requests, profile.seed, only=only, progress=print_measurement)
+
+    if output:
+        write_results(output, profile.to_dict(), sample.to_dict(), measurements)
+        print(f"✅ Results written to {output}")
+    return measurements
+
+if __name__ == "__main__":
+    import argparse
+    from benchmarks.generate import profile_arguments, profile_from_args
+
+    parser = argparse.ArgumentParser(description="Run the benchmark suites.")
+    parser.add_argument("-o", "--output", type=Path, help="JSON results file")
+    parser.add_argument("--suite", choices=("micro", "scenarios"), action="append",
+                        help="suite to run (repeatable; default: all)")
+    parser.add_argument("--only", help="run only the benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per micro-benchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    profile_arguments(parser)
+    args = parser.parse_args()
+
+    run(profile_from_args(args), args.suite or ["micro", "scenarios"], args.output, args.repeat, args.requests, args.only)
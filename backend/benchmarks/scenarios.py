@@ -0,0 +1,126 @@
+"""
+End-to-end scenarios: HTTP requests through the whole ASGI app (middleware,
+validation, executor, database, serialization), in process and without a
+network, using httpx's ASGI transport.
+
+Each scenario sends `requests` requests from `concurrency` concurrent
+workers and reports the latency of every request plus the throughput.
+Write scenarios run last, so they do not change what the reads see.
+"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List
+import httpx
+from benchmarks.generate import LedgerSample
+from benchmarks.harness import Measurement
+
+Request = Callable[[httpx.AsyncClient, random.Random, dict], Awaitable[httpx.Response]]
+
+@dataclass
+class Scenario:
+    name: str
+    request: Request
+    requests: int = 200
+    concurrency: int = 1
+    # runs once before timing; its result is passed to every request as `state`
+    setup: Callable[[httpx.AsyncClient], Awaitable[dict]] | None = None
+
+def build_scenarios(sample: LedgerSample, requests: int = 200) -> List[Scenario]:
+    def get(url_of: Callable[[random.Random], str]) -> Request:
+        return lambda client, rng, state: client.get(url_of(rng))
+
+    random_client = lambda rng: f"/clients/{rng.randint(1, sample.clients)}"
+    read_urls = (
+        random_client,
+        lambda rng: "/clients/?limit=50",
+        lambda rng: f"/clients/{sample.client_id}/purchases",
+        lambda rng: "/purchases/?only_pending=true&limit=50",
+        lambda rng: "/clients/balances?limit=50",
+        lambda rng: f"/purchases/{sample.purchase_id}/payments/",
+        lambda rng: "/search/?q=silva",
+    )
+
+    async def etag_setup(client: httpx.AsyncClient) -> dict:
+        response = await client.get(f"/clients/{sample.client_id}")
+        return {"If-None-Match": response.headers["ETag"]}
+
+    async def create_purchase(client: httpx.AsyncClient, rng: random.Random, state: dict) -> httpx.Response:
+        return await client.post(f"/purchases/{rng.randint(1, sample.clients)}", json={
+            "description": "Compra de benchmark", "total_value": 120.0, "amount": 40.0, "method": "Pix"
+        })
+
+    async def add_payment(client: httpx.AsyncClient, rng: random.Random, state: dict) -> httpx.Response:
+        return await client.post(f"/purchases/{sample.open_purchase_id}/payments/", json={
+            "amount": 0.01, "method": "Pix", "description": "Pagamento de benchmark"
+        })
+
+    return [
+        # ===== Reads =====
+        Scenario("GET /clients/{id}", get(random_client), requests),
+        Scenario("GET /clients/{id} (304)",
+                 lambda client, rng, state: client.get(f"/clients/{sample.client_id}", headers=state),
+                 requests, setup=etag_setup),
+        Scenario("GET /clients/", get(read_urls[1]), requests),
+        Scenario("GET /clients/{id}/purchases", get(read_urls[2]), requests),
+        Scenario("GET /purchases/?only_pending", get(read_urls[3]), requests),
+        Scenario("GET /clients/balances", get(read_urls[4]), requests),
+        Scenario("GET /purchases/{id}/payments/", get(read_urls[5]), requests),
+        Scenario("GET /search/", get(read_urls[6]), requests),
+        Scenario("GET /reports/aging", get(lambda rng: "/reports/aging"), max(requests // 10, 10)),
+        Scenario("mixed reads x32", get(lambda rng: rng.choice(read_urls)(rng)), requests * 5, concurrency=32),
+        # ===== Writes =====
+        Scenario("POST /purchases/{client_id}", create_purchase, requests),
+        Scenario("POST /purchases/{client_id} x16", create_purchase, requests * 2, concurrency=16),
+        Scenario("POST /purchases/{id}/payments/", add_payment, requests),
+    ]
+
+async def _run_scenario(client: httpx.AsyncClient, scenario: Scenario, seed: int) -> Measurement:
+    state = await scenario.setup(client) if scenario.setup else {}
+    rng = random.Random(seed)
+    latencies: List[float] = []
+    errors = 0
+    remaining = scenario.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await scenario.request(client, rng, state)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return Measurement(scenario.name, "scenario", latencies, extra={
+        "concurrency": scenario.concurrency,
+        "throughput": len(latencies) / elapsed,
+        "errors": errors,
+    })
+
+async def _run_scenarios(sample: LedgerSample, requests: int, seed: int, only: str | None,
+                         progress: Callable[[Measurement], None] | None) -> List[Measurement]:
+    from app.main import app
+
+    measurements = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for scenario in build_scenarios(sample, requests):
+                if only and only not in scenario.name:
+                    continue
+
+                measurement = await _run_scenario(client, scenario, seed)
+                measurements.append(measurement)
+                if progress:
+                    progress(measurement)
+    return measurements
+
+def run_scenarios(sample: LedgerSample, requests: int = 200, seed: int = 42, only: str | None = None,
+                  progress: Callable[[Measurement], None] | None = None) -> List[Measurement]:
+    return asyncio.run(_run_scenarios(sample, requests, seed, only, progress))
@@ -0,0 +1,72 @@
+import os
+
+# ===== Database connection pool =====
+# Maximum number of SQLite connections kept open by the API process
+DB_POOL_SIZE = int(os.getenv("NOTAREAL_DB_POOL_SIZE", "8"))
+# Seconds to wait for a free connection before failing the request
+DB_POOL_TIMEOUT = float(os.getenv("NOTAREAL_DB_POOL_TIMEOUT", "10"))
+# Idle connections older than this (seconds) are pinged before being reused
+DB_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("NOTAREAL_DB_POOL_HEALTH_CHECK_INTERVAL", "30"))
+
+# ===== Bulk import =====
+# Rows validated and written per transaction
+BULK_CHUNK_SIZE = int(os.getenv("NOTAREAL_BULK_CHUNK_SIZE", "1000"))
+# Row errors kept in the import report (the rest are only counted)
+BULK_MAX_ERRORS = int(os.getenv("NOTAREAL_BULK_MAX_ERRORS", "1000"))
+
+# ===== Export =====
+# Rows fetched from the cursor (and written to the response) per batch
+EXPORT_BATCH_SIZE = int(os.getenv("NOTAREAL_EXPORT_BATCH_SIZE", "500"))
+
+# ===== Batch reads =====
+# Ids (or note/receipt numbers) accepted by one batch read (`?ids=` and POST /lookup)
+BATCH_MAX_IDS = int(os.getenv("NOTAREAL_BATCH_MAX_IDS", "500"))
+
+# ===== Backup =====
+# Folder for the .zip backups (default: backend/data/backups)
+BACKUP_DIR = os.getenv("NOTAREAL_BACKUP_DIR") or None
+# Database pages copied per backup step; writers can run between steps
+BACKUP_PAGES_PER_STEP = int(os.getenv("NOTAREAL_BACKUP_PAGES_PER_STEP", "256"))
+# Seconds to pause between backup steps
+BACKUP_STEP_SLEEP = float(os.getenv("NOTAREAL_BACKUP_STEP_SLEEP", "0.005"))
+# Seconds between automatic backups (0 disables the scheduler)
+BACKUP_INTERVAL = float(os.getenv("NOTAREAL_BACKUP_INTERVAL", "86400"))
+# Number of backups kept; older ones are deleted after each new backup
+BACKUP_RETENTION = int(os.getenv("NOTAREAL_BACKUP_RETENTION", "7"))
+
+# ===== Database executor (async routes) =====
+# Threads running read-only work; writes always go through a single writer thread
+DB_READER_THREADS = int(os.getenv("NOTAREAL_DB_READER_THREADS", "4"))
+# Queued + running operations allowed per queue before answering 503
+DB_MAX_PENDING_READS = int(os.getenv("NOTAREAL_DB_MAX_PENDING_READS", "64"))
+DB_MAX_PENDING_WRITES = int(os.getenv("NOTAREAL_DB_MAX_PENDING_WRITES", "32"))
+# Retry-After (seconds) sent with the 503 responses
+DB_RETRY_AFTER = int(os.getenv("NOTAREAL_DB_RETRY_AFTER", "1"))
+
+# ===== Group commit writer =====
+# Maximum write operations committed together in one transaction
+WRITE_BATCH_SIZE = int(os.getenv("NOTAREAL_WRITE_BATCH_SIZE", "64"))
+# Seconds the writer waits for more operations before committing a batch
+WRITE_BATCH_WAIT = float(os.getenv("NOTAREAL_WRITE_BATCH_WAIT", "0.002"))
+
+# ===== Entity cache =====
+# Clients, purchases and payments kept in the in-memory LRU cache (0 disables it)
+CACHE_MAX_ENTRIES = int(os.getenv("NOTAREAL_CACHE_MAX_ENTRIES", "4096"))
+
+# ===== Printing (PDF notes and receipts) =====
+# Store name printed on the header of notes and receipts
+STORE_NAME = os.getenv("NOTAREAL_STORE_NAME", "NotaReal Fiados")
+# Processes rendering batch print runs (0 renders on a thread of the API process)
+PRINT_WORKERS = int(os.getenv("NOTAREAL_PRINT_WORKERS", "2"))
+# Notes rendered per process pool task in batch print runs
+PRINT_DOCUMENTS_PER_TASK = int(os.getenv("NOTAREAL_PRINT_DOCUMENTS_PER_TASK", "50"))
+
+# ===== Instrumentation =====
+# Statements slower than this (milliseconds) go to the slow-query log (0 disables it)
+SLOW_QUERY_MS = float(os.getenv("NOTAREAL_SLOW_QUERY_MS", "200"))
+# File for the slow-query log (JSON lines); unset logs through the "app.slow_queries" logger only
+SLOW_QUERY_LOG = os.getenv("NOTAREAL_SLOW_QUERY_LOG") or None
+# Retries of a statement failing with SQLITE_BUSY outside of a transaction (after busy_timeout)
+DB_BUSY_RETRIES = int(os.getenv("NOTAREAL_DB_BUSY_RETRIES", "3"))
+# Base backoff (seconds) between busy retries, multiplied by the attempt number
+DB_BUSY_RETRY_DELAY = float(os.getenv("NOTAREAL_DB_BUSY_RETRY_DELAY", "0.05"))